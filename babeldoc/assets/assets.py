@@ -1,11 +1,13 @@
+from __future__ import annotations
+
 import asyncio
 import hashlib
 import logging
 import threading
 import zipfile
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import httpx
 from babeldoc.assets import embedding_assets_metadata
 from babeldoc.assets.embedding_assets_metadata import DOC_LAYOUT_ONNX_MODEL_URL
 from babeldoc.assets.embedding_assets_metadata import (
@@ -24,8 +26,13 @@ from tenacity import retry
 from tenacity import stop_after_attempt
 from tenacity import wait_exponential
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
+DOCLAYOUT_INT8_ONNX_MODEL_NAME = "doclayout_yolo_docstructbench_imgsz1024.int8.onnx"
+
 
 class ResultContainer:
     def __init__(self):
@@ -60,6 +67,8 @@ def _retry_if_not_cancelled_and_failed(retry_state):
             logger.debug("Operation was cancelled, not retrying")
             return False
         # Retry on network related errors
+        import httpx
+
         if isinstance(
             exception, httpx.HTTPError | ConnectionError | ValueError | TimeoutError
         ):
@@ -98,6 +107,8 @@ async def download_file(
     sha3_256: str = None,
 ):
     if client is None:
+        import httpx
+
         async with httpx.AsyncClient() as client:
             response = await client.get(url, follow_redirects=True)
     else:
@@ -128,6 +139,8 @@ async def get_font_metadata(
         exit(1)
 
     if client is None:
+        import httpx
+
         async with httpx.AsyncClient() as client:
             response = await client.get(
                 FONT_METADATA_URL[upstream], follow_redirects=True
@@ -208,6 +221,35 @@ async def get_doclayout_onnx_model_path_async(client: httpx.AsyncClient | None =
     return onnx_path
 
 
+async def get_doclayout_int8_onnx_model_path_async(
+    client: httpx.AsyncClient | None = None,
+):
+    """Int8 variant of the doclayout model, quantized locally from the FP32 one.
+
+    Run babeldoc/tools/quantize_doclayout.py for a calibrated static model,
+    otherwise the weights are quantized dynamically on first use.
+    """
+    from babeldoc.docvision.quantization import get_quantized_model_source
+    from babeldoc.docvision.quantization import quantize_doclayout_model
+
+    onnx_path = await get_doclayout_onnx_model_path_async(client)
+    int8_path = get_cache_file_path(DOCLAYOUT_INT8_ONNX_MODEL_NAME, "models")
+    if (
+        get_quantized_model_source(int8_path)
+        == DOCLAYOUT_YOLO_DOCSTRUCTBENCH_IMGSZ1024ONNX_SHA3_256
+    ):
+        return int8_path
+
+    logger.info("int8 doclayout onnx model not found or outdated, quantizing...")
+    await asyncio.to_thread(
+        quantize_doclayout_model,
+        onnx_path,
+        int8_path,
+        source_sha3_256=DOCLAYOUT_YOLO_DOCSTRUCTBENCH_IMGSZ1024ONNX_SHA3_256,
+    )
+    return int8_path
+
+
 async def get_table_detection_rapidocr_model_path_async(
     client: httpx.AsyncClient | None = None,
 ):
@@ -230,7 +272,9 @@ async def get_table_detection_rapidocr_model_path_async(
     return onnx_path
 
 
-def get_doclayout_onnx_model_path():
+def get_doclayout_onnx_model_path(quantized: bool = False):
+    if quantized:
+        return run_coro(get_doclayout_int8_onnx_model_path_async())
     return run_coro(get_doclayout_onnx_model_path_async())
 
 
@@ -323,6 +367,7 @@ async def download_all_fonts_async(client: httpx.AsyncClient | None = None):
 
 async def async_warmup():
     logger.info("Downloading all assets...")
+    import httpx
     from tiktoken import encoding_for_model
 
     _ = encoding_for_model("gpt-4o")
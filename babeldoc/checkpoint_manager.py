@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import orjson
+
+from babeldoc.const import __version__
+from babeldoc.document_il import il_version_1
+from babeldoc.document_il.xml_converter import XMLConverter
+from babeldoc.translation_config import TranslationConfig
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FORMAT_VERSION = 1
+
+
+class CheckpointManager:
+    """Persists the IL after each pipeline stage so that a job can resume.
+
+    Checkpoints live in ``<working_dir>/checkpoints/<key>``, where the key is
+    derived from the hash of the input file and a fingerprint of every config
+    option that influences the IL. A re-run with a different input or config
+    therefore never picks up a stale checkpoint. The input of a split part is
+    identified by the original input file and the page range of the part.
+    """
+
+    def __init__(self, translation_config: TranslationConfig, stages: list[str]):
+        self.translation_config = translation_config
+        self.stages = stages
+        self.enabled = translation_config.stage_checkpoint
+        self.xml_converter = XMLConverter()
+        self.manifest = None
+        if not self.enabled:
+            return
+        if translation_config._is_temp_dir:
+            logger.warning(
+                "stage checkpoint is enabled but working dir is a temp dir, "
+                "checkpoints can not be reused by a later run"
+            )
+        self.input_hash = self._input_hash(translation_config)
+        self.config_fingerprint = self._config_fingerprint(translation_config)
+        self.root_dir = Path(translation_config.get_working_file_path("checkpoints"))
+        self.checkpoint_dir = (
+            self.root_dir / f"{self.input_hash[:16]}-{self.config_fingerprint[:16]}"
+        )
+
+    @staticmethod
+    def _hash_file(path) -> str:
+        sha256_hash = hashlib.sha256()
+        with Path(path).open("rb") as f:
+            for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256_hash.update(byte_block)
+        return sha256_hash.hexdigest()
+
+    @classmethod
+    def _input_hash(cls, config: TranslationConfig) -> str:
+        if config.split_part_source is None:
+            return cls._hash_file(config.input_file)
+        input_file, start_page, end_page = config.split_part_source
+        return hashlib.sha256(
+            f"{cls._hash_file(input_file)}:{start_page}-{end_page}".encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _config_fingerprint(config: TranslationConfig) -> str:
+        translator = config.translator
+        translator_params = None
+        if translator is not None:
+            translator_params = [
+                translator.name,
+                translator.cache.translate_engine_params,
+            ]
+        data = {
+            "version": __version__,
+            "lang_in": config.lang_in,
+            "lang_out": config.lang_out,
+            "page_ranges": config.page_ranges,
+            "formular_font_pattern": config.formular_font_pattern,
+            "formular_char_pattern": config.formular_char_pattern,
+            "split_short_lines": config.split_short_lines,
+            "short_line_split_factor": config.short_line_split_factor,
+            "disable_rich_text_translate": config.disable_rich_text_translate,
+            "min_text_length": config.min_text_length,
+            "watermark_output_mode": config.watermark_output_mode.value,
+            "table_model": type(config.table_model).__name__,
+            "doc_layout_model": type(config.doc_layout_model).__name__,
+            "doc_layout_quantized": config.doc_layout_quantized,
+            "show_char_box": config.show_char_box,
+            "skip_scanned_detection": config.skip_scanned_detection,
+            "ocr_workaround": config.ocr_workaround,
+            "custom_system_prompt": config.custom_system_prompt,
+            "add_formula_placehold_hint": config.add_formula_placehold_hint,
+            "debug": config.debug,
+            "translator": translator_params,
+        }
+        return hashlib.sha256(
+            orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.checkpoint_dir / "manifest.json"
+
+    def _write_atomic(self, path: Path, data: bytes):
+        temp_path = path.with_name(f"{path.name}.tmp")
+        with temp_path.open("wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        Path(temp_path).replace(path)
+
+    def _discard_stale(self):
+        if not self.root_dir.exists():
+            return
+        for path in self.root_dir.iterdir():
+            if path != self.checkpoint_dir:
+                logger.info(
+                    f"discard checkpoint {path.name}: input or config has changed"
+                )
+                shutil.rmtree(path, ignore_errors=True)
+
+    def load(self) -> tuple[str | None, il_version_1.Document | None]:
+        """Return the last completed stage and its IL, or (None, None)."""
+        if not self.enabled:
+            return None, None
+        self._discard_stale()
+        if not self._manifest_path.exists():
+            return None, None
+        try:
+            manifest = orjson.loads(self._manifest_path.read_bytes())
+            if (
+                manifest["format_version"] != CHECKPOINT_FORMAT_VERSION
+                or manifest["input_hash"] != self.input_hash
+                or manifest["config_fingerprint"] != self.config_fingerprint
+            ):
+                logger.warning("refuse to resume: checkpoint does not match this job")
+                self.clear()
+                return None, None
+            stage_name = manifest["stage"]
+            if stage_name not in self.stages:
+                raise ValueError(f"unknown checkpoint stage {stage_name}")
+            docs = self.xml_converter.read_binary(
+                self.checkpoint_dir / manifest["il_file"]
+            )
+        except Exception:
+            logger.warning(
+                "failed to load checkpoint, start from scratch", exc_info=True
+            )
+            self.clear()
+            return None, None
+        self.manifest = manifest
+        logger.info(f"resume from checkpoint after stage: {stage_name}")
+        return stage_name, docs
+
+    def is_completed(self, stage_name: str) -> bool:
+        """Whether the stage was completed by a previous run of this job."""
+        if self.manifest is None:
+            return False
+        return self.stages.index(stage_name) <= self.stages.index(
+            self.manifest["stage"]
+        )
+
+    def save(
+        self,
+        stage_name: str,
+        docs: il_version_1.Document,
+        extra: dict | None = None,
+        extra_files: dict[str, bytes | None] | None = None,
+    ):
+        if not self.enabled:
+            return
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        il_file = f"{self.stages.index(stage_name):02d}.bdil"
+        self._write_atomic(
+            self.checkpoint_dir / il_file, self.xml_converter.to_binary(docs, level=1)
+        )
+        for name, data in (extra_files or {}).items():
+            if data is not None:
+                self._write_atomic(self.checkpoint_dir / name, data)
+        previous = self.manifest
+        self.manifest = {
+            "format_version": CHECKPOINT_FORMAT_VERSION,
+            "input_hash": self.input_hash,
+            "config_fingerprint": self.config_fingerprint,
+            "stage": stage_name,
+            "il_file": il_file,
+            "extra": extra or {},
+        }
+        self._write_atomic(self._manifest_path, orjson.dumps(self.manifest))
+        # only the latest IL is needed to resume
+        if previous and previous["il_file"] != il_file:
+            (self.checkpoint_dir / previous["il_file"]).unlink(missing_ok=True)
+        logger.debug(f"saved checkpoint after stage: {stage_name}")
+
+    def get_extra(self, key: str, default=None):
+        if self.manifest is None:
+            return default
+        return self.manifest["extra"].get(key, default)
+
+    def read_extra_file(self, name: str) -> bytes | None:
+        path = self.checkpoint_dir / name
+        if not self.enabled or not path.exists():
+            return None
+        return path.read_bytes()
+
+    def skip_stage(self, stage_name: str):
+        """Report a stage restored from checkpoint as done."""
+        with self.translation_config.progress_monitor.stage_start(
+            stage_name, 1
+        ) as progress:
+            progress.advance(1)
+
+    def clear(self):
+        self.manifest = None
+        if self.enabled and self.checkpoint_dir.exists():
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
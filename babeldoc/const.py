@@ -1,3 +1,4 @@
+import functools
 import os
 import shutil
 import subprocess
@@ -17,25 +18,39 @@ def get_cache_file_path(filename: str, sub_folder: str | None = None) -> Path:
     return CACHE_FOLDER / filename
 
 
-try:
-    git_path = shutil.which("git")
-    if git_path is None:
-        raise FileNotFoundError("git executable not found")
-    two_parent = Path(__file__).resolve().parent.parent
-    md_ = two_parent / "docs" / "README.md"
-    if two_parent.name == "site-packages" or not md_.exists():
-        raise FileNotFoundError("not in git repo")
-    WATERMARK_VERSION = (
-        subprocess.check_output(  # noqa: S603
-            [git_path, "describe", "--always"],
-            cwd=Path(__file__).resolve().parent,
+@functools.cache
+def get_watermark_version() -> str:
+    """Version shown in the watermark, the git revision in a source checkout.
+
+    git is only run on first use, not on import.
+    """
+    try:
+        git_path = shutil.which("git")
+        if git_path is None:
+            raise FileNotFoundError("git executable not found")
+        two_parent = Path(__file__).resolve().parent.parent
+        md_ = two_parent / "docs" / "README.md"
+        if two_parent.name == "site-packages" or not md_.exists():
+            raise FileNotFoundError("not in git repo")
+        return (
+            subprocess.check_output(  # noqa: S603
+                [git_path, "describe", "--always"],
+                cwd=Path(__file__).resolve().parent,
+            )
+            .strip()
+            .decode()
         )
-        .strip()
-        .decode()
-    )
-except (OSError, FileNotFoundError, subprocess.CalledProcessError):
-    WATERMARK_VERSION = f"v{__version__}"
+    except (OSError, FileNotFoundError, subprocess.CalledProcessError):
+        return f"v{__version__}"
+
+
+def __getattr__(name: str):
+    # WATERMARK_VERSION used to be computed on import
+    if name == "WATERMARK_VERSION":
+        return get_watermark_version()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
+# tiktoken creates the folder when it caches a file
 TIKTOKEN_CACHE_FOLDER = CACHE_FOLDER / "tiktoken"
-TIKTOKEN_CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
 os.environ["TIKTOKEN_CACHE_DIR"] = str(TIKTOKEN_CACHE_FOLDER)
@@ -3,6 +3,7 @@ import itertools
 import logging
 import os
 import re
+import shutil
 import time
 import unicodedata
 from multiprocessing import Process
@@ -14,6 +15,7 @@ from bitstring import BitStream
 
 from babeldoc.assets.embedding_assets_metadata import FONT_NAMES
 from babeldoc.document_il import il_version_1
+from babeldoc.document_il.utils.font_subset import get_font_subset_pool
 from babeldoc.document_il.utils.fontmap import FontMapper
 from babeldoc.document_il.utils.zstd_helper import zstd_decompress
 from babeldoc.translation_config import TranslateResult
@@ -158,25 +160,6 @@ def reproduce_cmap(doc):
     return doc
 
 
-def _subset_fonts_process(pdf_path, output_path):
-    """Function to run in subprocess for font subsetting.
-
-    Args:
-        pdf_path: Path to the PDF file to subset
-        output_path: Path where to save the result
-    """
-    try:
-        pdf = pymupdf.open(pdf_path)
-        pdf.subset_fonts(fallback=False)
-        pdf.save(output_path)
-        # 返回 0 表示成功
-        os._exit(0)
-    except Exception as e:
-        logger.error(f"Error in font subsetting subprocess: {e}")
-        # 返回 1 表示失败
-        os._exit(1)
-
-
 def _save_pdf_clean_process(
     pdf_path,
     output_path,
@@ -215,6 +198,136 @@ def _save_pdf_clean_process(
         os._exit(1)
 
 
+class PdfSaveTask:
+    """Save a PDF in a subprocess, see PDFCreater.save_pdf_with_timeout.
+
+    The subprocess is started on creation, so several outputs can be saved
+    at the same time. wait() returns True if the subprocess saved the file,
+    False if fallback to clean=False was used. Tasks running at the same
+    time need distinct tags.
+    """
+
+    def __init__(
+        self,
+        pdf: pymupdf.Document,
+        output_path: str,
+        translation_config: TranslationConfig,
+        garbage: int = 1,
+        deflate: bool = True,
+        clean: bool = True,
+        deflate_fonts: bool = True,
+        linear: bool = False,
+        timeout: int = 120,
+        tag: str = "",
+    ):
+        self.pdf = pdf
+        self.output_path = output_path
+        self.garbage = garbage
+        self.deflate = deflate
+        self.clean = clean
+        self.deflate_fonts = deflate_fonts
+        self.linear = linear
+        self.timeout = timeout
+        # Create temporary file paths
+        self.temp_input = str(
+            translation_config.get_working_file_path(f"temp_save_input_{tag}.pdf")
+        )
+        self.temp_output = str(
+            translation_config.get_working_file_path(f"temp_save_output_{tag}.pdf")
+        )
+
+        # Save PDF to temporary file first
+        pdf.save(self.temp_input)
+
+        # Try to save with clean=True in a subprocess
+        self.process = Process(
+            target=_save_pdf_clean_process,
+            args=(
+                self.temp_input,
+                self.temp_output,
+                garbage,
+                deflate,
+                clean,
+                deflate_fonts,
+                linear,
+            ),
+        )
+        self.process.start()
+        self.start_time = time.time()
+
+    def _terminate(self):
+        self.process.terminate()
+        try:
+            self.process.join(5)  # Give it 5 seconds to clean up
+            if self.process.is_alive():
+                logger.warning("Subprocess did not terminate, killing it")
+                self.process.kill()
+                self.process.join()
+        except Exception as e:
+            logger.error(f"Error terminating PDF save process: {e}")
+
+    def cancel(self):
+        if self.process.is_alive():
+            self._terminate()
+
+    def _fallback_save(self):
+        # Fallback to save without clean parameter
+        try:
+            self.pdf.save(
+                self.output_path,
+                garbage=self.garbage,
+                deflate=self.deflate,
+                clean=False,
+                deflate_fonts=self.deflate_fonts,
+                linear=self.linear,
+            )
+        except Exception as e:
+            logger.error(f"Error in fallback save: {e}")
+            # Last resort: basic save
+            self.pdf.save(self.output_path)
+
+    def wait(self) -> bool:
+        # Wait for subprocess with timeout
+        self.process.join(max(0.0, self.timeout - (time.time() - self.start_time)))
+        if self.process.is_alive():
+            logger.warning(
+                f"PDF save with clean={self.clean} timeout after {self.timeout} seconds, terminating subprocess"
+            )
+            self._terminate()
+            logger.info("Falling back to save with clean=False")
+            self._fallback_save()
+            return False
+
+        # Process completed, check exit code
+        exit_code = self.process.exitcode
+        success = exit_code == 0
+
+        # Check if save was successful
+        if (
+            success
+            and Path(self.temp_output).exists()
+            and Path(self.temp_output).stat().st_size > 0
+        ):
+            logger.info(f"PDF save with clean={self.clean} completed successfully")
+            # Copy the successfully created file to the target path
+            try:
+                shutil.copy2(self.temp_output, self.output_path)
+                return True
+            except Exception as e:
+                logger.error(f"Error copying saved PDF: {e}")
+                self.pdf.save(self.output_path)  # Fallback to direct save
+                return False
+            finally:
+                Path(self.temp_input).unlink()
+                Path(self.temp_output).unlink()
+        else:
+            logger.warning(
+                f"PDF save with clean={self.clean} failed with exit code {exit_code} or produced empty file"
+            )
+            self._fallback_save()
+            return False
+
+
 class PDFCreater:
     stage_name = "Generate drawing instructions"
 
@@ -224,13 +337,22 @@ class PDFCreater:
         document: il_version_1.Document,
         translation_config: TranslationConfig,
         mediabox_data: dict,
+        watermark: il_version_1.PdfParagraph | None = None,
     ):
         self.original_pdf_path = original_pdf_path
         self.docs = document
+        # Typeset watermark of the first page (Typesetting.typeset_watermark).
+        # It is only drawn on a copy of the first page, watermarked_first_page,
+        # the saved outputs neither show nor embed the watermark.
+        self.watermark = watermark
+        self.watermarked_first_page: pymupdf.Document | None = None
         self.font_path = translation_config.font
         self.font_mapper = FontMapper(translation_config)
         self.translation_config = translation_config
         self.mediabox_data = mediabox_data
+        if not translation_config.skip_clean:
+            # 字体子集化进程在生成绘制指令时启动
+            get_font_subset_pool().warm_up()
 
     def render_graphic_state(
         self,
@@ -360,6 +482,64 @@ class PDFCreater:
         # Restore graphics state
         draw_op.append(b"Q\n")
 
+    @staticmethod
+    def _page_to_form_xobject(
+        doc: pymupdf.Document, page: pymupdf.Page, converted: set[int]
+    ) -> tuple[int, pymupdf.Rect]:
+        """Turn the content of a page into a form XObject of the same document.
+
+        A single content stream is reused in place, its data is not copied
+        or compressed again. Returns the xref of the form and the visible
+        area of the page in PDF coordinates.
+        """
+        contents = page.get_contents()
+        if not contents:
+            raise ValueError("nothing to show - source page empty")
+        if len(contents) == 1 and contents[0] not in converted:
+            xref = contents[0]
+        else:
+            xref = doc.get_new_xref()
+            doc.update_object(xref, "<<>>")
+            doc.update_stream(xref, page.read_contents())
+        converted.add(xref)
+        doc.xref_set_key(xref, "Type", "/XObject")
+        doc.xref_set_key(xref, "Subtype", "/Form")
+        page_xref = page.xref
+        mediabox = doc.xref_get_key(page_xref, "MediaBox")
+        if mediabox[0] == "array":
+            doc.xref_set_key(xref, "BBox", mediabox[1])
+        else:
+            x0, y0, x1, y1 = page.mediabox
+            doc.xref_set_key(xref, "BBox", f"[{x0:g} {y0:g} {x1:g} {y1:g}]")
+        resources = doc.xref_get_key(page_xref, "Resources")
+        if resources[0] in ("xref", "dict"):
+            doc.xref_set_key(xref, "Resources", resources[1])
+        return xref, page.rect * ~page.transformation_matrix
+
+    @staticmethod
+    def _show_form_xobject_command(
+        name: str, src_rect: pymupdf.Rect, tar_rect: pymupdf.Rect, rotate: int
+    ) -> bytes:
+        """Draw command that places a page form XObject into tar_rect (PDF
+        coordinates), keeping its proportion, like Page.show_pdf_page."""
+        src_center = (src_rect.tl + src_rect.br) / 2.0
+        tar_center = (tar_rect.tl + tar_rect.br) / 2.0
+        matrix = pymupdf.Matrix(1, 0, 0, 1, -src_center.x, -src_center.y)
+        matrix *= pymupdf.Matrix(rotate)
+        rotated_src_rect = src_rect * matrix
+        scale = min(
+            tar_rect.width / rotated_src_rect.width,
+            tar_rect.height / rotated_src_rect.height,
+        )
+        matrix *= pymupdf.Matrix(scale, scale)
+        matrix *= pymupdf.Matrix(1, 0, 0, 1, tar_center.x, tar_center.y)
+        return (
+            f"q {matrix.a:g} {matrix.b:g} {matrix.c:g} {matrix.d:g} "
+            f"{matrix.e:g} {matrix.f:g} cm "
+            f"{src_rect.x0:g} {src_rect.y0:g} {src_rect.width:g} "
+            f"{src_rect.height:g} re W n /{name} Do Q\n"
+        ).encode()
+
     def create_side_by_side_dual_pdf(
         self,
         original_pdf: pymupdf.Document,
@@ -381,25 +561,48 @@ class PDFCreater:
         # Create a new PDF for side-by-side pages
         dual = pymupdf.open()
         page_count = min(original_pdf.page_count, translated_pdf.page_count)
+        if page_count == 0:
+            return dual
+
+        # Import both documents once, their pages are then drawn as form
+        # XObjects which share the imported resources.
+        import_options = {
+            "to_page": page_count - 1,
+            "links": False,
+            "annots": False,
+            "widgets": False,
+        }
+        dual.insert_pdf(original_pdf, **import_options)
+        dual.insert_pdf(translated_pdf, **import_options)
+        # Convert all imported pages before adding new ones, adding a page
+        # invalidates the loaded pages and makes page lookups expensive.
+        converted = set()
+        imported = []
+        for page in dual:
+            rotation, rect = page.rotation, page.rect
+            if rotation:
+                page.set_rotation(0)
+            try:
+                form = self._page_to_form_xobject(dual, page, converted)
+            except Exception as e:
+                form = e
+            imported.append((rotation, rect, form))
 
         for page_id in range(page_count):
             # Get pages from both PDFs
-            orig_page = original_pdf[page_id]
-            trans_page = translated_pdf[page_id]
-            rotate_angle = orig_page.rotation
-            total_width = orig_page.rect.width + trans_page.rect.width
-            max_height = max(orig_page.rect.height, trans_page.rect.height)
+            rotate_angle, orig_rect, orig_form = imported[page_id]
+            _, trans_rect, trans_form = imported[page_count + page_id]
+            total_width = orig_rect.width + trans_rect.width
+            max_height = max(orig_rect.height, trans_rect.height)
             left_width = (
-                orig_page.rect.width
+                orig_rect.width
                 if not translation_config.dual_translate_first
-                else trans_page.rect.width
+                else trans_rect.width
             )
 
-            orig_page.set_rotation(0)
-            trans_page.set_rotation(0)
-
             # Create new page with combined width
             dual_page = dual.new_page(width=total_width, height=max_height)
+            page_matrix = ~dual_page.transformation_matrix
 
             # Define rectangles for left and right sides
             rect_left = pymupdf.Rect(0, 0, left_width, max_height)
@@ -409,14 +612,16 @@ class PDFCreater:
             if translation_config.dual_translate_first:
                 # Show translated page on left and original on right
                 rect_left, rect_right = rect_right, rect_left
+
+            forms = {}
+            draw_op = b""
             try:
                 # Show original page on left and translated on right (default)
-                dual_page.show_pdf_page(
-                    rect_left,
-                    original_pdf,
-                    page_id,
-                    keep_proportion=True,
-                    rotate=-rotate_angle,
+                if isinstance(orig_form, Exception):
+                    raise orig_form
+                forms["fzFrm0"], src_rect = orig_form
+                draw_op += self._show_form_xobject_command(
+                    "fzFrm0", src_rect, rect_left * page_matrix, -rotate_angle
                 )
             except Exception as e:
                 logger.warning(
@@ -427,12 +632,11 @@ class PDFCreater:
                     exc_info=e,
                 )
             try:
-                dual_page.show_pdf_page(
-                    rect_right,
-                    translated_pdf,
-                    page_id,
-                    keep_proportion=True,
-                    rotate=-rotate_angle,
+                if isinstance(trans_form, Exception):
+                    raise trans_form
+                forms["fzFrm1"], src_rect = trans_form
+                draw_op += self._show_form_xobject_command(
+                    "fzFrm1", src_rect, rect_right * page_matrix, -rotate_angle
                 )
             except Exception as e:
                 logger.warning(
@@ -442,6 +646,19 @@ class PDFCreater:
                     f"Translated PDF: {translation_config.input_file}. ",
                     exc_info=e,
                 )
+            if not forms:
+                continue
+            xobjects = "".join(f"/{name} {xref} 0 R" for name, xref in forms.items())
+            dual.xref_set_key(
+                dual_page.xref, "Resources", f"<</XObject<<{xobjects}>>>>"
+            )
+            op_container = dual.get_new_xref()
+            dual.update_object(op_container, "<<>>")
+            dual.update_stream(op_container, draw_op)
+            dual_page.set_contents(op_container)
+
+        # Drop the imported pages, their content is referenced by the forms
+        dual.delete_pages(0, 2 * page_count - 1)
         return dual
 
     def create_alternating_pages_dual_pdf(
@@ -464,13 +681,17 @@ class PDFCreater:
         dual = pymupdf.open(original_pdf_path)
         dual.insert_file(translated_pdf)
 
-        # Rearrange pages to alternate between original and translated
+        # Rearrange pages to alternate between original and translated,
+        # in one pass over the page tree
         page_count = translated_pdf.page_count
+        order = list(range(dual.page_count))
         for page_id in range(page_count):
+            page = order.pop(page_count + page_id)
             if translation_config.dual_translate_first:
-                dual.move_page(page_count + page_id, page_id * 2)
+                order.insert(page_id * 2, page)
             else:
-                dual.move_page(page_count + page_id, page_id * 2 + 1)
+                order.insert(page_id * 2 + 1, page)
+        dual.select(order)
 
         return dual
 
@@ -568,75 +789,33 @@ class PDFCreater:
     def subset_fonts_in_subprocess(
         pdf: pymupdf.Document, translation_config: TranslationConfig, tag: str
     ) -> pymupdf.Document:
-        """Run font subsetting in a subprocess with timeout.
+        """Run font subsetting in a worker process with timeout.
 
         Args:
             pdf: The PDF document object
             translation_config: Translation configuration
 
         Returns:
-            Path to the PDF with subsetted fonts, or original path if subsetting failed or timed out
+            The PDF with subsetted fonts, or the original PDF if subsetting failed or timed out
         """
-        original_pdf = pdf
-        # Create temporary file paths
-        temp_input = str(
-            translation_config.get_working_file_path(f"temp_subset_input_{tag}.pdf")
-        )
-        temp_output = str(
-            translation_config.get_working_file_path(f"temp_subset_output_{tag}.pdf")
-        )
-
-        # Save PDF to temporary file without subsetting
-        pdf.save(temp_input)
-
-        # Create and start subprocess
-        process = Process(target=_subset_fonts_process, args=(temp_input, temp_output))
-        process.start()
-
-        # Wait for subprocess with timeout (1 minute)
+        translation_config.raise_if_cancelled()
         timeout = 60  # 1 minutes in seconds
-        start_time = time.time()
-
-        while process.is_alive():
-            if time.time() - start_time > timeout:
-                logger.warning(
-                    f"Font subsetting timeout after {timeout} seconds, terminating subprocess"
-                )
-                process.terminate()
-                try:
-                    process.join(5)  # Give it 5 seconds to clean up
-                    if process.is_alive():
-                        logger.warning("Subprocess did not terminate, killing it")
-                        process.kill()
-                        process.terminate()
-                        process.kill()
-                        process.terminate()
-                        process.kill()
-                        process.terminate()
-                except Exception as e:
-                    logger.error(f"Error terminating font subsetting process: {e}")
-
-                return original_pdf
-
-            time.sleep(0.5)  # Check every half second
-
-        # Process completed, check exit code
-        exit_code = process.exitcode
-        success = exit_code == 0
-
-        # Check if subsetting was successful
-        if (
-            success
-            and Path(temp_output).exists()
-            and Path(temp_output).stat().st_size > 0
-        ):
-            logger.info("Font subsetting completed successfully")
-            return pymupdf.open(temp_output)
-        else:
+        try:
+            data = get_font_subset_pool().subset_fonts(pdf.tobytes(), timeout)
+        except TimeoutError:
             logger.warning(
-                f"Font subsetting failed with exit code {exit_code} or produced empty file"
+                f"Font subsetting timeout after {timeout} seconds, terminating subprocess"
             )
-            return original_pdf
+            return pdf
+        except Exception as e:
+            logger.warning(f"Font subsetting failed ({tag}): {e}")
+            return pdf
+
+        if not data:
+            logger.warning("Font subsetting produced empty file")
+            return pdf
+        logger.info("Font subsetting completed successfully")
+        return pymupdf.open(stream=data)
 
     @staticmethod
     def save_pdf_with_timeout(
@@ -667,118 +846,65 @@ class PDFCreater:
         Returns:
             True if saved with clean=True successfully, False if fallback to clean=False was used
         """
-        # Create temporary file paths
-        temp_input = str(
-            translation_config.get_working_file_path(f"temp_save_input_{tag}.pdf")
-        )
-        temp_output = str(
-            translation_config.get_working_file_path(f"temp_save_output_{tag}.pdf")
-        )
-
-        # Save PDF to temporary file first
-        pdf.save(temp_input)
-
-        # Try to save with clean=True in a subprocess
-        process = Process(
-            target=_save_pdf_clean_process,
-            args=(
-                temp_input,
-                temp_output,
-                garbage,
-                deflate,
-                clean,
-                deflate_fonts,
-                linear,
-            ),
-        )
-        process.start()
+        return PdfSaveTask(
+            pdf,
+            output_path,
+            translation_config,
+            garbage=garbage,
+            deflate=deflate,
+            clean=clean,
+            deflate_fonts=deflate_fonts,
+            linear=linear,
+            timeout=timeout,
+            tag=tag,
+        ).wait()
 
-        # Wait for subprocess with timeout
-        start_time = time.time()
+    def create_watermarked_first_page(self, pdf: pymupdf.Document) -> pymupdf.Document:
+        """Copy the first page of pdf and draw the watermark over it.
 
-        while process.is_alive():
-            if time.time() - start_time > timeout:
-                logger.warning(
-                    f"PDF save with clean={clean} timeout after {timeout} seconds, terminating subprocess"
+        Only the copy references the fonts of the watermark, so the outputs
+        without watermark neither embed them nor keep the watermark glyphs
+        in their font subsets.
+        """
+        doc = pymupdf.open()
+        doc.insert_pdf(pdf, from_page=0, to_page=0)
+        page = doc[0]
+        chars = self.render_paragraph_to_char(self.watermark)
+        for font_id in sorted({char.pdf_style.font_id for char in chars}):
+            if font_id in self.font_mapper.fontid2fontpath:
+                # no-op if the page already uses the font
+                page.insert_font(font_id, self.font_mapper.fontid2fontpath[font_id])
+        watermark_op = BitStream()
+        for char in chars:
+            if char.char_unicode == "\n" or char.pdf_character_id is None:
+                continue
+            font_id = char.pdf_style.font_id
+            if font_id not in self.font_mapper.fontid2font:
+                continue
+            char_size = char.pdf_style.font_size
+            watermark_op.append(b"q ")
+            self.render_graphic_state(watermark_op, char.pdf_style.graphic_state)
+            if char.vertical:
+                watermark_op.append(
+                    f"BT /{font_id} {char_size:f} Tf 0 1 -1 0 {char.box.x2:f} {char.box.y:f} Tm ".encode(),
                 )
-                process.terminate()
-                try:
-                    process.join(5)  # Give it 5 seconds to clean up
-                    if process.is_alive():
-                        logger.warning("Subprocess did not terminate, killing it")
-                        process.kill()
-                        process.terminate()
-                        process.kill()
-                        process.terminate()
-                        process.kill()
-                        process.terminate()
-                except Exception as e:
-                    logger.error(f"Error terminating PDF save process: {e}")
-
-                # Fallback to save without clean parameter
-                logger.info("Falling back to save with clean=False")
-                try:
-                    pdf.save(
-                        output_path,
-                        garbage=garbage,
-                        deflate=deflate,
-                        clean=False,
-                        deflate_fonts=deflate_fonts,
-                        linear=linear,
-                    )
-                    return False
-                except Exception as e:
-                    logger.error(f"Error in fallback save: {e}")
-                    # Last resort: basic save
-                    pdf.save(output_path)
-                    return False
-
-            time.sleep(0.5)  # Check every half second
-
-        # Process completed, check exit code
-        exit_code = process.exitcode
-        success = exit_code == 0
-
-        # Check if save was successful
-        if (
-            success
-            and Path(temp_output).exists()
-            and Path(temp_output).stat().st_size > 0
-        ):
-            logger.info(f"PDF save with clean={clean} completed successfully")
-            # Copy the successfully created file to the target path
-            try:
-                import shutil
-
-                shutil.copy2(temp_output, output_path)
-                return True
-            except Exception as e:
-                logger.error(f"Error copying saved PDF: {e}")
-                pdf.save(output_path)  # Fallback to direct save
-                return False
-            finally:
-                Path(temp_input).unlink()
-                Path(temp_output).unlink()
-        else:
-            logger.warning(
-                f"PDF save with clean={clean} failed with exit code {exit_code} or produced empty file"
-            )
-            # Fallback to save without clean parameter
-            try:
-                pdf.save(
-                    output_path,
-                    garbage=garbage,
-                    deflate=deflate,
-                    clean=False,
-                    deflate_fonts=deflate_fonts,
-                    linear=linear,
+            else:
+                watermark_op.append(
+                    f"BT /{font_id} {char_size:f} Tf 1 0 0 1 {char.box.x:f} {char.box.y:f} Tm ".encode(),
                 )
-            except Exception as e:
-                logger.error(f"Error in fallback save: {e}")
-                # Last resort: basic save
-                pdf.save(output_path)
-
-            return False
+            encoding_length = self.font_mapper.fontid2font[font_id].encoding_length
+            watermark_op.append(
+                f"<{char.pdf_character_id:0{encoding_length * 2}x}>".upper().encode(),
+            )
+            watermark_op.append(b" Tj ET Q \n")
+        watermark_xref = doc.get_new_xref()
+        doc.update_object(watermark_xref, "<<>>")
+        doc.update_stream(watermark_xref, watermark_op.tobytes())
+        contents = " ".join(f"{xref} 0 R" for xref in page.get_contents())
+        doc.xref_set_key(page.xref, "Contents", f"[{contents} {watermark_xref} 0 R]")
+        if 0 in self.mediabox_data:
+            self.restore_media_box(doc, {0: self.mediabox_data[0]})
+        return doc
 
     def restore_media_box(self, doc: pymupdf.Document, mediabox_data: dict) -> None:
         for pageno, page_box_data in mediabox_data.items():
@@ -792,15 +918,12 @@ class PDFCreater:
         self, translation_config: TranslationConfig, check_font_exists: bool = False
     ) -> TranslateResult:
         try:
-            basename = Path(translation_config.input_file).stem
-            debug_suffix = ".debug" if translation_config.debug else ""
-            if (
+            no_watermark = (
                 translation_config.watermark_output_mode
                 != WatermarkOutputMode.Watermarked
-            ):
-                debug_suffix += ".no_watermark"
+            )
             mono_out_path = translation_config.get_output_file_path(
-                f"{basename}{debug_suffix}.{translation_config.lang_out}.mono.pdf",
+                translation_config.get_output_file_name("mono", no_watermark),
             )
             pdf = pymupdf.open(self.original_pdf_path)
             self.font_mapper.add_font(pdf, self.docs)
@@ -945,6 +1068,10 @@ class PDFCreater:
                     pdf[page.page_number].set_contents(op_container)
                     pbar.advance()
             translation_config.raise_if_cancelled()
+            if self.watermark is not None:
+                # Copied before subsetting: the fonts of the copy still have
+                # the glyphs of the watermark.
+                self.watermarked_first_page = self.create_watermarked_first_page(pdf)
             gc_level = 1
             if self.translation_config.ocr_workaround:
                 gc_level = 4
@@ -966,87 +1093,103 @@ class PDFCreater:
                 SAVE_PDF_STAGE_NAME,
                 2,
             ) as pbar:
-                if not translation_config.no_mono:
-                    if translation_config.debug:
+                # mono 与 dual 的保存子进程同时运行
+                mono_save_task = None
+                dual_save_task = None
+                try:
+                    if not translation_config.no_mono:
+                        if translation_config.debug:
+                            translation_config.raise_if_cancelled()
+                            pdf.save(
+                                f"{mono_out_path}.decompressed.pdf",
+                                expand=True,
+                                pretty=True,
+                            )
                         translation_config.raise_if_cancelled()
-                        pdf.save(
-                            f"{mono_out_path}.decompressed.pdf",
-                            expand=True,
-                            pretty=True,
-                        )
-                    translation_config.raise_if_cancelled()
-                    self.save_pdf_with_timeout(
-                        pdf,
-                        mono_out_path,
-                        translation_config,
-                        garbage=gc_level,
-                        deflate=True,
-                        clean=not translation_config.skip_clean,
-                        deflate_fonts=True,
-                        linear=False,
-                        tag="mono",
-                    )
-                pbar.advance()
-                dual_out_path = None
-                if not translation_config.no_dual:
-                    dual_out_path = translation_config.get_output_file_path(
-                        f"{basename}{debug_suffix}.{translation_config.lang_out}.dual.pdf",
-                    )
-                    translation_config.raise_if_cancelled()
-                    original_pdf = pymupdf.open(self.original_pdf_path)
-                    translated_pdf = pdf
-
-                    # Choose between alternating pages and side-by-side format
-                    # Default to side-by-side if not specified
-                    use_alternating_pages = (
-                        translation_config.use_alternating_pages_dual
-                    )
-
-                    if use_alternating_pages:
-                        # Create a dual PDF with alternating pages (original and translation)
-                        dual = self.create_alternating_pages_dual_pdf(
-                            self.original_pdf_path,
-                            translated_pdf,
+                        mono_save_task = PdfSaveTask(
+                            pdf,
+                            mono_out_path,
                             translation_config,
+                            garbage=gc_level,
+                            deflate=True,
+                            clean=not translation_config.skip_clean,
+                            deflate_fonts=True,
+                            linear=False,
+                            tag="mono",
                         )
-                    else:
-                        # Create a dual PDF with side-by-side pages (original and translation)
-                        dual = self.create_side_by_side_dual_pdf(
-                            original_pdf,
-                            translated_pdf,
-                            dual_out_path,
-                            translation_config,
+                    dual_out_path = None
+                    if not translation_config.no_dual:
+                        dual_out_path = translation_config.get_output_file_path(
+                            translation_config.get_output_file_name(
+                                "dual", no_watermark
+                            ),
                         )
-
-                    if translation_config.debug:
                         translation_config.raise_if_cancelled()
-                        try:
-                            dual = self.write_debug_info(dual, translation_config)
-                        except Exception:
-                            logger.warning(
-                                "Failed to write debug info to dual PDF",
-                                exc_info=True,
+                        original_pdf = pymupdf.open(self.original_pdf_path)
+                        translated_pdf = pdf
+
+                        # Choose between alternating pages and side-by-side format
+                        # Default to side-by-side if not specified
+                        use_alternating_pages = (
+                            translation_config.use_alternating_pages_dual
+                        )
+
+                        if use_alternating_pages:
+                            # Create a dual PDF with alternating pages (original and translation)
+                            dual = self.create_alternating_pages_dual_pdf(
+                                self.original_pdf_path,
+                                translated_pdf,
+                                translation_config,
+                            )
+                        else:
+                            # Create a dual PDF with side-by-side pages (original and translation)
+                            dual = self.create_side_by_side_dual_pdf(
+                                original_pdf,
+                                translated_pdf,
+                                dual_out_path,
+                                translation_config,
                             )
 
-                    self.save_pdf_with_timeout(
-                        dual,
-                        dual_out_path,
-                        translation_config,
-                        garbage=gc_level,
-                        deflate=True,
-                        clean=not translation_config.skip_clean,
-                        deflate_fonts=True,
-                        linear=False,
-                        tag="dual",
-                    )
-                    if translation_config.debug:
-                        translation_config.raise_if_cancelled()
-                        dual.save(
-                            f"{dual_out_path}.decompressed.pdf",
-                            expand=True,
-                            pretty=True,
+                        if translation_config.debug:
+                            translation_config.raise_if_cancelled()
+                            try:
+                                dual = self.write_debug_info(dual, translation_config)
+                            except Exception:
+                                logger.warning(
+                                    "Failed to write debug info to dual PDF",
+                                    exc_info=True,
+                                )
+
+                        dual_save_task = PdfSaveTask(
+                            dual,
+                            dual_out_path,
+                            translation_config,
+                            garbage=gc_level,
+                            deflate=True,
+                            clean=not translation_config.skip_clean,
+                            deflate_fonts=True,
+                            linear=False,
+                            tag="dual",
                         )
-                pbar.advance()
+                    if mono_save_task:
+                        mono_save_task.wait()
+                        mono_save_task = None
+                    pbar.advance()
+                    if dual_save_task:
+                        dual_save_task.wait()
+                        dual_save_task = None
+                        if translation_config.debug:
+                            translation_config.raise_if_cancelled()
+                            dual.save(
+                                f"{dual_out_path}.decompressed.pdf",
+                                expand=True,
+                                pretty=True,
+                            )
+                    pbar.advance()
+                finally:
+                    for task in (mono_save_task, dual_save_task):
+                        if task:
+                            task.cancel()
             return TranslateResult(mono_out_path, dual_out_path)
         except Exception:
             logger.exception(
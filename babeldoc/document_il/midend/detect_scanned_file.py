@@ -1,9 +1,11 @@
 import logging
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 import pymupdf
-from skimage.metrics import structural_similarity
 
 from babeldoc.document_il import il_version_1
 from babeldoc.document_il.babeldoc_exception.BabelDOCException import ScannedPDFError
@@ -13,6 +15,67 @@ from babeldoc.translation_config import TranslationConfig
 
 logger = logging.getLogger(__name__)
 
+# 去除文字后页面与原页面的相似度高于该值时，认为该页是扫描页
+SCANNED_SIMILARITY_THRESHOLD = 0.98
+# 先在低分辨率下比较，降采样会降低文字页的相似度，
+# 只有落在阈值以下 LOW_RESOLUTION_MARGIN 内的页才以原始分辨率重新比较
+LOW_RESOLUTION_ZOOM = 0.5
+LOW_RESOLUTION_MARGIN = 0.03
+
+
+def spread_order(count: int) -> list[int]:
+    """Indices 0..count-1, ordered so that every prefix is spread over the
+    whole range: 0, 8, 4, 2, 6, 1, 3, ... for count 10."""
+    order = []
+    seen = set()
+    step = 1
+    while step < count:
+        step *= 2
+    while step >= 1:
+        for i in range(0, count, step):
+            if i not in seen:
+                seen.add(i)
+                order.append(i)
+        step //= 2
+    return order
+
+
+def render_gray(page: pymupdf.Page, zoom: float = 1.0) -> np.ndarray:
+    pix = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), colorspace=pymupdf.csGRAY)
+    return np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width)
+
+
+def structural_similarity(image1: np.ndarray, image2: np.ndarray) -> float:
+    """Mean SSIM of two grayscale uint8 images.
+
+    Same result as skimage.metrics.structural_similarity with its defaults
+    (7x7 uniform window, sample covariance), using cv2 box filters.
+    """
+    if np.array_equal(image1, image2):
+        return 1.0
+    win_size = 7
+    pad = (win_size - 1) // 2
+    if min(image1.shape) <= 2 * pad:
+        return 0.0
+    x = image1.astype(np.float64)
+    y = image2.astype(np.float64)
+
+    def mean(image):
+        return cv2.blur(image, (win_size, win_size), borderType=cv2.BORDER_REFLECT)
+
+    ux, uy = mean(x), mean(y)
+    cov_norm = win_size**2 / (win_size**2 - 1)
+    vx = cov_norm * (mean(x * x) - ux * ux)
+    vy = cov_norm * (mean(y * y) - uy * uy)
+    vxy = cov_norm * (mean(x * y) - ux * uy)
+
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    s = ((2 * ux * uy + c1) * (2 * vxy + c2)) / (
+        (ux * ux + uy * uy + c1) * (vx + vy + c2)
+    )
+    return float(s[pad:-pad, pad:-pad].mean())
+
 
 class DetectScannedFile:
     stage_name = "DetectScannedFile"
@@ -71,29 +134,61 @@ class DetectScannedFile:
             for page in docs.page
             if self.translation_config.should_translate_page(page.page_number + 1)
         ]
-        mupdf = pymupdf.open(self.translation_config.get_working_file_path("input.pdf"))
+        input_path = self.translation_config.get_working_file_path("input.pdf")
         total = len(pages_to_translate)
         threshold = 0.8 * total
         threshold = max(threshold, 1)
         scanned = 0
         non_scanned = 0
         non_scanned_threshold = total - threshold
-        with self.translation_config.progress_monitor.stage_start(
-            self.stage_name,
-            total,
-        ) as progress:
-            for page in pages_to_translate:
-                if scanned < threshold and non_scanned < non_scanned_threshold:
-                    # Only continue detection if both counts are below thresholds
-                    is_scanned = self.detect_page_is_scanned(page, mupdf)
-                    if is_scanned:
-                        scanned += 1
-                    else:
-                        non_scanned += 1
+        max_workers = min(4, os.cpu_count() or 1)
+        with (
+            self.translation_config.progress_monitor.stage_start(
+                self.stage_name,
+                total,
+            ) as progress,
+            pymupdf.open(input_path) as original_pdf,
+            pymupdf.open(input_path) as stripped_pdf,
+            ThreadPoolExecutor(max_workers=max_workers) as executor,
+        ):
+            # 渲染在当前线程进行，相似度计算交给线程池，
+            # 得出结论后剩余的页不再检测
+            max_pending = max_workers * 2
+            pending = deque()
+            updated_xobjects = set()
+            # 按分散的顺序采样，扫描页集中在文档某一部分时也能尽早得出结论
+            for index in spread_order(total):
+                page = pages_to_translate[index]
+                if scanned >= threshold or non_scanned >= non_scanned_threshold:
+                    break
+                self.translation_config.raise_if_cancelled()
+                self._strip_page(page, stripped_pdf, updated_xobjects)
+                before, after = self._render_page(
+                    page, original_pdf, stripped_pdf, LOW_RESOLUTION_ZOOM
+                )
+                pending.append(
+                    (page, executor.submit(structural_similarity, before, after))
+                )
+                if len(pending) < max_pending:
+                    continue
+                page, future = pending.popleft()
+                if self._is_scanned(page, future.result(), original_pdf, stripped_pdf):
+                    scanned += 1
+                else:
+                    non_scanned += 1
+                progress.advance(1)
+
+            for page, future in pending:
+                if scanned >= threshold or non_scanned >= non_scanned_threshold:
+                    future.cancel()
+                    continue
+                if self._is_scanned(page, future.result(), original_pdf, stripped_pdf):
+                    scanned += 1
                 else:
-                    # We have enough information to determine document type
                     non_scanned += 1
                 progress.advance(1)
+            # We have enough information to determine document type
+            progress.advance(total - scanned - non_scanned)
 
         if scanned > threshold:
             logger.warning(
@@ -102,32 +197,51 @@ class DetectScannedFile:
             )
             raise ScannedPDFError("Scanned PDF detected.")
 
+    def _is_scanned(
+        self,
+        page: il_version_1.Page,
+        similarity: float,
+        original_pdf: pymupdf.Document,
+        stripped_pdf: pymupdf.Document,
+    ) -> bool:
+        if (
+            SCANNED_SIMILARITY_THRESHOLD - LOW_RESOLUTION_MARGIN
+            < similarity
+            <= SCANNED_SIMILARITY_THRESHOLD
+        ):
+            before, after = self._render_page(page, original_pdf, stripped_pdf)
+            similarity = structural_similarity(before, after)
+        return similarity > SCANNED_SIMILARITY_THRESHOLD
+
     @staticmethod
-    def detect_page_is_scanned(page: il_version_1.Page, pdf: pymupdf.Document) -> bool:
-        before_page_image = pdf[page.page_number].get_pixmap()
-        before_page_image = np.frombuffer(before_page_image.samples, np.uint8).reshape(
-            before_page_image.height,
-            before_page_image.width,
-            3,
-        )[:, :, ::-1]
-        new_xref = pdf.get_new_xref()
-        pdf.update_object(new_xref, "<<>>")
-        baseop = page.base_operations.value
-        baseop = zstd_decompress(baseop)
-        pdf.update_stream(new_xref, baseop.encode("utf-8"))
-        pdf[page.page_number].set_contents(new_xref)
+    def _strip_page(
+        page: il_version_1.Page,
+        stripped_pdf: pymupdf.Document,
+        updated_xobjects: set[int],
+    ):
+        """Replace the page content with the base operations (everything
+        except text)."""
+        new_xref = stripped_pdf.get_new_xref()
+        stripped_pdf.update_object(new_xref, "<<>>")
+        baseop = zstd_decompress(page.base_operations.value)
+        stripped_pdf.update_stream(new_xref, baseop.encode("utf-8"))
+        stripped_pdf[page.page_number].set_contents(new_xref)
 
         for xobj in page.pdf_xobject:
-            base_op = xobj.base_operations.value
-            base_op = zstd_decompress(base_op)
-            pdf.update_stream(xobj.xref_id, base_op.encode("utf-8"))
-
-        after_page_image = pdf[page.page_number].get_pixmap()
-        after_page_image = np.frombuffer(after_page_image.samples, np.uint8).reshape(
-            after_page_image.height,
-            after_page_image.width,
-            3,
-        )[:, :, ::-1]
-        before_page_image = cv2.cvtColor(before_page_image, cv2.COLOR_RGB2GRAY)
-        after_page_image = cv2.cvtColor(after_page_image, cv2.COLOR_RGB2GRAY)
-        return structural_similarity(before_page_image, after_page_image) > 0.98
+            if xobj.xref_id in updated_xobjects:
+                continue
+            updated_xobjects.add(xobj.xref_id)
+            base_op = zstd_decompress(xobj.base_operations.value)
+            stripped_pdf.update_stream(xobj.xref_id, base_op.encode("utf-8"))
+
+    @staticmethod
+    def _render_page(
+        page: il_version_1.Page,
+        original_pdf: pymupdf.Document,
+        stripped_pdf: pymupdf.Document,
+        zoom: float = 1.0,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        return (
+            render_gray(original_pdf[page.page_number], zoom),
+            render_gray(stripped_pdf[page.page_number], zoom),
+        )
@@ -1,4 +1,6 @@
+import collections
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import cv2
@@ -7,11 +9,17 @@ from pymupdf import Document
 
 from babeldoc.document_il import il_version_1
 from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
+from babeldoc.document_il.utils.mupdf_helper import get_rendered_shape
 from babeldoc.document_il.utils.style_helper import GREEN
+from babeldoc.docvision.layout_cache import LayoutCache
+from babeldoc.docvision.layout_cache import hash_page_image
 from babeldoc.translation_config import TranslationConfig
 
 logger = logging.getLogger(__name__)
 
+# Pages rendered ahead of the layout model when the layout cache is used
+RENDER_AHEAD = 2
+
 
 class LayoutParser:
     stage_name = "Parse Page Layout"
@@ -108,6 +116,96 @@ class LayoutParser:
                 ),
             )
 
+    def _create_layout_cache(self) -> LayoutCache | None:
+        if not self.translation_config.layout_cache:
+            return None
+        if self.model.cache_identity is None:
+            return None
+        try:
+            return LayoutCache(self.model)
+        except OSError:
+            logger.warning("layout cache is not available", exc_info=True)
+            return None
+
+    def _predict_layouts(self, pages: list[il_version_1.Page], mupdf_doc: Document):
+        """Yield (page, layouts, (h, w)) of the rendered page."""
+        cache = self._create_layout_cache()
+        if cache is None:
+            for page, layouts in self.model.handle_document(
+                pages, mupdf_doc, self.translation_config, self._save_debug_image
+            ):
+                # The model renders the pages, possibly on another thread
+                shape = get_rendered_shape(
+                    layouts,
+                    mupdf_doc,
+                    page.page_number,
+                    getattr(self.model, "lock", None),
+                )
+                yield page, layouts, shape
+            return
+
+        # Each page is rendered once, cached pages are yielded right away and
+        # the others are passed on to the model with their rendered image
+        hits = collections.deque()
+        keys = {}
+
+        def missing_pages():
+            for page, image, key in self._render_pages(pages, mupdf_doc):
+                layouts = cache.get(key)
+                if layouts is None:
+                    keys[page.page_number] = key
+                    yield page, image
+                    continue
+                self._save_debug_image(image, layouts, page.page_number + 1)
+                hits.append((page, layouts, image.shape[:2]))
+
+        for page, layouts in self.model.handle_images(
+            missing_pages(), self.translation_config, self._save_debug_image
+        ):
+            while hits:
+                yield hits.popleft()
+            try:
+                cache.put(keys[page.page_number], layouts)
+            except OSError:
+                logger.warning("failed to write layout cache", exc_info=True)
+            yield page, layouts, layouts.image_shape
+        hit_count = len(pages) - len(keys)
+        while hits:
+            yield hits.popleft()
+        logger.info(f"layout cache hit {hit_count}/{len(pages)} pages")
+
+    @staticmethod
+    def _render_pages(pages: list[il_version_1.Page], mupdf_doc: Document):
+        """Yield (page, image, hash of the image) of each page.
+
+        Pages are rendered and hashed on a background thread, at most
+        RENDER_AHEAD pages ahead. mupdf_doc must not be used by another
+        thread until the generator is done.
+        """
+        renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="layout-render")
+
+        def render(page):
+            pix = get_no_rotation_img(mupdf_doc[page.page_number])
+            image = np.frombuffer(pix.samples, np.uint8).reshape(
+                pix.height, pix.width, 3
+            )[:, :, ::-1]
+            return page, image, hash_page_image(pix)
+
+        pages = iter(pages)
+        in_flight = collections.deque()
+        try:
+            while True:
+                while len(in_flight) < RENDER_AHEAD:
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    in_flight.append(renderer.submit(render, page))
+                if not in_flight:
+                    return
+                yield in_flight.popleft().result()
+        finally:
+            renderer.shutdown(wait=True, cancel_futures=True)
+
     def process(self, docs: il_version_1.Document, mupdf_doc: Document):
         """Generate layouts for all pages that need to be translated."""
         # Get pages that need to be translated
@@ -117,17 +215,12 @@ class LayoutParser:
             total,
         ) as progress:
             # Process predictions for each page
-            for page, layouts in self.model.handle_document(
-                docs.page, mupdf_doc, self.translation_config, self._save_debug_image
-            ):
+            for page, layouts, (h, w) in self._predict_layouts(docs.page, mupdf_doc):
                 page_layouts = []
                 for layout in layouts.boxes:
                     # Convert coordinate system from picture to il
                     # system to the il coordinate system
                     x0, y0, x1, y1 = layout.xyxy
-                    pix = get_no_rotation_img(mupdf_doc[page.page_number])
-                    # pix = mupdf_doc[page.page_number].get_pixmap()
-                    h, w = pix.height, pix.width
                     x0, y0, x1, y1 = (
                         np.clip(int(x0 - 1), 0, w - 1),
                         np.clip(int(h - y1 - 1), 0, h - 1),
@@ -1,4 +1,5 @@
 import logging
+import math
 import random
 import re
 
@@ -30,6 +31,115 @@ def generate_base58_id(length: int = 5) -> str:
     return "".join(random.choice(BASE58_ALPHABET) for _ in range(length))
 
 
+# Layouts with a smaller value win when a character intersects several layouts
+LAYOUT_PRIORITY = {
+    name: priority
+    for priority, name in enumerate(
+        [
+            "formula_caption",
+            "isolate_formula",
+            "table_footnote",
+            "table_caption",
+            "figure_caption",
+            "table_text",
+            "table",
+            "figure",
+            "abandon",
+            "plain text",
+            "tiny text",
+            "title",
+        ]
+    )
+}
+
+
+class LayoutIndex:
+    """Uniform grid over the layout boxes of a page.
+
+    Lets ParagraphFinder look up the layouts intersecting a character without
+    testing every layout box of the page.
+    """
+
+    MAX_GRID_SIZE = 64
+
+    def __init__(self, page: Page):
+        self.entries = []
+        for order, layout in enumerate(page.page_layout):
+            box = layout.box
+            self.entries.append(
+                (
+                    LAYOUT_PRIORITY.get(layout.class_name, len(LAYOUT_PRIORITY)),
+                    order,
+                    box.x,
+                    box.y,
+                    box.x2,
+                    box.y2,
+                    Layout(layout.id, layout.class_name),
+                )
+            )
+        self.cells: dict[tuple[int, int], list[tuple]] = {}
+        if not self.entries:
+            return
+
+        self.grid_size = max(
+            1, min(self.MAX_GRID_SIZE, int(math.sqrt(len(self.entries)) * 2))
+        )
+        self.min_x = min(e[2] for e in self.entries)
+        self.min_y = min(e[3] for e in self.entries)
+        max_x = max(e[4] for e in self.entries)
+        max_y = max(e[5] for e in self.entries)
+        self.cell_width = max((max_x - self.min_x) / self.grid_size, 1e-6)
+        self.cell_height = max((max_y - self.min_y) / self.grid_size, 1e-6)
+        for entry in self.entries:
+            x0, x1 = self._cell_range(entry[2], entry[4], self.min_x, self.cell_width)
+            y0, y1 = self._cell_range(entry[3], entry[5], self.min_y, self.cell_height)
+            for i in range(x0, x1 + 1):
+                for j in range(y0, y1 + 1):
+                    self.cells.setdefault((i, j), []).append(entry)
+
+    def _cell_range(self, start: float, end: float, origin: float, size: float):
+        last = self.grid_size - 1
+        first_cell = min(max(int((start - origin) // size), 0), last)
+        last_cell = min(max(int((end - origin) // size), 0), last)
+        return first_cell, last_cell
+
+    def query(self, char_box: Box) -> Layout | None:
+        """Return the layout with the highest priority intersecting char_box.
+
+        Ties are broken by the larger intersection area, then by the order
+        of the layouts on the page.
+        """
+        if not self.entries:
+            return None
+        cx, cy, cx2, cy2 = char_box.x, char_box.y, char_box.x2, char_box.y2
+        x0, x1 = self._cell_range(cx, cx2, self.min_x, self.cell_width)
+        y0, y1 = self._cell_range(cy, cy2, self.min_y, self.cell_height)
+        best = None
+        best_key = None
+        seen = set()
+        for i in range(x0, x1 + 1):
+            for j in range(y0, y1 + 1):
+                for entry in self.cells.get((i, j), ()):
+                    if entry[1] in seen:
+                        continue
+                    seen.add(entry[1])
+                    x_left = max(cx, entry[2])
+                    y_bottom = max(cy, entry[3])
+                    x_right = min(cx2, entry[4])
+                    y_top = min(cy2, entry[5])
+                    if x_right <= x_left or y_top <= y_bottom:
+                        continue
+                    key = (
+                        entry[0],
+                        -((x_right - x_left) * (y_top - y_bottom)),
+                        entry[1],
+                    )
+                    if best_key is None or key < best_key:
+                        best_key = key
+                        best = entry[6]
+        return best
+
+
 class ParagraphFinder:
     stage_name = "Parse Paragraphs"
 
@@ -37,6 +147,7 @@ class ParagraphFinder:
 
     def __init__(self, translation_config: TranslationConfig):
         self.translation_config = translation_config
+        self._layout_index_cache = None
 
     def add_text_fill_background(self, page: Page):
         layout_map = {layout.id: layout for layout in page.page_layout}
@@ -99,14 +210,12 @@ class ParagraphFinder:
         if not chars:
             return
         # 更新边界框
-        min_x = min(char.visual_bbox.box.x for char in chars)
-        min_y = min(char.visual_bbox.box.y for char in chars)
-        max_x = max(char.visual_bbox.box.x2 for char in chars)
-        max_y = max(char.visual_bbox.box.y2 for char in chars)
-        paragraph.box = Box(min_x, min_y, max_x, max_y)
+        paragraph.box = self.get_chars_bbox(chars)
         paragraph.vertical = chars[0].vertical
         paragraph.xobj_id = chars[0].xobj_id
+        self.update_first_line_indent(paragraph)
 
+    def update_first_line_indent(self, paragraph: PdfParagraph):
         paragraph.first_line_indent = False
         if (
             paragraph.pdf_paragraph_composition[0].pdf_line
@@ -118,12 +227,50 @@ class ParagraphFinder:
         ):
             paragraph.first_line_indent = True
 
+    def append_line(self, paragraph: PdfParagraph, line: PdfParagraphComposition):
+        """Append a line to a paragraph built from lines only.
+
+        Equivalent to appending the line and calling update_paragraph_data,
+        but only merges the new line box into the paragraph box instead of
+        rescanning every character of the paragraph.
+        """
+        paragraph.pdf_paragraph_composition.append(line)
+        if paragraph.box is None:
+            self.update_paragraph_data(paragraph)
+            return
+        box = paragraph.box
+        line_box = line.pdf_line.box
+        paragraph.box = Box(
+            min(box.x, line_box.x),
+            min(box.y, line_box.y),
+            max(box.x2, line_box.x2),
+            max(box.y2, line_box.y2),
+        )
+        self.update_first_line_indent(paragraph)
+
+    @staticmethod
+    def get_chars_bbox(chars: list[PdfCharacter]) -> Box:
+        first_box = chars[0].visual_bbox.box
+        min_x, min_y, max_x, max_y = (
+            first_box.x,
+            first_box.y,
+            first_box.x2,
+            first_box.y2,
+        )
+        for char in chars:
+            box = char.visual_bbox.box
+            if box.x < min_x:
+                min_x = box.x
+            if box.y < min_y:
+                min_y = box.y
+            if box.x2 > max_x:
+                max_x = box.x2
+            if box.y2 > max_y:
+                max_y = box.y2
+        return Box(min_x, min_y, max_x, max_y)
+
     def update_line_data(self, line: PdfLine):
-        min_x = min(char.visual_bbox.box.x for char in line.pdf_character)
-        min_y = min(char.visual_bbox.box.y for char in line.pdf_character)
-        max_x = max(char.visual_bbox.box.x2 for char in line.pdf_character)
-        max_y = max(char.visual_bbox.box.y2 for char in line.pdf_character)
-        line.box = Box(min_x, min_y, max_x, max_y)
+        line.box = self.get_chars_bbox(line.pdf_character)
 
     def process(self, document):
         with self.translation_config.progress_monitor.stage_start(
@@ -171,8 +318,8 @@ class ParagraphFinder:
         # 第二步：处理段落中的空格和换行符
         for paragraph in paragraphs:
             add_space_dummy_chars(paragraph)
+            # also refreshes the paragraph data
             self.process_paragraph_spacing(paragraph)
-            self.update_paragraph_data(paragraph)
 
         # 第三步：计算所有行宽度的中位数
         median_width = self.calculate_median_line_width(paragraphs)
@@ -249,8 +396,7 @@ class ParagraphFinder:
                         )
                         paragraphs.append(current_paragraph)
                     else:
-                        current_paragraph.pdf_paragraph_composition.append(line)
-                        self.update_paragraph_data(current_paragraph)
+                        self.append_line(current_paragraph, line)
                     current_line_chars = []
 
             # Calculate current character area
@@ -275,8 +421,7 @@ class ParagraphFinder:
                 if current_line_chars:
                     line = self.create_line(current_line_chars)
                     if current_paragraph is not None:
-                        current_paragraph.pdf_paragraph_composition.append(line)
-                        self.update_paragraph_data(current_paragraph)
+                        self.append_line(current_paragraph, line)
                     else:
                         current_paragraph = PdfParagraph(
                             pdf_paragraph_composition=[line],
@@ -304,8 +449,7 @@ class ParagraphFinder:
                 )
                 paragraphs.append(current_paragraph)
             else:
-                current_paragraph.pdf_paragraph_composition.append(line)
-                self.update_paragraph_data(current_paragraph)
+                self.append_line(current_paragraph, line)
 
         page.pdf_character = skip_chars
 
@@ -328,17 +472,16 @@ class ParagraphFinder:
             ).strip():  # 跳过完全空白的行
                 continue
 
-            # 处理行内字符的尾随空格
-            processed_chars = []
-            for char in line.pdf_character:
-                if not char.char_unicode.isspace():
-                    processed_chars = processed_chars + [char]
-                elif processed_chars:  # 只有在有非空格字符后才考虑保留空格
-                    processed_chars.append(char)
-
+            # 处理行内字符的前导和尾随空格
+            chars = line.pdf_character
+            start = 0
+            end = len(chars)
+            while start < end and chars[start].char_unicode.isspace():
+                start += 1
             # 移除尾随空格
-            while processed_chars and processed_chars[-1].char_unicode.isspace():
-                processed_chars.pop()
+            while end > start and chars[end - 1].char_unicode.isspace():
+                end -= 1
+            processed_chars = chars[start:end]
 
             if processed_chars:  # 如果行内还有字符
                 line = self.create_line(processed_chars)
@@ -376,56 +519,16 @@ class ParagraphFinder:
         #     "isolate_formula",
         #     "formula_caption",
         # }
-        layout_priority = [
-            "formula_caption",
-            "isolate_formula",
-            "table_footnote",
-            "table_caption",
-            "figure_caption",
-            "table_text",
-            "table",
-            "figure",
-            "abandon",
-            "plain text",
-            "tiny text",
-            "title",
-        ]
-        char_box = char.visual_bbox.box
-
-        def calculate_intersection_area(char_box: Box, layout_box: Box) -> float:
-            """Calculate the intersection area between a character box and a layout box."""
-            x_left = max(char_box.x, layout_box.x)
-            y_bottom = max(char_box.y, layout_box.y)
-            x_right = min(char_box.x2, layout_box.x2)
-            y_top = min(char_box.y2, layout_box.y2)
-
-            if x_right <= x_left or y_top <= y_bottom:
-                return 0.0
-
-            return (x_right - x_left) * (y_top - y_bottom)
-
-        # 收集所有相交的布局及其相交面积
-        matching_layouts = []
-        for layout in page.page_layout:
-            intersection_area = calculate_intersection_area(char_box, layout.box)
-            if intersection_area > 0:
-                matching_layouts.append(
-                    {
-                        "layout": Layout(layout.id, layout.class_name),
-                        "priority": layout_priority.index(layout.class_name)
-                        if layout.class_name in layout_priority
-                        else len(layout_priority),
-                        "area": intersection_area,
-                    }
-                )
-
-        if not matching_layouts:
-            return None
-
-        # 按优先级（升序）和相交面积（降序）排序
-        matching_layouts.sort(key=lambda x: (x["priority"], -x["area"]))
-
-        return matching_layouts[0]["layout"]
+        cache = self._layout_index_cache
+        if (
+            cache is None
+            or cache[0] is not page
+            or cache[1] is not page.page_layout
+            or cache[2] != len(page.page_layout)
+        ):
+            cache = (page, page.page_layout, len(page.page_layout), LayoutIndex(page))
+            self._layout_index_cache = cache
+        return cache[3].query(char.visual_bbox.box)
 
     def create_line(self, chars: list[PdfCharacter]) -> PdfParagraphComposition:
         assert chars
@@ -544,6 +647,33 @@ class ParagraphFinder:
         bbox2_in_bbox1 = bbox2.y >= bbox1.y and bbox2.y2 <= bbox1.y2
         return bbox1_in_bbox2 or bbox2_in_bbox1
 
+    def find_overlapping_paragraph_pairs(
+        self, paragraphs: list[PdfParagraph]
+    ) -> list[tuple[int, int]]:
+        """Return the index pairs (i < j) of overlapping paragraphs.
+
+        Sweeps the paragraphs from left to right so that only paragraphs
+        whose horizontal extents intersect are compared.
+        """
+        order = sorted(
+            (i for i, para in enumerate(paragraphs) if para.box is not None),
+            key=lambda i: paragraphs[i].box.x,
+        )
+        pairs = []
+        active: list[int] = []
+        for i in order:
+            box = paragraphs[i].box
+            active = [k for k in active if paragraphs[k].box.x2 > box.x]
+            for k in active:
+                other = paragraphs[k]
+                if other.xobj_id != paragraphs[i].xobj_id:
+                    continue
+                if self.bbox_overlap(other.box, box):
+                    pairs.append((min(i, k), max(i, k)))
+            active.append(i)
+        pairs.sort()
+        return pairs
+
     def fix_overlapping_paragraphs(self, page: Page):
         """
         Adjusts the bounding boxes of paragraphs on a page to resolve vertical overlaps.
@@ -551,6 +681,11 @@ class ParagraphFinder:
         Iteratively checks pairs of paragraphs and adjusts their vertical boundaries
         (y and y2) if they overlap, aiming to place the boundary at the midpoint
         of the vertical overlap.
+
+        Boxes only ever shrink vertically, so pairs that do not overlap in the
+        beginning never will. The candidate pairs are therefore collected once,
+        pairs that stop overlapping are dropped after each pass, and the loop
+        stops as soon as a pass leaves every box unchanged.
         """
         paragraphs = page.pdf_paragraph
         if not paragraphs or len(paragraphs) < 2:
@@ -558,77 +693,75 @@ class ParagraphFinder:
 
         max_iterations = len(paragraphs) * len(paragraphs)  # Safety break
         iterations = 0
+        pairs = self.find_overlapping_paragraph_pairs(paragraphs)
 
-        while iterations < max_iterations:
+        while pairs and iterations < max_iterations:
             iterations += 1
-            overlap_found_in_pass = False
-
-            for i in range(len(paragraphs)):
-                for j in range(i + 1, len(paragraphs)):
-                    para1 = paragraphs[i]
-                    para2 = paragraphs[j]
+            box_changed_in_pass = False
 
-                    if para1.box is None or para2.box is None:
-                        continue
+            for i, j in pairs:
+                para1 = paragraphs[i]
+                para2 = paragraphs[j]
 
-                    if para1.xobj_id != para2.xobj_id:
+                # Check for overlap using the existing method
+                if self.bbox_overlap(para1.box, para2.box):
+                    if self.is_bbox_contain_in_vertical(para1.box, para2.box):
                         continue
-
-                    # Check for overlap using the existing method
-                    if self.bbox_overlap(para1.box, para2.box):
-                        if self.is_bbox_contain_in_vertical(para1.box, para2.box):
-                            continue
-                        # Calculate vertical overlap details
-                        overlap_y_start = max(para1.box.y, para2.box.y)
-                        overlap_y_end = min(para1.box.y2, para2.box.y2)
-                        overlap_height = overlap_y_end - overlap_y_start
-
-                        # Calculate horizontal overlap details
-                        overlap_x_start = max(para1.box.x, para2.box.x)
-                        overlap_x_end = min(para1.box.x2, para2.box.x2)
-                        overlap_width = overlap_x_end - overlap_x_start
-
-                        # Ensure there's a real 2D overlap, focusing on vertical adjustment
-                        if overlap_height > 1e-6 and overlap_width > 1e-6:
-                            overlap_found_in_pass = True
-
-                            # Determine which paragraph is visually higher
-                            if para1.box.y2 > para2.box.y and para1.box.y < para2.box.y:
-                                lower_para = para1
-                                higher_para = para2
-                            # Handle cases where y values are identical (or very close)
-                            # Prefer the one with smaller y2 as the higher one, or break tie arbitrarily
-                            elif para1.box.y2 < para2.box.y2:
-                                lower_para = para1
-                                higher_para = para2
-                            else:
-                                lower_para = para2
-                                higher_para = para1
-
-                            # Calculate the midpoint of the vertical overlap
-                            mid_y = overlap_y_start + overlap_height / 2
-
-                            # Adjust boxes, ensuring they remain valid (y2 > y)
-                            if mid_y > higher_para.box.y and mid_y < lower_para.box.y2:
-                                higher_para.box.y = mid_y + 1
-                                lower_para.box.y2 = mid_y - 1
-                            else:
-                                # This might happen if one box is fully contained vertically
-                                # within another, or due to floating point issues.
-                                # Log a warning and skip adjustment for this pair in this iteration.
-                                # A more complex strategy might be needed for full containment.
-                                logger.warning(
-                                    "Could not resolve overlap between paragraphs"
-                                    f" {higher_para.debug_id} and {lower_para.debug_id}"
-                                    " using simple midpoint strategy."
-                                    f" Midpoint: {mid_y},"
-                                    f" Higher Box: {higher_para.box},"
-                                    f" Lower Box: {lower_para.box}"
-                                )
-
-            # If no overlaps were found and adjusted in this pass, we're done.
-            if not overlap_found_in_pass:
+                    # Calculate vertical overlap details
+                    overlap_y_start = max(para1.box.y, para2.box.y)
+                    overlap_y_end = min(para1.box.y2, para2.box.y2)
+                    overlap_height = overlap_y_end - overlap_y_start
+
+                    # Calculate horizontal overlap details
+                    overlap_x_start = max(para1.box.x, para2.box.x)
+                    overlap_x_end = min(para1.box.x2, para2.box.x2)
+                    overlap_width = overlap_x_end - overlap_x_start
+
+                    # Ensure there's a real 2D overlap, focusing on vertical adjustment
+                    if overlap_height > 1e-6 and overlap_width > 1e-6:
+                        # Determine which paragraph is visually higher
+                        if para1.box.y2 > para2.box.y and para1.box.y < para2.box.y:
+                            lower_para = para1
+                            higher_para = para2
+                        # Handle cases where y values are identical (or very close)
+                        # Prefer the one with smaller y2 as the higher one, or break tie arbitrarily
+                        elif para1.box.y2 < para2.box.y2:
+                            lower_para = para1
+                            higher_para = para2
+                        else:
+                            lower_para = para2
+                            higher_para = para1
+
+                        # Calculate the midpoint of the vertical overlap
+                        mid_y = overlap_y_start + overlap_height / 2
+
+                        # Adjust boxes, ensuring they remain valid (y2 > y)
+                        if mid_y > higher_para.box.y and mid_y < lower_para.box.y2:
+                            box_changed_in_pass = True
+                            higher_para.box.y = mid_y + 1
+                            lower_para.box.y2 = mid_y - 1
+                        else:
+                            # This might happen if one box is fully contained vertically
+                            # within another, or due to floating point issues.
+                            # Log a warning and skip adjustment for this pair in this iteration.
+                            # A more complex strategy might be needed for full containment.
+                            logger.warning(
+                                "Could not resolve overlap between paragraphs"
+                                f" {higher_para.debug_id} and {lower_para.debug_id}"
+                                " using simple midpoint strategy."
+                                f" Midpoint: {mid_y},"
+                                f" Higher Box: {higher_para.box},"
+                                f" Lower Box: {lower_para.box}"
+                            )
+
+            # A pass without any adjustment would be repeated verbatim.
+            if not box_changed_in_pass:
                 break
+            pairs = [
+                (i, j)
+                for i, j in pairs
+                if self.bbox_overlap(paragraphs[i].box, paragraphs[j].box)
+            ]
 
         if iterations == max_iterations:
             logger.warning(
@@ -21,6 +21,224 @@ from babeldoc.document_il.utils.layout_helper import is_bullet_point
 from babeldoc.document_il.utils.layout_helper import is_same_style
 from babeldoc.translation_config import TranslationConfig
 
+# 文字修饰符、数学符号、分隔符号
+FORMULAS_CHAR_CATEGORIES = frozenset(
+    [
+        # "Lm",
+        "Mn",
+        "Sk",
+        "Sm",
+        "Zl",
+        "Zp",
+        "Zs",
+        "Co",  # private use character
+        # "So",  # symbol
+    ]
+)
+FORMULAS_START_CHAR_PATTERN = re.compile("[0-9\\[\\]•]")
+
+PRECISE_FORMULA_FONT_PATTERN = (
+    r"^("
+    r"|.*CambriaMath.*"
+    r"|.*Cambria Math.*"
+    r"|.*Asana.*"
+    r"|.*MiriamMonoCLM-BookOblique.*"
+    r"|.*Miriam Mono CLM.*"
+    r"|.*Logix.*"
+    r"|.*AeBonum.*"
+    r"|.*AeMRoman.*"
+    r"|.*AePagella.*"
+    r"|.*AeSchola.*"
+    r"|.*Concrete.*"
+    r"|.*LatinModernMathCompanion.*"
+    r"|.*Latin Modern Math Companion.*"
+    r"|.*RalphSmithsFormalScriptCompanion.*"
+    r"|.*Ralph Smiths Formal Script Companion.*"
+    r"|.*TeXGyreBonumMathCompanion.*"
+    r"|.*TeX Gyre Bonum Companion.*"
+    r"|.*TeXGyrePagellaMathCompanion.*"
+    r"|.*TeX Gyre Pagella Math Companion.*"
+    r"|.*TeXGyreTermesMathCompanion.*"
+    r"|.*TeX Gyre Termes Math Companion.*"
+    r"|.*XITSMathCompanion.*"
+    r"|.*XITS Math Companion.*"
+    r"|.*Erewhon.*"
+    r"|.*Euler-Math.*"
+    r"|.*Euler Math.*"
+    r"|.*FiraMath-Regular.*"
+    r"|.*Fira Math.*"
+    r"|.*Garamond-Math.*"
+    r"|.*GFSNeohellenicMath.*"
+    r"|.*KpMath.*"
+    r"|.*Lete Sans Math.*"
+    r"|.*LeteSansMath.*"
+    # r"|.*LinLibertineO.*"
+    r"|.*Linux Libertine O.*"
+    r"|.*LibertinusMath-Regular.*"
+    r"|.*Libertinus Math.*"
+    r"|.*LatinModernMath-Regular.*"
+    r"|.*Latin Modern Math.*"
+    r"|.*Luciole.*"
+    r"|.*NewCM.*"
+    r"|.*NewComputerModern.*"
+    r"|.*OldStandard-Math.*"
+    r"|.*STIXMath-Regular.*"
+    r"|.*STIX Math.*"
+    r"|.*STIXTwoMath-Regular.*"
+    r"|.*STIX Two Math.*"
+    r"|.*TeXGyreBonumMath.*"
+    r"|.*TeX Gyre Bonum Math.*"
+    r"|.*TeXGyreDejaVuMath.*"
+    r"|.*TeX Gyre DejaVu Math.*"
+    r"|.*TeXGyrePagellaMath.*"
+    r"|.*TeX Gyre Pagella Math.*"
+    r"|.*TeXGyreScholaMath.*"
+    r"|.*TeX Gyre Schola Math.*"
+    r"|.*TeXGyreTermesMath.*"
+    r"|.*TeX Gyre Termes Math.*"
+    r"|.*XCharter-Math.*"
+    r"|.*XCharter Math.*"
+    r"|.*XITSMath-Bold.*"
+    r"|.*XITS Math.*"
+    r"|.*XITSMath.*"
+    r"|.*IBMPlexMath.*"
+    r"|.*IBM Plex Math.*"
+    r")$"
+)
+# 常见正文字体，命中时不再用宽泛规则判断
+NON_FORMULA_FONT_PATTERN = (
+    r"^("
+    r"|Cambria.*"
+    r"|EUAlbertina.*"
+    r"|NimbusRomNo9L.*"
+    r"|GlosaMath.*"
+    r"|URWPalladioL.*"
+    r"|CMSS.+"
+    r"|Arial.*"
+    r"|TimesNewRoman.*"
+    r"|SegoeUI.*"
+    r"|CMTT9.*"
+    r"|CMSL10.*"
+    r"|CMTI10.*"
+    r"|CMTT10.*"
+    r"|CMTI12.*"
+    r"|CMR12.*"
+    r"|MeridienLTStd.*"
+    r"|Calibri.*"
+    r"|STIXMathJax_Main.*"
+    r"|.*NewBaskerville.*"
+    r"|.*FranklinGothic.*"
+    r"|.*AGaramondPro.*"
+    r"|.*PalatinoItalCOR.*"
+    r"|.*ITCSymbolStd.*"
+    r"|.*PlantinStd.*"
+    r"|.*DJ5EscrowCond.*"
+    r"|.*ExchangeBook.*"
+    r"|.*DJ5Exchange.*"
+    r"|.*Times.*"
+    r"|.*PalatinoLTStd.*"
+    r"|.*Times New Roman,Italic.*"
+    r"|.*EhrhardtMT.*"
+    r"|.*GillSansMTStd.*"
+    r"|.*MedicineSymbols3.*"
+    r"|.*HardingText.*"
+    r"|.*GraphikNaturel.*"
+    r"|.*HelveticaNeue.*"
+    r"|.*GoudyOldStyleT.*"
+    r"|.*Symbol.*"
+    r"|.*ScalaSansLF.*"
+    r"|.*ScalaLF.*"
+    r"|.*ScalaSansPro.*"
+    r"|.*PetersburgC.*"
+    r"|.*ColiseumC.*"
+    r"|.*Gantari.*"
+    r"|.*OptimaLTStd.*"
+    r"|.*CronosPro.*"
+    r"|.*ACaslon.*"
+    r"|.*Frutiger.*"
+    r"|.*BrandonGrotesque.*"
+    r"|.*FairfieldLH.*"
+    r"|.*CaeciliaLTStd.*"
+    r"|.*Whitney.*"
+    r"|.*Mercury.*"
+    r"|.*SabonLTStd.*"
+    r"|.*AnonymousPro.*"
+    r"|.*SabonLTPro.*"
+    r"|.*ArnoPro.*"
+    r"|.*CharisSIL.*"
+    r"|.*MSReference.*"
+    r"|.*CMUSerif-Roman.*"
+    r"|.*CourierNewPS.*"
+    r"|.*XCharter.*"
+    r"|.*GillSans.*"
+    r"|.*Perpetua.*"
+    r"|.*GEInspira.*"
+    r"|.*AGaramond.*"
+    r"|.*BMath.*"
+    r"|.*MSTT.*"
+    r"|.*Bookinsanity.*"
+    r"|.*ScalySans.*"
+    r"|.*Code2000.*"
+    r"|.*Minion.*"
+    r"|.*JansonTextLT.*"
+    r"|.*MathPack.*"
+    r"|.*Macmillan.*"
+    r"|.*NimbusSan.*"
+    r"|.*Mincho.*"
+    r"|.*Amerigo.*"
+    r"|.*MSGloriolaIIStd.*"
+    r"|.*CMU.+"
+    r"|.*LinLibertine.*"
+    r"|.*txsys.*"
+    r")$"
+)
+BROAD_FORMULA_FONT_PATTERN = (
+    r"(CM[^RB]"
+    r"|(MS|XY|MT|BL|RM|EU|LA|RS)[A-Z]"
+    r"|LINE"
+    r"|LCIRCLE"
+    r"|TeX-"
+    r"|rsfs"
+    r"|txsy"
+    r"|wasy"
+    r"|stmary"
+    r"|.*Mono"
+    r"|.*Code"
+    # r"|.*Ital"
+    r"|.*Sym"
+    r"|.*Math"
+    r"|AdvP4C4E74"
+    r"|AdvPSSym"
+    r"|AdvP4C4E59"
+    r")"
+)
+
+
+class FormulaBoxBuilder:
+    """增量计算公式边界框，结果与 update_formula_data 相同"""
+
+    def __init__(self, chars: list[PdfCharacter]):
+        self.min_x = self.min_y = self.text_min_y = math.inf
+        self.max_x = self.max_y = self.text_max_y = -math.inf
+        self.extend(chars)
+
+    def extend(self, chars: list[PdfCharacter]):
+        for char in chars:
+            box = char.visual_bbox.box
+            self.min_x = min(self.min_x, box.x)
+            self.max_x = max(self.max_x, box.x2)
+            self.min_y = min(self.min_y, box.y)
+            self.max_y = max(self.max_y, box.y2)
+            if not formular_height_ignore_char(char):
+                self.text_min_y = min(self.text_min_y, box.y)
+                self.text_max_y = max(self.text_max_y, box.y2)
+
+    @property
+    def box(self) -> Box:
+        if self.text_min_y != math.inf:
+            return Box(self.min_x, self.text_min_y, self.max_x, self.text_max_y)
+        return Box(self.min_x, self.min_y, self.max_x, self.max_y)
+
 
 class StylesAndFormulas:
     stage_name = "Parse Formulas and Styles"
@@ -28,6 +246,31 @@ class StylesAndFormulas:
     def __init__(self, translation_config: TranslationConfig):
         self.translation_config = translation_config
         self.font_mapper = FontMapper(translation_config)
+        self.formular_char_pattern = None
+        if translation_config.formular_char_pattern:
+            self.formular_char_pattern = re.compile(
+                translation_config.formular_char_pattern
+            )
+        # Classification tables keyed by char_unicode. They are filled on first
+        # sight of a code point (or cid / multi code point string), since the
+        # result depends on the glyph coverage of the fonts for lang_out.
+        self.formulas_start_char_table: dict[str, bool] = {}
+        self.formulas_middle_char_table: dict[str, bool] = {}
+
+        broad_formula_font_pattern = (
+            translation_config.formular_font_pattern or BROAD_FORMULA_FONT_PATTERN
+        )
+        font_patterns = [
+            PRECISE_FORMULA_FONT_PATTERN,
+            NON_FORMULA_FONT_PATTERN,
+            broad_formula_font_pattern,
+        ]
+        self.formulas_font_patterns = [re.compile(x) for x in font_patterns]
+        # 无法解码的字体名以 BASE64 形式保存，需要用 bytes 正则匹配
+        self.formulas_font_bytes_patterns = [
+            re.compile(x.encode()) for x in font_patterns
+        ]
+        self.formulas_font_cache: dict[str, bool] = {}
 
     def process(self, document: Document):
         with self.translation_config.progress_monitor.stage_start(
@@ -75,6 +318,7 @@ class StylesAndFormulas:
 
             for composition in paragraph.pdf_paragraph_composition:
                 current_chars = []
+                current_chars_isspace = True  # current_chars 是否全为空白字符
                 in_formula_state = False  # 当前是否在处理公式字符
                 in_corner_mark_state = False
 
@@ -111,8 +355,7 @@ class StylesAndFormulas:
                         )
                     )
 
-                    # isspace = get_char_unicode_string(current_chars).isspace()
-                    isspace = all(x.char_unicode.isspace() for x in current_chars)
+                    isspace = current_chars_isspace
                     is_corner_mark = (
                         len(current_chars) > 0
                         and not isspace
@@ -142,10 +385,14 @@ class StylesAndFormulas:
                             self.create_composition(current_chars, in_formula_state),
                         )
                         current_chars = []
+                        current_chars_isspace = True
                     in_formula_state = is_formula
                     in_corner_mark_state = is_corner_mark
 
                     current_chars.append(char)
+                    current_chars_isspace = (
+                        current_chars_isspace and char.char_unicode.isspace()
+                    )
 
                 # 处理行末的字符
                 if current_chars:
@@ -526,243 +773,67 @@ class StylesAndFormulas:
         return bool(re.match(r"^[0-9, ]+$", text))
 
     def is_formulas_font(self, font_name: str) -> bool:
-        pattern_text = (
-            r"^("
-            r"|Cambria.*"
-            r"|EUAlbertina.*"
-            r"|NimbusRomNo9L.*"
-            r"|GlosaMath.*"
-            r"|URWPalladioL.*"
-            r"|CMSS.+"
-            r"|Arial.*"
-            r"|TimesNewRoman.*"
-            r"|SegoeUI.*"
-            r"|CMTT9.*"
-            r"|CMSL10.*"
-            r"|CMTI10.*"
-            r"|CMTT10.*"
-            r"|CMTI12.*"
-            r"|CMR12.*"
-            r"|MeridienLTStd.*"
-            r"|Calibri.*"
-            r"|STIXMathJax_Main.*"
-            r"|.*NewBaskerville.*"
-            r"|.*FranklinGothic.*"
-            r"|.*AGaramondPro.*"
-            r"|.*PalatinoItalCOR.*"
-            r"|.*ITCSymbolStd.*"
-            r"|.*PlantinStd.*"
-            r"|.*DJ5EscrowCond.*"
-            r"|.*ExchangeBook.*"
-            r"|.*DJ5Exchange.*"
-            r"|.*Times.*"
-            r"|.*PalatinoLTStd.*"
-            r"|.*Times New Roman,Italic.*"
-            r"|.*EhrhardtMT.*"
-            r"|.*GillSansMTStd.*"
-            r"|.*MedicineSymbols3.*"
-            r"|.*HardingText.*"
-            r"|.*GraphikNaturel.*"
-            r"|.*HelveticaNeue.*"
-            r"|.*GoudyOldStyleT.*"
-            r"|.*Symbol.*"
-            r"|.*ScalaSansLF.*"
-            r"|.*ScalaLF.*"
-            r"|.*ScalaSansPro.*"
-            r"|.*PetersburgC.*"
-            r"|.*ColiseumC.*"
-            r"|.*Gantari.*"
-            r"|.*OptimaLTStd.*"
-            r"|.*CronosPro.*"
-            r"|.*ACaslon.*"
-            r"|.*Frutiger.*"
-            r"|.*BrandonGrotesque.*"
-            r"|.*FairfieldLH.*"
-            r"|.*CaeciliaLTStd.*"
-            r"|.*Whitney.*"
-            r"|.*Mercury.*"
-            r"|.*SabonLTStd.*"
-            r"|.*AnonymousPro.*"
-            r"|.*SabonLTPro.*"
-            r"|.*ArnoPro.*"
-            r"|.*CharisSIL.*"
-            r"|.*MSReference.*"
-            r"|.*CMUSerif-Roman.*"
-            r"|.*CourierNewPS.*"
-            r"|.*XCharter.*"
-            r"|.*GillSans.*"
-            r"|.*Perpetua.*"
-            r"|.*GEInspira.*"
-            r"|.*AGaramond.*"
-            r"|.*BMath.*"
-            r"|.*MSTT.*"
-            r"|.*Bookinsanity.*"
-            r"|.*ScalySans.*"
-            r"|.*Code2000.*"
-            r"|.*Minion.*"
-            r"|.*JansonTextLT.*"
-            r"|.*MathPack.*"
-            r"|.*Macmillan.*"
-            r"|.*NimbusSan.*"
-            r"|.*Mincho.*"
-            r"|.*Amerigo.*"
-            r"|.*MSGloriolaIIStd.*"
-            r"|.*CMU.+"
-            r"|.*LinLibertine.*"
-            r"|.*txsys.*"
-            r")$"
-        )
-        precise_formula_font_pattern = (
-            r"^("
-            r"|.*CambriaMath.*"
-            r"|.*Cambria Math.*"
-            r"|.*Asana.*"
-            r"|.*MiriamMonoCLM-BookOblique.*"
-            r"|.*Miriam Mono CLM.*"
-            r"|.*Logix.*"
-            r"|.*AeBonum.*"
-            r"|.*AeMRoman.*"
-            r"|.*AePagella.*"
-            r"|.*AeSchola.*"
-            r"|.*Concrete.*"
-            r"|.*LatinModernMathCompanion.*"
-            r"|.*Latin Modern Math Companion.*"
-            r"|.*RalphSmithsFormalScriptCompanion.*"
-            r"|.*Ralph Smiths Formal Script Companion.*"
-            r"|.*TeXGyreBonumMathCompanion.*"
-            r"|.*TeX Gyre Bonum Companion.*"
-            r"|.*TeXGyrePagellaMathCompanion.*"
-            r"|.*TeX Gyre Pagella Math Companion.*"
-            r"|.*TeXGyreTermesMathCompanion.*"
-            r"|.*TeX Gyre Termes Math Companion.*"
-            r"|.*XITSMathCompanion.*"
-            r"|.*XITS Math Companion.*"
-            r"|.*Erewhon.*"
-            r"|.*Euler-Math.*"
-            r"|.*Euler Math.*"
-            r"|.*FiraMath-Regular.*"
-            r"|.*Fira Math.*"
-            r"|.*Garamond-Math.*"
-            r"|.*GFSNeohellenicMath.*"
-            r"|.*KpMath.*"
-            r"|.*Lete Sans Math.*"
-            r"|.*LeteSansMath.*"
-            # r"|.*LinLibertineO.*"
-            r"|.*Linux Libertine O.*"
-            r"|.*LibertinusMath-Regular.*"
-            r"|.*Libertinus Math.*"
-            r"|.*LatinModernMath-Regular.*"
-            r"|.*Latin Modern Math.*"
-            r"|.*Luciole.*"
-            r"|.*NewCM.*"
-            r"|.*NewComputerModern.*"
-            r"|.*OldStandard-Math.*"
-            r"|.*STIXMath-Regular.*"
-            r"|.*STIX Math.*"
-            r"|.*STIXTwoMath-Regular.*"
-            r"|.*STIX Two Math.*"
-            r"|.*TeXGyreBonumMath.*"
-            r"|.*TeX Gyre Bonum Math.*"
-            r"|.*TeXGyreDejaVuMath.*"
-            r"|.*TeX Gyre DejaVu Math.*"
-            r"|.*TeXGyrePagellaMath.*"
-            r"|.*TeX Gyre Pagella Math.*"
-            r"|.*TeXGyreScholaMath.*"
-            r"|.*TeX Gyre Schola Math.*"
-            r"|.*TeXGyreTermesMath.*"
-            r"|.*TeX Gyre Termes Math.*"
-            r"|.*XCharter-Math.*"
-            r"|.*XCharter Math.*"
-            r"|.*XITSMath-Bold.*"
-            r"|.*XITS Math.*"
-            r"|.*XITSMath.*"
-            r"|.*IBMPlexMath.*"
-            r"|.*IBM Plex Math.*"
-            r")$"
-        )
-        if self.translation_config.formular_font_pattern:
-            broad_formula_font_pattern = self.translation_config.formular_font_pattern
-        else:
-            broad_formula_font_pattern = (
-                r"(CM[^RB]"
-                r"|(MS|XY|MT|BL|RM|EU|LA|RS)[A-Z]"
-                r"|LINE"
-                r"|LCIRCLE"
-                r"|TeX-"
-                r"|rsfs"
-                r"|txsy"
-                r"|wasy"
-                r"|stmary"
-                r"|.*Mono"
-                r"|.*Code"
-                # r"|.*Ital"
-                r"|.*Sym"
-                r"|.*Math"
-                r"|AdvP4C4E74"
-                r"|AdvPSSym"
-                r"|AdvP4C4E59"
-                r")"
-            )
+        try:
+            return self.formulas_font_cache[font_name]
+        except KeyError:
+            pass
 
         if font_name.startswith("BASE64:"):
             font_name_bytes = base64.b64decode(font_name[7:])
             font = font_name_bytes.split(b"+")[-1]
-            pattern_text = pattern_text.encode()
-            broad_formula_font_pattern = broad_formula_font_pattern.encode()
+            precise, non_formula, broad = self.formulas_font_bytes_patterns
         else:
             font = font_name.split("+")[-1]
+            precise, non_formula, broad = self.formulas_font_patterns
 
-        if re.match(precise_formula_font_pattern, font):
-            return True
-        elif re.match(pattern_text, font):
-            return False
-        elif re.match(broad_formula_font_pattern, font):
-            return True
+        if precise.match(font):
+            result = True
+        elif non_formula.match(font):
+            result = False
+        else:
+            result = bool(broad.match(font))
 
-        return False
+        self.formulas_font_cache[font_name] = result
+        return result
 
     def is_formulas_start_char(self, char: str) -> bool:
+        try:
+            return self.formulas_start_char_table[char]
+        except KeyError:
+            result = self._classify_formulas_start_char(char)
+            self.formulas_start_char_table[char] = result
+            return result
+
+    def is_formulas_middle_char(self, char: str) -> bool:
+        try:
+            return self.formulas_middle_char_table[char]
+        except KeyError:
+            result = self.is_formulas_start_char(char) or char.startswith(",")
+            self.formulas_middle_char_table[char] = result
+            return result
+
+    def _classify_formulas_start_char(self, char: str) -> bool:
         if "(cid:" in char:
             return True
         if not self.font_mapper.has_char(char):
             if len(char) > 1 and all(self.font_mapper.has_char(x) for x in char):
                 return False
             return True
-        if self.translation_config.formular_char_pattern:
-            pattern = self.translation_config.formular_char_pattern
-            if re.match(pattern, char):
-                return True
+        if self.formular_char_pattern and self.formular_char_pattern.match(char):
+            return True
         if (
             char
             and char != " "  # 非空格
             and (
-                unicodedata.category(char[0])
-                in [
-                    # "Lm",
-                    "Mn",
-                    "Sk",
-                    "Sm",
-                    "Zl",
-                    "Zp",
-                    "Zs",
-                    "Co",  # private use character
-                    # "So",  # symbol
-                ]  # 文字修饰符、数学符号、分隔符号
-                or ord(char[0]) in range(0x370, 0x400)  # 希腊字母
+                unicodedata.category(char[0]) in FORMULAS_CHAR_CATEGORIES
+                or 0x370 <= ord(char[0]) < 0x400  # 希腊字母
             )
         ):
             return True
-        if re.match("[0-9\\[\\]•]", char):
+        if FORMULAS_START_CHAR_PATTERN.match(char):
             return True
         return False
 
-    def is_formulas_middle_char(self, char: str) -> bool:
-        if self.is_formulas_start_char(char):
-            return True
-
-        if re.match(",", char):
-            return True
-
     def should_split_formula(self, formula: PdfFormula) -> bool:
         """判断公式是否需要按逗号拆分（包含逗号且有其他特殊符号）"""
         text = "".join(char.char_unicode for char in formula.pdf_character)
@@ -809,17 +880,6 @@ class StylesAndFormulas:
 
         return result
 
-    def merge_formulas(self, formula1: PdfFormula, formula2: PdfFormula) -> PdfFormula:
-        """合并两个公式，保持字符的相对位置"""
-        # 合并所有字符
-        all_chars = formula1.pdf_character + formula2.pdf_character
-        # 按 y 坐标和 x 坐标排序，确保字符顺序正确
-        sorted_chars = sorted(all_chars, key=lambda c: (c.box.y, c.box.x))
-
-        merged_formula = PdfFormula(pdf_character=sorted_chars)
-        self.update_formula_data(merged_formula)
-        return merged_formula
-
     def merge_overlapping_formulas(self, page: Page):
         """
         合并 x 轴重叠且 y 轴有交集的相邻公式
@@ -832,34 +892,43 @@ class StylesAndFormulas:
             if not paragraph.pdf_paragraph_composition:
                 continue
 
-            i = 0
-            while i < len(paragraph.pdf_paragraph_composition) - 1:
-                comp1 = paragraph.pdf_paragraph_composition[i]
-                comp2 = paragraph.pdf_paragraph_composition[i + 1]
-
+            new_compositions = []
+            # new_compositions 中被合并过的公式的下标 -> (字符, 边界框)
+            merged = {}
+            for comp in paragraph.pdf_paragraph_composition:
+                last = new_compositions[-1] if new_compositions else None
                 # 检查是否都是公式
-                if comp1.pdf_formula is None or comp2.pdf_formula is None:
-                    i += 1
+                if last is None or last.pdf_formula is None or comp.pdf_formula is None:
+                    new_compositions.append(comp)
                     continue
 
-                formula1 = comp1.pdf_formula
-                formula2 = comp2.pdf_formula
-
+                index = len(new_compositions) - 1
+                if index in merged:
+                    box1 = merged[index][1].box
+                else:
+                    box1 = last.pdf_formula.box
+                box2 = comp.pdf_formula.box
                 # 检查 x 轴重叠和 y 轴交集
-                if self.is_x_axis_contained(
-                    formula1.box,
-                    formula2.box,
-                ) and self.has_y_intersection(formula1.box, formula2.box):
-                    # 合并公式
-                    merged_formula = self.merge_formulas(formula1, formula2)
-                    paragraph.pdf_paragraph_composition[i] = PdfParagraphComposition(
-                        pdf_formula=merged_formula,
-                    )
-                    # 删除第二个公式
-                    del paragraph.pdf_paragraph_composition[i + 1]
-                    # 不增加 i，因为合并后的公式可能还需要和下一个公式合并
+                if self.is_x_axis_contained(box1, box2) and self.has_y_intersection(
+                    box1, box2
+                ):
+                    # 合并公式，合并后的公式可能还需要和下一个公式合并
+                    if index not in merged:
+                        chars = list(last.pdf_formula.pdf_character)
+                        merged[index] = (chars, FormulaBoxBuilder(chars))
+                    chars, box_builder = merged[index]
+                    chars.extend(comp.pdf_formula.pdf_character)
+                    box_builder.extend(comp.pdf_formula.pdf_character)
                 else:
-                    i += 1
+                    new_compositions.append(comp)
+
+            for index, (chars, box_builder) in merged.items():
+                # 按 y 坐标和 x 坐标排序，确保字符顺序正确
+                chars.sort(key=lambda c: (c.box.y, c.box.x))
+                new_compositions[index] = PdfParagraphComposition(
+                    pdf_formula=PdfFormula(pdf_character=chars, box=box_builder.box),
+                )
+            paragraph.pdf_paragraph_composition = new_compositions
 
     def is_x_axis_contained(self, box1: Box, box2: Box) -> bool:
         """判断 box1 的 x 轴是否完全包含在 box2 的 x 轴内，或反之"""
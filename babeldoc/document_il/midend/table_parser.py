@@ -6,7 +6,7 @@ import numpy as np
 from pymupdf import Document
 
 from babeldoc.document_il import il_version_1
-from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
+from babeldoc.document_il.utils.mupdf_helper import get_rendered_shape
 from babeldoc.document_il.utils.style_helper import GREEN
 from babeldoc.translation_config import TranslationConfig
 
@@ -133,13 +133,16 @@ class TableParser:
                 self._save_debug_image,
             ):
                 page_layouts = []
+                h, w = get_rendered_shape(
+                    layouts,
+                    mupdf_doc,
+                    page.page_number,
+                    getattr(self.model, "lock", None),
+                )
                 for layout in layouts.boxes:
                     # Convert coordinate system from picture to il
                     # system to the il coordinate system
                     x0, y0, x1, y1 = layout.xyxy
-                    # pix = mupdf_doc[page.page_number].get_pixmap()
-                    pix = get_no_rotation_img(mupdf_doc[page.page_number])
-                    h, w = pix.height, pix.width
                     x0, y0, x1, y1 = (
                         np.clip(int(x0 - 1), 0, w - 1),
                         np.clip(int(h - y1 - 1), 0, h - 1),
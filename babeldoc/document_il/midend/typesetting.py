@@ -7,7 +7,7 @@ from functools import cache
 
 import pymupdf
 
-from babeldoc.const import WATERMARK_VERSION
+from babeldoc.const import get_watermark_version
 from babeldoc.document_il import Box
 from babeldoc.document_il import PdfCharacter
 from babeldoc.document_il import PdfFormula
@@ -562,7 +562,9 @@ class Typesetting:
                 self.render_page(page)
                 pbar.advance()
 
-    def render_page(self, page: il_version_1.Page):
+    def get_page_fonts(
+        self, page: il_version_1.Page
+    ) -> dict[str | int, il_version_1.PdfFont | dict[str, il_version_1.PdfFont]]:
         fonts: dict[
             str | int,
             il_version_1.PdfFont | dict[str, il_version_1.PdfFont],
@@ -574,6 +576,10 @@ class Typesetting:
             fonts[xobj.xobj_id] = page_fonts.copy()
             for font in xobj.pdf_font:
                 fonts[xobj.xobj_id][font.font_id] = font
+        return fonts
+
+    def render_page(self, page: il_version_1.Page):
+        fonts = self.get_page_fonts(page)
         if (
             page.page_number == 0
             and self.translation_config.watermark_output_mode
@@ -585,6 +591,21 @@ class Typesetting:
             self.render_paragraph(paragraph, page, fonts)
 
     def add_watermark(self, page: il_version_1.Page):
+        page.pdf_paragraph.append(self.create_watermark_paragraph(page))
+
+    def typeset_watermark(self, page: il_version_1.Page) -> il_version_1.PdfParagraph:
+        """Typeset the watermark of an already typeset page.
+
+        The watermark is returned instead of being added to the page, so
+        it can be drawn over the output without typesetting the page again.
+        """
+        paragraph = self.create_watermark_paragraph(page)
+        self.render_paragraph(paragraph, page, self.get_page_fonts(page))
+        return paragraph
+
+    def create_watermark_paragraph(
+        self, page: il_version_1.Page
+    ) -> il_version_1.PdfParagraph:
         page_width = page.cropbox.box.x2 - page.cropbox.box.x
         page_height = page.cropbox.box.y2 - page.cropbox.box.y
         style = il_version_1.PdfStyle(
@@ -592,30 +613,28 @@ class Typesetting:
             font_size=6,
             graphic_state=il_version_1.GraphicState(),
         )
-        text = f"本文档由 funstory.ai 的开源 PDF 翻译库 BabelDOC {WATERMARK_VERSION} (http://yadt.io) 翻译，本仓库正在积极的建设当中，欢迎 star 和关注。"
+        text = f"本文档由 funstory.ai 的开源 PDF 翻译库 BabelDOC {get_watermark_version()} (http://yadt.io) 翻译，本仓库正在积极的建设当中，欢迎 star 和关注。"
         if self.translation_config.debug:
             text += "\n 当前为 DEBUG 模式，将显示更多辅助信息。请注意，部分框的位置对应原文，但在译文中可能不正确。"
-        page.pdf_paragraph.append(
-            il_version_1.PdfParagraph(
-                first_line_indent=False,
-                box=il_version_1.Box(
-                    x=page.cropbox.box.x + page_width * 0.05,
-                    y=page.cropbox.box.y,
-                    x2=page.cropbox.box.x2,
-                    y2=page.cropbox.box.y2 - page_height * 0.05,
-                ),
-                vertical=False,
-                pdf_style=style,
-                pdf_paragraph_composition=[
-                    il_version_1.PdfParagraphComposition(
-                        pdf_same_style_unicode_characters=il_version_1.PdfSameStyleUnicodeCharacters(
-                            unicode=text,
-                            pdf_style=style,
-                        ),
-                    ),
-                ],
-                xobj_id=-1,
+        return il_version_1.PdfParagraph(
+            first_line_indent=False,
+            box=il_version_1.Box(
+                x=page.cropbox.box.x + page_width * 0.05,
+                y=page.cropbox.box.y,
+                x2=page.cropbox.box.x2,
+                y2=page.cropbox.box.y2 - page_height * 0.05,
             ),
+            vertical=False,
+            pdf_style=style,
+            pdf_paragraph_composition=[
+                il_version_1.PdfParagraphComposition(
+                    pdf_same_style_unicode_characters=il_version_1.PdfSameStyleUnicodeCharacters(
+                        unicode=text,
+                        pdf_style=style,
+                    ),
+                ),
+            ],
+            xobj_id=-1,
         )
 
     def render_paragraph(
@@ -1,4 +1,5 @@
 import json
+import threading
 from pathlib import Path
 
 from peewee import SQL
@@ -10,8 +11,10 @@ from peewee import TextField
 
 from babeldoc.const import CACHE_FOLDER
 
-# we don't init the database here
+# we don't init the database here, it is opened on first use
 db = SqliteDatabase(None)
+_db_initialized = False
+_db_init_lock = threading.Lock()
 
 
 class _TranslationCache(Model):
@@ -77,6 +80,7 @@ class TranslationCache:
     # Since peewee and the underlying sqlite are thread-safe,
     # get and set operations don't need locks.
     def get(self, original_text: str) -> str | None:
+        _ensure_db()
         result = _TranslationCache.get_or_none(
             translate_engine=self.translate_engine,
             translate_engine_params=self.translate_engine_params,
@@ -85,6 +89,7 @@ class TranslationCache:
         return result.translation if result else None
 
     def set(self, original_text: str, translation: str):
+        _ensure_db()
         _TranslationCache.create(
             translate_engine=self.translate_engine,
             translate_engine_params=self.translate_engine_params,
@@ -94,6 +99,7 @@ class TranslationCache:
 
 
 def init_db(remove_exists=False):
+    global _db_initialized
     CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
     # The current version does not support database migration, so add the version number to the file name.
     cache_db_path = CACHE_FOLDER / "cache.v1.db"
@@ -107,6 +113,15 @@ def init_db(remove_exists=False):
         },
     )
     db.create_tables([_TranslationCache], safe=True)
+    _db_initialized = True
+
+
+def _ensure_db():
+    if _db_initialized:
+        return
+    with _db_init_lock:
+        if not _db_initialized:
+            init_db()
 
 
 def init_test_db():
@@ -141,6 +156,3 @@ def clean_test_db(test_db):
     shm_path = Path(str(db_path) + "-shm")
     if shm_path.exists():
         shm_path.unlink()
-
-
-init_db()
@@ -6,10 +6,8 @@ import unicodedata
 from abc import ABC
 from abc import abstractmethod
 
-import httpx
-import openai
 from tenacity import retry
-from tenacity import retry_if_exception_type
+from tenacity import retry_if_exception
 from tenacity import stop_after_attempt
 from tenacity import wait_exponential
 
@@ -177,6 +175,13 @@ class BaseTranslator(ABC):
         return self.get_rich_text_left_placeholder(placeholder_id)
 
 
+def _is_rate_limit_error(e: BaseException) -> bool:
+    # openai is only imported once a client is created
+    import openai
+
+    return isinstance(e, openai.RateLimitError)
+
+
 class OpenAITranslator(BaseTranslator):
     # https://github.com/openai/openai-python
     name = "openai"
@@ -190,6 +195,10 @@ class OpenAITranslator(BaseTranslator):
         api_key=None,
         ignore_cache=False,
     ):
+        # openai takes a while to import
+        import httpx
+        import openai
+
         super().__init__(lang_in, lang_out, ignore_cache)
         self.options = {"temperature": 0}  # 随机采样可能会打断公式标记
         self.client = openai.OpenAI(
@@ -210,7 +219,7 @@ class OpenAITranslator(BaseTranslator):
         self.completion_token_count = AtomicInteger()
 
     @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
+        retry=retry_if_exception(_is_rate_limit_error),
         stop=stop_after_attempt(100),
         wait=wait_exponential(multiplier=1, min=1, max=15),
         before_sleep=lambda retry_state: logger.warning(
@@ -240,7 +249,7 @@ class OpenAITranslator(BaseTranslator):
         ]
 
     @retry(
-        retry=retry_if_exception_type(openai.RateLimitError),
+        retry=retry_if_exception(_is_rate_limit_error),
         stop=stop_after_attempt(100),
         wait=wait_exponential(multiplier=1, min=1, max=15),
         before_sleep=lambda retry_state: logger.warning(
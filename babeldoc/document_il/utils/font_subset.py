@@ -0,0 +1,198 @@
+"""Font subsetting in persistent worker processes.
+
+pymupdf's subset_fonts can hang or crash on malformed fonts, so it runs in a
+separate process that can be killed. Workers are reused across calls; the
+document is passed as bytes through a pipe.
+"""
+
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+
+logger = logging.getLogger(__name__)
+
+_OK = b"\x00"
+_ERROR = b"\x01"
+
+
+class FontSubsetError(Exception):
+    pass
+
+
+def _font_subset_worker(conn):
+    import pymupdf
+
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except (EOFError, OSError):
+            return
+        try:
+            pdf = pymupdf.open(stream=data)
+            pdf.subset_fonts(fallback=False)
+            result = _OK + pdf.tobytes()
+            pdf.close()
+        except Exception as e:
+            result = _ERROR + repr(e).encode("utf-8", "replace")
+        conn.send_bytes(result)
+
+
+def _get_context():
+    # Fork on Linux like the per call processes this replaced did. Spawn and
+    # forkserver import the __main__ module of the host application again.
+    if sys.platform.startswith("linux"):
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+class _FontSubsetWorker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_font_subset_worker,
+            args=(child_conn,),
+            name="babeldoc-font-subset",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self._sender = None
+
+    def subset_fonts(self, data: bytes, timeout: float) -> bytes:
+        deadline = time.monotonic() + timeout
+
+        # Sending blocks once the pipe is full, so a worker that stops
+        # reading would hang the caller. Send from a thread and only wait
+        # until the deadline, close() ends the thread by killing the worker.
+        def send():
+            try:
+                self.conn.send_bytes(data)
+            except OSError:
+                pass
+
+        sender = threading.Thread(target=send, name="font-subset-send", daemon=True)
+        self._sender = sender
+        sender.start()
+        if not wait(
+            [self.conn, self.process.sentinel], max(0, deadline - time.monotonic())
+        ):
+            raise TimeoutError(f"font subsetting timeout after {timeout} seconds")
+        # The worker has read the whole document before it replies
+        sender.join()
+        try:
+            result = self.conn.recv_bytes()
+        except (EOFError, OSError) as e:
+            self.process.join(1)
+            raise FontSubsetError(
+                f"font subsetting process exited with code {self.process.exitcode}"
+            ) from e
+        if result[:1] != _OK:
+            raise FontSubsetError(result[1:].decode("utf-8", "replace"))
+        return result[1:]
+
+    def close(self):
+        if self._sender is not None and self._sender.is_alive():
+            # The pipe can not be closed while it is written to, stop the
+            # worker first so that the sender fails
+            self._stop_process()
+            self._sender.join()
+        self.conn.close()
+        self._stop_process()
+
+    def _stop_process(self):
+        if not self.process.is_alive():
+            return
+        self.process.terminate()
+        self.process.join(5)
+        if self.process.is_alive():
+            logger.warning("Font subsetting process did not terminate, killing it")
+            self.process.kill()
+            self.process.join()
+
+
+class FontSubsetPool:
+    """Reusable font subsetting processes.
+
+    A worker is busy with one document at a time, concurrent calls start
+    additional workers. At most max_idle_workers are kept between calls.
+    A worker that times out or fails is killed and replaced on demand.
+    """
+
+    def __init__(self, max_idle_workers: int = 2):
+        self.max_idle_workers = max_idle_workers
+        self._context = None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _start_worker(self) -> _FontSubsetWorker:
+        with self._lock:
+            if self._context is None:
+                self._context = _get_context()
+            context = self._context
+        return _FontSubsetWorker(context)
+
+    def _acquire(self) -> _FontSubsetWorker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.close()
+        return self._start_worker()
+
+    def _release(self, worker: _FontSubsetWorker):
+        with self._lock:
+            if len(self._idle) < self.max_idle_workers:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+    def warm_up(self):
+        """Start a worker in the background if none is idle."""
+        with self._lock:
+            if self._idle:
+                return
+
+        def start():
+            try:
+                self._release(self._start_worker())
+            except Exception:
+                logger.warning("Failed to start font subsetting process", exc_info=True)
+
+        threading.Thread(target=start, name="font-subset-warm-up", daemon=True).start()
+
+    def subset_fonts(self, data: bytes, timeout: float = 60) -> bytes:
+        """Subset the fonts of a PDF given as bytes.
+
+        Raises TimeoutError or FontSubsetError, the worker is killed in both
+        cases.
+        """
+        worker = self._acquire()
+        try:
+            result = worker.subset_fonts(data, timeout)
+        except BaseException:
+            worker.close()
+            raise
+        self._release(worker)
+        return result
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_font_subset_pool() -> FontSubsetPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FontSubsetPool()
+        return _pool
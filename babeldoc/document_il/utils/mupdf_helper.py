@@ -1,3 +1,5 @@
+import contextlib
+
 import pymupdf
 
 
@@ -8,3 +10,18 @@ def get_no_rotation_img(page: pymupdf.Page):
     pix = page.get_pixmap(dpi=72)
     page.set_rotation(original_rotation)
     return pix
+
+
+def get_rendered_shape(
+    result, doc: pymupdf.Document, page_number: int, lock=None
+) -> tuple[int, int]:
+    """(height, width) of the page image a layout result was predicted on.
+
+    Models set result.image_shape, other models need the page to be rendered
+    again. Pass the lock of a model which renders pages on other threads.
+    """
+    if getattr(result, "image_shape", None) is not None:
+        return result.image_shape
+    with lock or contextlib.nullcontext():
+        pix = get_no_rotation_img(doc[page_number])
+    return pix.height, pix.width
@@ -1,21 +1,171 @@
-import copy
+import contextlib
+import dataclasses
+import functools
+import gc
+import hashlib
+import typing
+from collections.abc import Callable
+from collections.abc import Iterator
 from pathlib import Path
 
+import msgpack
 import orjson
-from xsdata.formats.dataclass.context import XmlContext
-from xsdata.formats.dataclass.parsers import XmlParser
-from xsdata.formats.dataclass.serializers import XmlSerializer
-from xsdata.formats.dataclass.serializers.config import SerializerConfig
+import pyzstd
 
 from babeldoc.document_il import il_version_1
 
+JSON_DUMP_SUFFIX = ".json.zst"
+
+BINARY_MAGIC = b"BDIL"
+BINARY_FORMAT_VERSION = 1
+
+# field kinds used by the binary codec
+_SCALAR = 0
+_OBJECT = 1
+_OBJECT_LIST = 2
+
+
+def _msgpack_default(obj):
+    # numpy scalars and similar objects sneak into the IL from time to time
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"can not serialize {type(obj)} into binary IL")
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    # The codec allocates millions of small containers on large documents and
+    # the cyclic collector would otherwise dominate the runtime.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class _DataclassCodec:
+    """Encode an IL dataclass as a positional list of its field values.
+
+    The per-class encode/decode functions are generated once from the schema,
+    which keeps the hot path free of per-field dispatch.
+    """
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        self.fields: list[tuple[str, int, _DataclassCodec | None]] = []
+
+    def resolve(self):
+        hints = typing.get_type_hints(self.cls)
+        for f in dataclasses.fields(self.cls):
+            hint = hints[f.name]
+            args = typing.get_args(hint)
+            if typing.get_origin(hint) is list and dataclasses.is_dataclass(args[0]):
+                self.fields.append((f.name, _OBJECT_LIST, _get_codec(args[0])))
+                continue
+            nested = [x for x in args if dataclasses.is_dataclass(x)]
+            if dataclasses.is_dataclass(hint):
+                nested = [hint]
+            if len(nested) > 1:
+                # the encoded data does not say which class to decode
+                raise TypeError(
+                    f"{self.cls.__name__}.{f.name}: "
+                    f"unions of several IL classes are not supported"
+                )
+            if nested:
+                self.fields.append((f.name, _OBJECT, _get_codec(nested[0])))
+            else:
+                self.fields.append((f.name, _SCALAR, None))
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _, _ in self.fields]
+
+    def _compile(self):
+        namespace = {"new": object.__new__, "cls": self.cls}
+        encoders = []
+        decoders = []
+        for i, (name, kind, codec) in enumerate(self.fields):
+            if kind == _SCALAR:
+                encoders.append(f"obj.{name}")
+                decoders.append(f"{name!r}: data[{i}]")
+                continue
+            namespace[f"enc_{i}"] = codec._encode
+            namespace[f"dec_{i}"] = codec._decode
+            if kind == _OBJECT:
+                encoders.append(f"None if (v := obj.{name}) is None else enc_{i}(v)")
+                decoders.append(
+                    f"{name!r}: None if (v := data[{i}]) is None else dec_{i}(v)"
+                )
+            else:
+                encoders.append(f"[enc_{i}(x) for x in obj.{name}]")
+                decoders.append(f"{name!r}: [dec_{i}(x) for x in data[{i}]]")
+        source = (
+            "def encode(obj):\n"
+            f"    return [{', '.join(encoders)}]\n"
+            "def decode(data):\n"
+            "    obj = new(cls)\n"
+            f"    obj.__dict__ = {{{', '.join(decoders)}}}\n"
+            "    return obj\n"
+        )
+        exec(source, namespace)  # noqa: S102
+        self._encode = namespace["encode"]
+        self._decode = namespace["decode"]
+
+    def encode(self, obj) -> list:
+        return self._encode(obj)
+
+    def decode(self, data: list):
+        return self._decode(data)
+
+
+_codecs: dict[type, _DataclassCodec] = {}
+
+
+def _get_codec(cls: type) -> _DataclassCodec:
+    codec = _codecs.get(cls)
+    if codec is None:
+        # register before resolving so that recursive schemas terminate
+        codec = _codecs[cls] = _DataclassCodec(cls)
+        try:
+            codec.resolve()
+            codec._compile()
+        except BaseException:
+            del _codecs[cls]
+            raise
+    return codec
+
+
+@functools.cache
+def _schema_fingerprint() -> str:
+    """Hash of the class and field layout of the IL.
+
+    Binary snapshots are positional, so a snapshot written against a
+    different schema must never be decoded silently.
+    """
+    _get_codec(il_version_1.Document)
+    layout = sorted((cls.__name__, codec.names) for cls, codec in list(_codecs.items()))
+    return hashlib.sha256(orjson.dumps(layout)).hexdigest()[:16]
+
 
 class XMLConverter:
-    def __init__(self):
-        self.parser = XmlParser()
+    # xsdata is only needed for xml and takes a while to import
+    @functools.cached_property
+    def parser(self):
+        from xsdata.formats.dataclass.parsers import XmlParser
+
+        return XmlParser()
+
+    @functools.cached_property
+    def serializer(self):
+        from xsdata.formats.dataclass.context import XmlContext
+        from xsdata.formats.dataclass.serializers import XmlSerializer
+        from xsdata.formats.dataclass.serializers.config import SerializerConfig
+
         config = SerializerConfig(indent="  ")
         context = XmlContext()
-        self.serializer = XmlSerializer(context=context, config=config)
+        return XmlSerializer(context=context, config=config)
 
     def write_xml(self, document: il_version_1.Document, path: str):
         with Path(path).open("w", encoding="utf-8") as f:
@@ -34,9 +184,58 @@ class XMLConverter:
             il_version_1.Document,
         )
 
-    def deepcopy(self, document: il_version_1.Document) -> il_version_1.Document:
-        return copy.deepcopy(document)
-        # return self.from_xml(self.to_xml(document))
+    def _pack(self, obj) -> bytes:
+        with _gc_paused():
+            return msgpack.packb(
+                _get_codec(type(obj)).encode(obj),
+                default=_msgpack_default,
+                unicode_errors="surrogatepass",
+            )
+
+    def _unpack(self, cls: type, data: bytes):
+        with _gc_paused():
+            return _get_codec(cls).decode(
+                msgpack.unpackb(data, unicode_errors="surrogatepass")
+            )
+
+    def copy_tree(self, obj):
+        """Copy an IL object (usually a Document or a Page) through the binary
+        codec, which is much faster than copy.deepcopy on large documents.
+
+        Unlike copy.deepcopy, the IL is treated as a tree: an object referenced
+        from several places (e.g. a shared PdfStyle) becomes separate copies,
+        and tuples in scalar fields come back as lists.
+        """
+        return self._unpack(type(obj), self._pack(obj))
+
+    def to_binary(self, document: il_version_1.Document, level: int = 3) -> bytes:
+        header = msgpack.packb(
+            [BINARY_FORMAT_VERSION, _schema_fingerprint(), type(document).__name__]
+        )
+        return BINARY_MAGIC + pyzstd.compress(header + self._pack(document), level)
+
+    def from_binary(self, data: bytes) -> il_version_1.Document:
+        if not data.startswith(BINARY_MAGIC):
+            raise ValueError("not a binary IL snapshot")
+        unpacker = msgpack.Unpacker(max_buffer_size=0, unicode_errors="surrogatepass")
+        unpacker.feed(pyzstd.decompress(data[len(BINARY_MAGIC) :]))
+        version, fingerprint, cls_name = unpacker.unpack()
+        if version != BINARY_FORMAT_VERSION or fingerprint != _schema_fingerprint():
+            raise ValueError(
+                f"binary IL snapshot schema mismatch: "
+                f"version {version}, fingerprint {fingerprint}"
+            )
+        cls = getattr(il_version_1, cls_name)
+        with _gc_paused():
+            return _get_codec(cls).decode(unpacker.unpack())
+
+    def write_binary(self, document: il_version_1.Document, path: str, level: int = 3):
+        with Path(path).open("wb") as f:
+            f.write(self.to_binary(document, level))
+
+    def read_binary(self, path: str) -> il_version_1.Document:
+        with Path(path).open("rb") as f:
+            return self.from_binary(f.read())
 
     def to_json(self, document: il_version_1.Document) -> str:
         return orjson.dumps(
@@ -49,3 +248,68 @@ class XMLConverter:
     def write_json(self, document: il_version_1.Document, path: str):
         with Path(path).open("w", encoding="utf-8") as f:
             f.write(self.to_json(document))
+
+    def write_json_dump(
+        self,
+        document: il_version_1.Document,
+        path: str,
+        page_filter: Callable[[il_version_1.Page], bool] | None = None,
+        level: int = 1,
+    ):
+        """Write document as zstd compressed, compact json.
+
+        Pages are serialized and compressed one at a time, so the whole json
+        text never has to be kept in memory. Each page is on its own line,
+        which lets iter_json_dump read the dump page by page. Pages rejected
+        by page_filter are left out.
+        """
+        option = orjson.OPT_SORT_KEYS
+        with pyzstd.ZstdFile(path, "w", level_or_option=level) as f:
+            f.write(b'{"page":[')
+            separator = b"\n"
+            for page in document.page:
+                if page_filter is not None and not page_filter(page):
+                    continue
+                f.write(separator + orjson.dumps(page, option=option))
+                separator = b"\n,"
+            others = {
+                field.name: getattr(document, field.name)
+                for field in dataclasses.fields(document)
+                if field.name != "page"
+            }
+            # strip the braces, the fields are appended to the open object
+            others_json = orjson.dumps(others, option=option)[1:-1]
+            f.write(b"\n]" + (b"," + others_json if others_json else b"") + b"}\n")
+
+    def iter_json_dump(self, path: str | Path) -> Iterator[tuple[str, typing.Any]]:
+        """Read a dump written by write_json_dump, or a plain json file.
+
+        Yields ("page", page) for every page, then (name, value) for the other
+        fields of the document. Pages of a dump are parsed one at a time.
+        """
+        path = Path(path)
+        if not path.name.endswith(JSON_DUMP_SUFFIX):
+            document = orjson.loads(path.read_bytes())
+            for page in document.pop("page", []):
+                yield "page", page
+            yield from document.items()
+            return
+        with pyzstd.ZstdFile(path) as f:
+            if f.readline() != b'{"page":[\n':
+                raise ValueError(f"{path} is not a json dump")
+            for line in f:
+                if line.startswith(b"]"):
+                    yield from orjson.loads(b"{" + line[2:]).items()
+                    return
+                yield "page", orjson.loads(line.removeprefix(b","))
+        raise ValueError(f"{path} is truncated")
+
+    def read_json_dump(self, path: str | Path) -> dict:
+        """Read a dump written by write_json_dump, or a plain json file."""
+        document = {"page": []}
+        for name, value in self.iter_json_dump(path):
+            if name == "page":
+                document["page"].append(value)
+            else:
+                document[name] = value
+        return document
@@ -1,36 +1,49 @@
 import abc
 import ast
+import collections
+import functools
+import hashlib
 import logging
+import os
 import platform
 import re
 import threading
 from collections.abc import Generator
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING
 
 import cv2
 import numpy as np
-
-from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
-
-try:
-    import onnx
-    import onnxruntime
-except ImportError as e:
-    if "DLL load failed" in str(e):
-        raise OSError(
-            "Microsoft Visual C++ Redistributable is not installed. "
-            "Download it at https://aka.ms/vs/17/release/vc_redist.x64.exe"
-        ) from e
-    raise
 import pymupdf
 
 import babeldoc.document_il.il_version_1
 from babeldoc.assets.assets import get_doclayout_onnx_model_path
+from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
+
+if TYPE_CHECKING:
+    import onnxruntime
 
 # from huggingface_hub import hf_hub_download
 
 logger = logging.getLogger(__name__)
 
 
+def import_onnxruntime():
+    """Import onnxruntime on first use, it takes a while to import."""
+    try:
+        import onnxruntime
+    except ImportError as e:
+        if "DLL load failed" in str(e):
+            raise OSError(
+                "Microsoft Visual C++ Redistributable is not installed. "
+                "Download it at https://aka.ms/vs/17/release/vc_redist.x64.exe"
+            ) from e
+        raise
+    return onnxruntime
+
+
 class YoloResult:
     """Helper class to store detection results from ONNX model."""
 
@@ -42,18 +55,152 @@ class YoloResult:
             self.boxes = [YoloBox(data=d) for d in boxes_data]
         self.boxes.sort(key=lambda x: x.conf, reverse=True)
         self.names = names
+        # (height, width) of the rendered page, set by handle_document
+        self.image_shape: tuple[int, int] | None = None
+
+
+class OnnxSessionConfig:
+    """SessionOptions tuning for the ONNX Runtime models (layout and table OCR).
+
+    Thread counts left at 0 share the cpu cores between the sessions that run
+    at the same time, see thread_counts. ONNX Runtime itself would start one
+    thread per core for every session. Lower them when several documents are
+    translated in parallel.
+    """
+
+    # names of the onnxruntime.GraphOptimizationLevel and ExecutionMode members
+    GRAPH_OPTIMIZATION_LEVELS = {
+        "disable": "ORT_DISABLE_ALL",
+        "basic": "ORT_ENABLE_BASIC",
+        "extended": "ORT_ENABLE_EXTENDED",
+        "all": "ORT_ENABLE_ALL",
+    }
+    EXECUTION_MODES = {
+        "sequential": "ORT_SEQUENTIAL",
+        "parallel": "ORT_PARALLEL",
+    }
+
+    def __init__(
+        self,
+        intra_op_num_threads: int = 0,
+        inter_op_num_threads: int = 0,
+        graph_optimization_level: str = "all",
+        enable_cpu_mem_arena: bool = True,
+        enable_mem_pattern: bool = True,
+        execution_mode: str = "sequential",
+    ):
+        cpu_count = os.cpu_count() or 1
+        for name, value in (
+            ("intra_op_num_threads", intra_op_num_threads),
+            ("inter_op_num_threads", inter_op_num_threads),
+        ):
+            if not isinstance(value, int) or value < 0:
+                raise ValueError(f"{name} must be a non-negative integer: {value!r}")
+            if value > cpu_count:
+                logger.warning(f"{name}={value} exceeds the cpu count {cpu_count}")
+        if graph_optimization_level not in self.GRAPH_OPTIMIZATION_LEVELS:
+            raise ValueError(
+                f"graph_optimization_level must be one of "
+                f"{list(self.GRAPH_OPTIMIZATION_LEVELS)}: {graph_optimization_level!r}"
+            )
+        if execution_mode not in self.EXECUTION_MODES:
+            raise ValueError(
+                f"execution_mode must be one of {list(self.EXECUTION_MODES)}: "
+                f"{execution_mode!r}"
+            )
+        if inter_op_num_threads and execution_mode == "sequential":
+            logger.warning(
+                "inter_op_num_threads only takes effect in parallel execution mode"
+            )
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        self.graph_optimization_level = graph_optimization_level
+        self.enable_cpu_mem_arena = enable_cpu_mem_arena
+        self.enable_mem_pattern = enable_mem_pattern
+        self.execution_mode = execution_mode
+
+    def thread_counts(self, concurrent_sessions: int = 1) -> tuple[int, int]:
+        """(intra_op, inter_op) thread counts of one of concurrent_sessions
+        sessions which run at the same time.
+
+        Counts left at 0 are derived from os.cpu_count() divided by the number
+        of sessions. In parallel execution mode this share is split between
+        inter-op and intra-op threads.
+        """
+        share = max(1, (os.cpu_count() or 1) // max(1, concurrent_sessions))
+        parallel = self.execution_mode == "parallel"
+        inter_op_num_threads = self.inter_op_num_threads
+        if not inter_op_num_threads:
+            inter_op_num_threads = max(1, share // 2) if parallel else 1
+        intra_op_num_threads = self.intra_op_num_threads
+        if not intra_op_num_threads:
+            intra_op_num_threads = (
+                max(1, share - inter_op_num_threads) if parallel else share
+            )
+        return intra_op_num_threads, inter_op_num_threads
+
+    def create_session_options(
+        self, providers: list[str] | None = None, concurrent_sessions: int = 1
+    ) -> "onnxruntime.SessionOptions":
+        onnxruntime = import_onnxruntime()
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads, options.inter_op_num_threads = self.thread_counts(
+            concurrent_sessions
+        )
+        options.graph_optimization_level = getattr(
+            onnxruntime.GraphOptimizationLevel,
+            self.GRAPH_OPTIMIZATION_LEVELS[self.graph_optimization_level],
+        )
+        options.enable_cpu_mem_arena = self.enable_cpu_mem_arena
+        options.enable_mem_pattern = self.enable_mem_pattern
+        options.execution_mode = getattr(
+            onnxruntime.ExecutionMode, self.EXECUTION_MODES[self.execution_mode]
+        )
+        if providers and "DmlExecutionProvider" in providers:
+            # DirectML supports neither memory patterns nor parallel execution
+            options.enable_mem_pattern = False
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        return options
+
+    def __repr__(self):
+        return (
+            f"OnnxSessionConfig(intra_op_num_threads={self.intra_op_num_threads}, "
+            f"inter_op_num_threads={self.inter_op_num_threads}, "
+            f"graph_optimization_level={self.graph_optimization_level}, "
+            f"enable_cpu_mem_arena={self.enable_cpu_mem_arena}, "
+            f"enable_mem_pattern={self.enable_mem_pattern}, "
+            f"execution_mode={self.execution_mode})"
+        )
 
 
 class DocLayoutModel(abc.ABC):
     @staticmethod
-    def load_onnx():
-        logger.info("Loading ONNX model...")
-        model = OnnxModel.from_pretrained()
+    def load_onnx(
+        session_config: OnnxSessionConfig | None = None, quantized: bool = False
+    ):
+        logger.info(f"Loading {'int8 ' if quantized else ''}ONNX model...")
+        model = OnnxModel.from_pretrained(session_config, quantized)
         return model
 
     @staticmethod
-    def load_available():
-        return DocLayoutModel.load_onnx()
+    def load_available(
+        session_config: OnnxSessionConfig | None = None, quantized: bool = False
+    ):
+        return DocLayoutModel.load_onnx(session_config, quantized)
+
+    @property
+    def cache_identity(self) -> str | None:
+        """Identity of the model weights, used to key cached layout results.
+
+        None disables caching for this model.
+        """
+        return None
+
+    @property
+    def cache_source(self) -> str | None:
+        """Where the model comes from, results of an older identity with
+        the same source are discarded."""
+        return None
 
     @property
     @abc.abstractmethod
@@ -83,7 +230,32 @@ class DocLayoutModel(abc.ABC):
     ]:
         """
         Handle a document.
+
+        Yields (page, result). Implementations should set result.image_shape
+        to the size of the rendered page, so that callers do not need to
+        render the page again.
+        """
+
+    def handle_images(
+        self,
+        items: Iterable[tuple[babeldoc.document_il.il_version_1.Page, np.ndarray]],
+        translate_config,
+        save_debug_image,
+    ) -> Generator[
+        tuple[babeldoc.document_il.il_version_1.Page, YoloResult], None, None
+    ]:
         """
+        Like handle_document, for pages which are rendered already.
+
+        items yields (page, image) with the BGR image of each page, as
+        rendered by get_no_rotation_img.
+        """
+        for page, image in items:
+            translate_config.raise_if_cancelled()
+            result = self.predict(image)[0]
+            save_debug_image(image, result, page.page_number + 1)
+            result.image_shape = image.shape[:2]
+            yield page, result
 
 
 class YoloBox:
@@ -106,8 +278,21 @@ os_name = platform.system()
 
 
 class OnnxModel(DocLayoutModel):
-    def __init__(self, model_path: str):
+    def __init__(
+        self,
+        model_path: str,
+        session_config: OnnxSessionConfig | None = None,
+        prefetch_pages: int = 2,
+    ):
         self.model_path = model_path
+        # number of pages rendered ahead of inference in handle_document
+        self.prefetch_pages = max(1, prefetch_pages)
+        if session_config is None:
+            session_config = OnnxSessionConfig()
+        self.session_config = session_config
+
+        onnxruntime = import_onnxruntime()
+        import onnx
 
         model = onnx.load(model_path)
         metadata = {d.key: d.value for d in model.metadata_props}
@@ -120,21 +305,37 @@ class OnnxModel(DocLayoutModel):
             if re.match(r"dml|cuda|cpu", provider, re.IGNORECASE):
                 logger.info(f"Available Provider: {provider}")
                 providers.append(provider)
+        logger.info(f"ONNX session options: {session_config}")
         self.model = onnxruntime.InferenceSession(
             model.SerializeToString(),
+            sess_options=session_config.create_session_options(providers),
             providers=providers,
         )
         self.lock = threading.Lock()
 
     @staticmethod
-    def from_pretrained():
-        pth = get_doclayout_onnx_model_path()
-        return OnnxModel(pth)
+    def from_pretrained(
+        session_config: OnnxSessionConfig | None = None, quantized: bool = False
+    ):
+        pth = get_doclayout_onnx_model_path(quantized)
+        return OnnxModel(pth, session_config)
 
     @property
     def stride(self):
         return self._stride
 
+    @functools.cached_property
+    def cache_identity(self) -> str:
+        hash_ = hashlib.sha256()
+        with Path(self.model_path).open("rb") as f:
+            while chunk := f.read(1024 * 1024):
+                hash_.update(chunk)
+        return f"onnx:{hash_.hexdigest()}"
+
+    @property
+    def cache_source(self) -> str:
+        return f"onnx:{Path(self.model_path).resolve()}"
+
     def resize_and_pad_image(self, image, new_shape):
         """
         Resize and pad the image to the specified size, ensuring dimensions are multiples of stride.
@@ -209,6 +410,13 @@ class OnnxModel(DocLayoutModel):
         boxes[..., :4] = (boxes[..., :4] - [pad_x, pad_y, pad_x, pad_y]) / gain
         return boxes
 
+    def preprocess(self, image, imgsz=1024):
+        """Resize, pad and normalize an HWC image into the CHW model input."""
+        pix = self.resize_and_pad_image(image, new_shape=imgsz)
+        pix = np.transpose(pix, (2, 0, 1))  # CHW
+        pix = pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
+        return pix
+
     def predict(self, image, imgsz=800, batch_size=16, **kwargs):
         """
         Predict the layout of document pages.
@@ -233,7 +441,6 @@ class OnnxModel(DocLayoutModel):
         # Process images in batches
         for i in range(0, total_images, batch_size):
             batch_images = image[i : i + batch_size]
-            batch_size_actual = len(batch_images)
 
             # Calculate target size based on the maximum height in the batch
             max_height = max(img.shape[0] for img in batch_images)
@@ -246,32 +453,51 @@ class OnnxModel(DocLayoutModel):
                 orig_h, orig_w = img.shape[:2]
                 orig_shapes.append((orig_h, orig_w))
 
-                pix = self.resize_and_pad_image(img, new_shape=target_imgsz)
-                pix = np.transpose(pix, (2, 0, 1))  # CHW
-                pix = pix.astype(np.float32) / 255.0  # Normalize to [0, 1]
-                processed_batch.append(pix)
+                processed_batch.append(self.preprocess(img, target_imgsz))
 
             # Stack batch
             batch_input = np.stack(processed_batch, axis=0)  # BCHW
-            new_h, new_w = batch_input.shape[2:]
-
-            # Run inference
-            batch_preds = self.model.run(None, {"images": batch_input})[0]
-
-            # Process each prediction in the batch
-            for j in range(batch_size_actual):
-                preds = batch_preds[j]
-                preds = preds[preds[..., 4] > 0.25]
-                if len(preds) > 0:
-                    preds[..., :4] = self.scale_boxes(
-                        (new_h, new_w),
-                        preds[..., :4],
-                        orig_shapes[j],
-                    )
-                results.append(YoloResult(boxes_data=preds, names=self._names))
+            results.extend(self.predict_preprocessed(batch_input, orig_shapes))
+
+        return results
+
+    def predict_preprocessed(self, batch_input, orig_shapes) -> list[YoloResult]:
+        """Run inference on a preprocessed BCHW batch, see preprocess."""
+        new_h, new_w = batch_input.shape[2:]
 
+        # Run inference
+        batch_preds = self.model.run(None, {"images": batch_input})[0]
+
+        # Process each prediction in the batch
+        results = []
+        for j in range(len(batch_input)):
+            preds = batch_preds[j]
+            preds = preds[preds[..., 4] > 0.25]
+            if len(preds) > 0:
+                preds[..., :4] = self.scale_boxes(
+                    (new_h, new_w),
+                    preds[..., :4],
+                    orig_shapes[j],
+                )
+            results.append(YoloResult(boxes_data=preds, names=self._names))
         return results
 
+    def prepare_page(self, page, mupdf_doc: pymupdf.Document):
+        """Render and preprocess a page.
+
+        Returns (pix, image, model input). image is a view of the pixmap
+        samples, pix must be kept alive as long as image is used.
+        """
+        with self.lock:
+            # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
+            pix = get_no_rotation_img(mupdf_doc[page.page_number])
+        image = np.frombuffer(pix.samples_mv, np.uint8).reshape(
+            pix.height,
+            pix.width,
+            3,
+        )[:, :, ::-1]
+        return pix, image, self.preprocess(image, 1024)
+
     def handle_document(
         self,
         pages: list[babeldoc.document_il.il_version_1.Page],
@@ -281,20 +507,66 @@ class OnnxModel(DocLayoutModel):
     ) -> Generator[
         tuple[babeldoc.document_il.il_version_1.Page, YoloResult], None, None
     ]:
-        for page in pages:
-            translate_config.raise_if_cancelled()
-            with self.lock:
-                # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
-                pix = get_no_rotation_img(mupdf_doc[page.page_number])
-            image = np.fromstring(pix.samples, np.uint8).reshape(
-                pix.height,
-                pix.width,
-                3,
-            )[:, :, ::-1]
-            predict_result = self.predict(image)[0]
-            save_debug_image(
-                image,
-                predict_result,
-                page.page_number + 1,
-            )
-            yield page, predict_result
+        yield from self._predict_prefetched(
+            pages,
+            lambda page: (page, *self.prepare_page(page, mupdf_doc)),
+            translate_config,
+            save_debug_image,
+        )
+
+    def handle_images(
+        self,
+        items: Iterable[tuple[babeldoc.document_il.il_version_1.Page, np.ndarray]],
+        translate_config,
+        save_debug_image,
+    ) -> Generator[
+        tuple[babeldoc.document_il.il_version_1.Page, YoloResult], None, None
+    ]:
+        yield from self._predict_prefetched(
+            items,
+            lambda item: (item[0], None, item[1], self.preprocess(item[1], 1024)),
+            translate_config,
+            save_debug_image,
+        )
+
+    def _predict_prefetched(
+        self, items: Iterable, prepare, translate_config, save_debug_image
+    ):
+        """Run prepare(item) -> (page, pix, image, model input) on a
+        background thread while the previous page is in InferenceSession.run.
+
+        At most prefetch_pages pages are prepared ahead, which bounds the
+        memory held.
+        """
+        prefetcher = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="doclayout-prefetch"
+        )
+        items = iter(items)
+        in_flight = collections.deque()
+
+        def prefetch():
+            while len(in_flight) < self.prefetch_pages:
+                item = next(items, None)
+                if item is None:
+                    return
+                in_flight.append(prefetcher.submit(prepare, item))
+
+        try:
+            prefetch()
+            while in_flight:
+                translate_config.raise_if_cancelled()
+                page, pix, image, model_input = in_flight.popleft().result()
+                prefetch()
+                predict_result = self.predict_preprocessed(
+                    model_input[None, ...], [image.shape[:2]]
+                )[0]
+                save_debug_image(
+                    image,
+                    predict_result,
+                    page.page_number + 1,
+                )
+                predict_result.image_shape = image.shape[:2]
+                del pix, image, model_input
+                yield page, predict_result
+        finally:
+            prefetcher.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import shutil
+from pathlib import Path
+
+import msgpack
+import numpy as np
+import orjson
+
+from babeldoc.const import CACHE_FOLDER
+from babeldoc.docvision.doclayout import YoloBox
+from babeldoc.docvision.doclayout import YoloResult
+
+logger = logging.getLogger(__name__)
+
+LAYOUT_CACHE_FORMAT_VERSION = 1
+
+
+def hash_page_image(pix) -> str:
+    """Hash of a rendered page (pymupdf Pixmap)."""
+    hash_ = hashlib.sha256()
+    hash_.update(f"{pix.width}x{pix.height}x{pix.n}:".encode())
+    hash_.update(pix.samples_mv)
+    return hash_.hexdigest()
+
+
+class LayoutCache:
+    """On-disk cache of layout detections, keyed by the hash of the rendered page.
+
+    Each model gets its own namespace derived from ``model.cache_identity``,
+    which changes whenever the model file changes. Namespaces left behind by
+    a previous version of the same model are removed.
+    """
+
+    def __init__(self, model, cache_dir: Path | None = None):
+        self.identity = model.cache_identity
+        self.source = model.cache_source
+        if cache_dir is None:
+            cache_dir = Path(CACHE_FOLDER) / "layout_cache"
+        namespace = hashlib.sha256(
+            f"{LAYOUT_CACHE_FORMAT_VERSION}:{self.identity}".encode()
+        ).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) / namespace
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        info = {"identity": self.identity, "source": self.source}
+        (self.cache_dir / "model.json").write_bytes(orjson.dumps(info))
+        self._discard_stale(Path(cache_dir))
+
+    def _discard_stale(self, root: Path):
+        for path in root.iterdir():
+            if path == self.cache_dir:
+                continue
+            try:
+                info = orjson.loads((path / "model.json").read_bytes())
+            except (OSError, orjson.JSONDecodeError):
+                continue
+            if info.get("source") == self.source:
+                logger.info(f"model {self.source} changed, discard layout cache")
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.msgpack"
+
+    def get(self, key: str) -> YoloResult | None:
+        path = self._path(key)
+        try:
+            data = msgpack.unpackb(path.read_bytes(), strict_map_key=False)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning(f"discard broken layout cache entry {path}", exc_info=True)
+            path.unlink(missing_ok=True)
+            return None
+        boxes = [
+            YoloBox(xyxy=box[:4], conf=np.array(box[4]), cls=box[5])
+            for box in data["boxes"]
+        ]
+        return YoloResult(names=data["names"], boxes=boxes)
+
+    def put(self, key: str, result: YoloResult):
+        names = result.names
+        if isinstance(names, list):
+            names = dict(enumerate(names))
+        data = {
+            "names": {int(k): v for k, v in names.items()},
+            "boxes": [
+                [
+                    *(float(x) for x in box.xyxy),
+                    float(box.conf),
+                    int(box.cls),
+                ]
+                for box in result.boxes
+            ],
+        }
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.tmp")
+        temp_path.write_bytes(msgpack.packb(data))
+        temp_path.replace(path)
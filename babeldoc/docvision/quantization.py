@@ -0,0 +1,133 @@
+"""Int8 quantization of the DocLayout-YOLO ONNX model.
+
+The quantized model is derived locally from the FP32 model. The hash of the
+source model is stored in the metadata of the output, so a quantized model
+that was produced from another FP32 model is detected and rebuilt.
+"""
+
+import hashlib
+import logging
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnxruntime.quantization import CalibrationDataReader
+from onnxruntime.quantization import QuantFormat
+from onnxruntime.quantization import QuantType
+from onnxruntime.quantization import quantize_dynamic
+from onnxruntime.quantization import quantize_static
+from onnxruntime.quantization.shape_inference import quant_pre_process
+
+logger = logging.getLogger(__name__)
+
+SOURCE_HASH_METADATA_KEY = "babeldoc_source_sha3_256"
+QUANTIZATION_METADATA_KEY = "babeldoc_quantization"
+
+
+def file_sha3_256(path: Path) -> str:
+    hash_ = hashlib.sha3_256()
+    with Path(path).open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+def get_quantized_model_source(path: Path) -> str | None:
+    """Return the hash of the FP32 model a quantized model was produced from."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        model = onnx.load(path, load_external_data=False)
+    except Exception:
+        logger.warning(f"failed to load quantized model {path}", exc_info=True)
+        return None
+    metadata = {d.key: d.value for d in model.metadata_props}
+    return metadata.get(SOURCE_HASH_METADATA_KEY)
+
+
+class _ImageCalibrationDataReader(CalibrationDataReader):
+    def __init__(self, input_name: str, images: Iterable[np.ndarray]):
+        self.input_name = input_name
+        self.images = iter(images)
+
+    def get_next(self):
+        image = next(self.images, None)
+        if image is None:
+            return None
+        return {self.input_name: image[None, ...]}
+
+
+def quantize_doclayout_model(
+    model_path: Path,
+    output_path: Path,
+    calibration_images: Iterable[np.ndarray] | None = None,
+    source_sha3_256: str | None = None,
+) -> Path:
+    """Quantize the layout model to int8.
+
+    Without calibration images the weights are quantized dynamically. With
+    calibration images (preprocessed CHW float32 pages, see
+    OnnxModel.preprocess) a static QDQ model is produced, which is usually
+    faster on CPU.
+    """
+    model_path = Path(model_path)
+    output_path = Path(output_path)
+    if source_sha3_256 is None:
+        source_sha3_256 = file_sha3_256(model_path)
+    source_model = onnx.load(model_path)
+    input_name = source_model.graph.input[0].name
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        prepared_path = Path(temp_dir) / "prepared.onnx"
+        quantized_path = Path(temp_dir) / "quantized.onnx"
+        try:
+            quant_pre_process(
+                str(model_path), str(prepared_path), skip_symbolic_shape=True
+            )
+        except Exception:
+            logger.warning(
+                "quantization pre-processing failed, quantize the model as is",
+                exc_info=True,
+            )
+            prepared_path = model_path
+
+        if calibration_images is None:
+            mode = "dynamic"
+            quantize_dynamic(
+                prepared_path,
+                quantized_path,
+                weight_type=QuantType.QUInt8,
+            )
+        else:
+            mode = "static"
+            quantize_static(
+                prepared_path,
+                quantized_path,
+                _ImageCalibrationDataReader(input_name, calibration_images),
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+            )
+
+        # keep stride/names etc. which OnnxModel reads from the metadata
+        quantized_model = onnx.load(quantized_path)
+        del quantized_model.metadata_props[:]
+        for prop in source_model.metadata_props:
+            if prop.key not in (SOURCE_HASH_METADATA_KEY, QUANTIZATION_METADATA_KEY):
+                quantized_model.metadata_props.add(key=prop.key, value=prop.value)
+        quantized_model.metadata_props.add(
+            key=SOURCE_HASH_METADATA_KEY, value=source_sha3_256
+        )
+        quantized_model.metadata_props.add(key=QUANTIZATION_METADATA_KEY, value=mode)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_output_path = output_path.with_name(f"{output_path.name}.tmp")
+        onnx.save(quantized_model, temp_output_path)
+        temp_output_path.replace(output_path)
+
+    logger.info(f"{mode} int8 layout model written to {output_path}")
+    return output_path
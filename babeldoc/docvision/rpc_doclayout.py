@@ -1,5 +1,8 @@
+import collections
 import logging
+import os
 import threading
+from collections.abc import Iterable
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
@@ -8,7 +11,7 @@ import httpx
 import msgpack
 import numpy as np
 import pymupdf
-from tenacity import retry
+from tenacity import Retrying
 from tenacity import retry_if_exception_type
 from tenacity import stop_after_attempt
 from tenacity import wait_exponential
@@ -43,37 +46,66 @@ def encode_image(image) -> bytes:
     return encoded
 
 
-@retry(
-    stop=stop_after_attempt(3),  # 最多重试 3 次
-    wait=wait_exponential(
-        multiplier=1, min=1, max=10
-    ),  # 指数退避策略，初始 1 秒，最大 10 秒
-    retry=retry_if_exception_type((httpx.HTTPError, Exception)),  # 针对哪些异常重试
-    before_sleep=lambda retry_state: logger.warning(
+def _log_retry(retry_state):
+    logger.warning(
         f"Request failed, retrying in {retry_state.next_action.sleep} seconds... "
-        f"(Attempt {retry_state.attempt_number}/3)"
-    ),
-)
-def predict_layout(
-    image,
-    host: str = "http://localhost:8000",
-    imgsz: int = 1024,
-):
-    """
-    Predict document layout using the MOSEC service
+        f"(Attempt {retry_state.attempt_number}/{retry_state.retry_object.stop.max_attempt_number})"
+    )
 
-    Args:
-        image: Can be either a file path (str) or numpy array
-        host: Service host URL
-        imgsz: Image size for model input
 
-    Returns:
-        List of predictions containing bounding boxes and classes
-    """
+def create_retrying(max_attempts: int = 3) -> Retrying:
+    return Retrying(
+        stop=stop_after_attempt(max_attempts),  # 最多重试 max_attempts 次
+        wait=wait_exponential(
+            multiplier=1, min=1, max=10
+        ),  # 指数退避策略，初始 1 秒，最大 10 秒
+        retry=retry_if_exception_type((httpx.HTTPError, Exception)),  # 针对哪些异常重试
+        before_sleep=_log_retry,
+        reraise=True,
+    )
+
+
+def create_client(
+    max_connections: int = 16,
+    max_keepalive_connections: int = 16,
+    timeout: float = 300,
+    connect_timeout: float = 10,
+) -> httpx.Client:
+    """Create a keep-alive HTTP client for the layout service."""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        ),
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        follow_redirects=True,
+        headers={
+            "Content-Type": "application/msgpack",
+            "Accept": "application/msgpack",
+        },
+    )
+
+
+_default_client: httpx.Client | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> httpx.Client:
+    """The client shared by predict_layout calls that do not pass their own."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = create_client()
+        return _default_client
+
+
+def _predict_layout_once(
+    image_data: list[bytes],
+    host: str,
+    imgsz: int,
+    client: httpx.Client,
+):
     # Prepare request data
-    if not isinstance(image, list):
-        image = [image]
-    image_data = [encode_image(image) for image in image]
     data = {
         "image": image_data,
         "imgsz": imgsz,
@@ -85,16 +117,7 @@ def predict_layout(
 
     # Send request
     # logger.debug(f"Sending request to {host}/inference")
-    response = httpx.post(
-        f"{host}/inference",
-        data=packed_data,
-        headers={
-            "Content-Type": "application/msgpack",
-            "Accept": "application/msgpack",
-        },
-        timeout=300,
-        follow_redirects=True,
-    )
+    response = client.post(f"{host}/inference", content=packed_data)
 
     # logger.debug(f"Response status: {response.status_code}")
     # logger.debug(f"Response headers: {response.headers}")
@@ -114,6 +137,52 @@ def predict_layout(
         )
 
 
+def predict_layout(
+    image,
+    host: str = "http://localhost:8000",
+    imgsz: int = 1024,
+    client: httpx.Client | None = None,
+    retrying: Retrying | None = None,
+):
+    """
+    Predict document layout using the MOSEC service
+
+    Args:
+        image: Can be either a file path (str) or numpy array
+        host: Service host URL
+        imgsz: Image size for model input
+        client: HTTP client to reuse, defaults to a shared keep-alive client
+        retrying: Retry policy, defaults to 3 attempts with exponential backoff
+
+    Returns:
+        List of predictions containing bounding boxes and classes
+    """
+    if not isinstance(image, list):
+        image = [image]
+    return predict_layout_encoded(
+        [encode_image(image) for image in image], host, imgsz, client, retrying
+    )
+
+
+def predict_layout_encoded(
+    image_data: list[bytes],
+    host: str = "http://localhost:8000",
+    imgsz: int = 1024,
+    client: httpx.Client | None = None,
+    retrying: Retrying | None = None,
+):
+    """Same as predict_layout, for images already encoded by encode_image.
+
+    All images are sent in one request, the service returns one prediction per
+    image in the same order.
+    """
+    if client is None:
+        client = get_default_client()
+    if retrying is None:
+        retrying = create_retrying()
+    return retrying(_predict_layout_once, image_data, host, imgsz, client)
+
+
 class ResultContainer:
     def __init__(self):
         self.result = YoloResult(boxes_data=np.array([]), names=[])
@@ -122,18 +191,61 @@ class ResultContainer:
 class RpcDocLayoutModel(DocLayoutModel):
     """DocLayoutModel implementation that uses RPC service."""
 
-    def __init__(self, host: str = "http://localhost:8000"):
-        """Initialize RPC model with host address."""
+    def __init__(
+        self,
+        host: str = "http://localhost:8000",
+        max_workers: int = 16,
+        max_connections: int = 16,
+        timeout: float = 300,
+        connect_timeout: float = 10,
+        max_attempts: int = 3,
+        max_batch_size: int = 8,
+        max_batch_bytes: int = 4 * 1024 * 1024,
+    ):
+        """Initialize RPC model with host address.
+
+        Args:
+            host: Service host URL
+            max_workers: Number of pages requested concurrently
+            max_connections: Size of the keep-alive connection pool
+            timeout: Timeout of a request in seconds
+            connect_timeout: Timeout of establishing a connection in seconds
+            max_attempts: Attempts per request, with exponential backoff
+            max_batch_size: Maximum number of pages sent in one request
+            max_batch_bytes: Pages are added to a request until their encoded
+                size reaches this limit, at least one page is always sent
+        """
         self.host = host
         self._stride = 32  # Default stride value
         self._names = ["text", "title", "list", "table", "figure"]
         self.lock = threading.Lock()
+        self.client = create_client(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            timeout=timeout,
+            connect_timeout=connect_timeout,
+        )
+        self.retrying = create_retrying(max_attempts)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_batch_size = max_batch_size
+        self.max_batch_bytes = max_batch_bytes
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.client.close()
 
     @property
     def stride(self) -> int:
         """Stride of the model input."""
         return self._stride
 
+    @property
+    def cache_identity(self) -> None:
+        # The service does not report which weights it serves, results can
+        # not be cached without reusing those of an older model
+        return None
+
     def resize_and_pad_image(self, image, new_shape):
         """
         Resize and pad the image to the specified size,
@@ -201,6 +313,59 @@ class RpcDocLayoutModel(DocLayoutModel):
         boxes = (boxes - [pad_x, pad_y, pad_x, pad_y]) / gain
         return boxes
 
+    def encode_page_image(self, image) -> bytes:
+        """Resize the image to the service input size and encode it."""
+        target_imgsz = (800, 800)
+        if image.shape[0] != target_imgsz[0] or image.shape[1] != target_imgsz[1]:
+            image = self.resize_and_pad_image(image, new_shape=target_imgsz)
+        return encode_image(image)
+
+    def decode_prediction(self, pred, orig_shape) -> YoloResult:
+        orig_h, orig_w = orig_shape
+        boxes = [
+            YoloBox(
+                None,
+                self.scale_boxes((800, 800), np.array(x["xyxy"]), (orig_h, orig_w)),
+                np.array(x["conf"]),
+                x["cls"],
+            )
+            for x in pred["boxes"]
+        ]
+        return YoloResult(
+            boxes=boxes,
+            names={int(k): v for k, v in pred["names"].items()},
+        )
+
+    def predict_batch(
+        self, image_data: list[bytes], orig_shapes: list[tuple[int, int]]
+    ) -> list[YoloResult]:
+        """Predict several encoded pages with one request."""
+        preds = predict_layout_encoded(
+            image_data,
+            host=self.host,
+            imgsz=800,
+            client=self.client,
+            retrying=self.retrying,
+        )
+        if len(image_data) == 1:
+            if len(preds) == 0:
+                return [ResultContainer().result]
+            return [self.decode_prediction(preds[-1], orig_shapes[0])]
+        if len(preds) != len(image_data):
+            logger.warning(
+                f"layout service returned {len(preds)} results for "
+                f"{len(image_data)} images, fall back to one page per request"
+            )
+            self.max_batch_size = 1
+            return [
+                self.predict_batch([data], [shape])[0]
+                for data, shape in zip(image_data, orig_shapes, strict=True)
+            ]
+        return [
+            self.decode_prediction(pred, shape)
+            for pred, shape in zip(preds, orig_shapes, strict=True)
+        ]
+
     def predict_image(
         self,
         image,
@@ -211,29 +376,8 @@ class RpcDocLayoutModel(DocLayoutModel):
         """Predict the layout of document pages using RPC service."""
         if result_container is None:
             result_container = ResultContainer()
-        target_imgsz = (800, 800)
-        orig_h, orig_w = image.shape[:2]
-        if image.shape[0] != target_imgsz[0] or image.shape[1] != target_imgsz[1]:
-            image = self.resize_and_pad_image(image, new_shape=target_imgsz)
-        preds = predict_layout([image], host=self.host, imgsz=800)
-
-        if len(preds) > 0:
-            for pred in preds:
-                boxes = [
-                    YoloBox(
-                        None,
-                        self.scale_boxes(
-                            (800, 800), np.array(x["xyxy"]), (orig_h, orig_w)
-                        ),
-                        np.array(x["conf"]),
-                        x["cls"],
-                    )
-                    for x in pred["boxes"]
-                ]
-                result_container.result = YoloResult(
-                    boxes=boxes,
-                    names={int(k): v for k, v in pred["names"].items()},
-                )
+        results = self.predict_batch([self.encode_page_image(image)], [image.shape[:2]])
+        result_container.result = results[0]
         return result_container.result
 
     def predict(self, image, imgsz=1024, **kwargs) -> list[YoloResult]:
@@ -242,15 +386,14 @@ class RpcDocLayoutModel(DocLayoutModel):
         if isinstance(image, np.ndarray) and len(image.shape) == 3:
             image = [image]
 
-        result_containers = [ResultContainer() for _ in image]
-        predict_thread = ThreadPoolExecutor(max_workers=len(image))
-        for img, result_container in zip(image, result_containers, strict=True):
-            predict_thread.submit(
-                self.predict_image, img, self.host, result_container, 800
-            )
-        predict_thread.shutdown(wait=True)
-        result = [result_container.result for result_container in result_containers]
-        return result
+        return list(self.executor.map(self._predict_image_or_empty, image))
+
+    def _predict_image_or_empty(self, image) -> YoloResult:
+        try:
+            return self.predict_image(image, self.host, None, 800)
+        except Exception:
+            logger.exception("Failed to predict layout")
+            return ResultContainer().result
 
     def predict_page(
         self, page, mupdf_doc: pymupdf.Document, translate_config, save_debug_image
@@ -259,7 +402,7 @@ class RpcDocLayoutModel(DocLayoutModel):
         with self.lock:
             # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
             pix = get_no_rotation_img(mupdf_doc[page.page_number])
-        image = np.fromstring(pix.samples, np.uint8).reshape(
+        image = np.frombuffer(pix.samples, np.uint8).reshape(
             pix.height,
             pix.width,
             3,
@@ -275,14 +418,91 @@ class RpcDocLayoutModel(DocLayoutModel):
         translate_config,
         save_debug_image,
     ):
-        with ThreadPoolExecutor(max_workers=16) as executor:
-            yield from executor.map(
-                self.predict_page,
-                pages,
-                (mupdf_doc for _ in range(len(pages))),
-                (translate_config for _ in range(len(pages))),
-                (save_debug_image for _ in range(len(pages))),
+        def render():
+            # Pages are rendered on this thread
+            for page in pages:
+                translate_config.raise_if_cancelled()
+                with self.lock:
+                    # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
+                    pix = get_no_rotation_img(mupdf_doc[page.page_number])
+                image = np.frombuffer(pix.samples, np.uint8).reshape(
+                    pix.height,
+                    pix.width,
+                    3,
+                )[:, :, ::-1]
+                yield page, image
+
+        yield from self.handle_images(render(), translate_config, save_debug_image)
+
+    def handle_images(
+        self,
+        items: Iterable[tuple[babeldoc.document_il.il_version_1.Page, np.ndarray]],
+        translate_config,
+        save_debug_image,
+    ):
+        # Pages are encoded on a small pool, up to encode_ahead pages ahead,
+        # so that the next batch is encoded while the previous requests are
+        # in flight. Pages are grouped into requests by their encoded size,
+        # at most max_workers requests are in flight at the same time.
+        encoder = ThreadPoolExecutor(
+            max_workers=min(4, os.cpu_count() or 1),
+            thread_name_prefix="rpc-doclayout-encode",
+        )
+        encode_ahead = 2 * self.max_batch_size
+        items = iter(items)
+        encoding = collections.deque()
+        in_flight = collections.deque()
+        batch = []
+        batch_bytes = 0
+
+        def encode_next():
+            while len(encoding) < encode_ahead:
+                item = next(items, None)
+                if item is None:
+                    return
+                page, image = item
+                encoding.append(
+                    (page, image, encoder.submit(self.encode_page_image, image))
+                )
+
+        def finish(future, batch):
+            for (page, image, _), result in zip(batch, future.result(), strict=True):
+                save_debug_image(image, result, page.page_number + 1)
+                result.image_shape = image.shape[:2]
+                yield page, result
+
+        def submit(batch):
+            future = self.executor.submit(
+                self.predict_batch,
+                [data for _, _, data in batch],
+                [image.shape[:2] for _, image, _ in batch],
             )
+            in_flight.append((future, batch))
+
+        try:
+            encode_next()
+            while encoding:
+                translate_config.raise_if_cancelled()
+                page, image, future = encoding.popleft()
+                data = future.result()
+                encode_next()
+                if batch and (
+                    len(batch) >= self.max_batch_size
+                    or batch_bytes + len(data) > self.max_batch_bytes
+                ):
+                    submit(batch)
+                    batch = []
+                    batch_bytes = 0
+                    while len(in_flight) >= self.max_workers:
+                        yield from finish(*in_flight.popleft())
+                batch.append((page, image, data))
+                batch_bytes += len(data)
+            if batch:
+                submit(batch)
+            while in_flight:
+                yield from finish(*in_flight.popleft())
+        finally:
+            encoder.shutdown(wait=True, cancel_futures=True)
 
     @staticmethod
     def from_host(host: str) -> "RpcDocLayoutModel":
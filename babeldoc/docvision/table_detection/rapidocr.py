@@ -1,12 +1,17 @@
+import contextlib
 import logging
+import os
+import queue
 import re
 import threading
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
 from babeldoc.assets.assets import get_table_detection_rapidocr_model_path
 from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
+from babeldoc.docvision.doclayout import OnnxSessionConfig
 from babeldoc.docvision.doclayout import YoloBox
 from babeldoc.docvision.doclayout import YoloResult
 from rapidocr_onnxruntime import RapidOCR
@@ -83,7 +88,34 @@ def create_yolo_result_from_nested_coords(nested_coords: np.ndarray, names: dict
 
 
 class RapidOCRModel:
-    def __init__(self):
+    def __init__(
+        self,
+        num_workers: int | None = None,
+        session_config: OnnxSessionConfig | None = None,
+    ):
+        """
+        Args:
+            num_workers: Number of pages processed concurrently, each with its own
+                OCR engine instance. Defaults to min(4, cpu count).
+            session_config: ONNX Runtime tuning. RapidOCR only accepts the thread
+                counts, counts left at 0 share the cpu cores between the engines.
+        """
+        cpu_count = os.cpu_count() or 1
+        if num_workers is None:
+            num_workers = min(4, cpu_count)
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.num_workers = num_workers
+        if session_config is None:
+            session_config = OnnxSessionConfig()
+        self.intra_op_num_threads, self.inter_op_num_threads = (
+            session_config.thread_counts(num_workers)
+        )
+        logger.info(
+            f"RapidOCR workers: {num_workers}, "
+            f"intra_op_num_threads: {self.intra_op_num_threads}, "
+            f"inter_op_num_threads: {self.inter_op_num_threads}"
+        )
         self.use_cuda = False
         self.use_dml = False
         available_providers = onnxruntime.get_available_providers()
@@ -93,13 +125,39 @@ class RapidOCRModel:
             elif re.match(r"cuda", provider, re.IGNORECASE):
                 self.use_cuda = True
         self.use_dml = False  # force disable directml
-        self.model = RapidOCR(
-            det_model_path=get_table_detection_rapidocr_model_path(),
+        self.model_path = get_table_detection_rapidocr_model_path()
+        self.model = self._create_engine()
+        # idle engines, more are created on demand up to num_workers
+        self.engines = queue.SimpleQueue()
+        self.engines.put(self.model)
+        self.engine_count = 1
+        self.engine_lock = threading.Lock()
+        self.names = {0: "table_text"}
+        self.lock = threading.Lock()
+
+    def _create_engine(self) -> RapidOCR:
+        return RapidOCR(
+            det_model_path=self.model_path,
             det_use_cuda=self.use_cuda,
             det_use_dml=self.use_dml,
+            intra_op_num_threads=self.intra_op_num_threads,
+            inter_op_num_threads=self.inter_op_num_threads,
         )
-        self.names = {0: "table_text"}
-        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _acquire_engine(self):
+        try:
+            engine = self.engines.get_nowait()
+        except queue.Empty:
+            with self.engine_lock:
+                create = self.engine_count < self.num_workers
+                if create:
+                    self.engine_count += 1
+            engine = self._create_engine() if create else self.engines.get()
+        try:
+            yield engine
+        finally:
+            self.engines.put(engine)
 
     @property
     def stride(self):
@@ -208,7 +266,8 @@ class RapidOCRModel:
         new_h, new_w = input_.shape[:2]
 
         # Run inference
-        preds = self.model(input_, use_det=True, use_cls=False, use_rec=False)
+        with self._acquire_engine() as engine:
+            preds = engine(input_, use_det=True, use_cls=False, use_rec=False)
 
         # Process each prediction in the batch
         if len(preds) > 0:
@@ -225,6 +284,38 @@ class RapidOCRModel:
             # Return empty YoloResult if no predictions
             return YoloResult(names=self.names, boxes=[])
 
+    def predict_page(
+        self, page, mupdf_doc: pymupdf.Document, translate_config, save_debug_image
+    ):
+        translate_config.raise_if_cancelled()
+        with self.lock:
+            # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
+            pix = get_no_rotation_img(mupdf_doc[page.page_number])
+        image = np.frombuffer(pix.samples, np.uint8).reshape(
+            pix.height,
+            pix.width,
+            3,
+        )[:, :, ::-1]
+
+        table_boxes = [
+            layout.box for layout in page.page_layout if layout.class_name == "table"
+        ]
+
+        predict_result = self.predict(image)
+
+        ok_boxes = self._filter_boxes_in_tables(
+            predict_result.boxes, table_boxes, image.shape[0]
+        )
+
+        yolo_result = YoloResult(names=self.names, boxes=ok_boxes)
+        yolo_result.image_shape = image.shape[:2]
+        save_debug_image(
+            image,
+            yolo_result,
+            page.page_number + 1,
+        )
+        return page, yolo_result
+
     def handle_document(
         self,
         pages: list[babeldoc.document_il.il_version_1.Page],
@@ -234,88 +325,66 @@ class RapidOCRModel:
     ) -> Generator[
         tuple[babeldoc.document_il.il_version_1.Page, YoloResult], None, None
     ]:
-        for page in pages:
-            translate_config.raise_if_cancelled()
-            with self.lock:
-                # pix = mupdf_doc[page.page_number].get_pixmap(dpi=72)
-                pix = get_no_rotation_img(mupdf_doc[page.page_number])
-            image = np.fromstring(pix.samples, np.uint8).reshape(
-                pix.height,
-                pix.width,
-                3,
-            )[:, :, ::-1]
-
-            table_boxes = []
-            for layout in page.page_layout:
-                if layout.class_name == "table":
-                    table_boxes.append(layout.box)
-
-            predict_result = self.predict(image)
-
-            ok_boxes = []
-            for box in predict_result.boxes:
-                # Convert the box coordinates to float for proper comparison
-                box_xyxy = [float(coord) for coord in box.xyxy]
-
-                # Check if this box is inside any of the table boxes
-                for table_box in table_boxes:
-                    # Determine if box is inside or overlapping with table_box with image dimensions
-                    if self._is_box_in_table(
-                        box_xyxy, table_box, page, image.shape[1], image.shape[0]
-                    ):
-                        ok_boxes.append(box)
-                        break
-
-            yolo_result = YoloResult(names=self.names, boxes=ok_boxes)
-            save_debug_image(
-                image,
-                yolo_result,
-                page.page_number + 1,
+        pages = list(pages)
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            # results are yielded in page order
+            yield from executor.map(
+                self.predict_page,
+                pages,
+                (mupdf_doc for _ in range(len(pages))),
+                (translate_config for _ in range(len(pages))),
+                (save_debug_image for _ in range(len(pages))),
             )
-            yield page, yolo_result
 
-    def _is_box_in_table(self, box_xyxy, table_box, page, img_width, img_height):
+    def _filter_boxes_in_tables(self, boxes, table_boxes, img_height):
         """
-        Check if a box from image coordinates is inside a table box from PDF coordinates.
+        Keep the boxes from image coordinates that are inside any table box from PDF coordinates.
 
         Args:
-            box_xyxy (list): Box coordinates in image coordinate system [x1, y1, x2, y2]
-            table_box (Box): Table box in PDF coordinate system
-            page: The page object containing information for coordinate conversion
-            img_width: Width of the image
+            boxes (list[YoloBox]): Detected boxes in image coordinate system
+            table_boxes (list[Box]): Table boxes in PDF coordinate system
             img_height: Height of the image
 
         Returns:
-            bool: True if the box is inside or significantly overlapping with the table box
+            list[YoloBox]: Boxes whose overlap with some table box is more than half of their area
         """
+        if not boxes or not table_boxes:
+            return []
+
+        boxes_xyxy = np.array([box.xyxy for box in boxes], dtype=np.float64)
+
+        # Convert table boxes to image coordinates
+        tables_xyxy = np.array(
+            [
+                (table.x, img_height - table.y2, table.x2, img_height - table.y)
+                for table in table_boxes
+            ],
+            dtype=np.float64,
+        )
 
-        # Get table box coordinates in PDF coordinate system
-        table_pdf_x1 = table_box.x
-        table_pdf_y1 = table_box.y
-        table_pdf_x2 = table_box.x2
-        table_pdf_y2 = table_box.y2
-
-        # Convert table box to image coordinates
-        table_img_x1 = table_pdf_x1
-        table_img_y1 = img_height - table_pdf_y2
-        table_img_x2 = table_pdf_x2
-        table_img_y2 = img_height - table_pdf_y1
-
-        # Now check for overlap between the boxes
-        # Calculate the area of overlap
-        x_overlap = max(
-            0, min(box_xyxy[2], table_img_x2) - max(box_xyxy[0], table_img_x1)
+        # Overlap of every box (rows) with every table (columns)
+        b = boxes_xyxy[:, None, :]
+        t = tables_xyxy[None, :, :]
+        x_overlap = np.maximum(
+            0, np.minimum(b[..., 2], t[..., 2]) - np.maximum(b[..., 0], t[..., 0])
         )
-        y_overlap = max(
-            0, min(box_xyxy[3], table_img_y2) - max(box_xyxy[1], table_img_y1)
+        y_overlap = np.maximum(
+            0, np.minimum(b[..., 3], t[..., 3]) - np.maximum(b[..., 1], t[..., 1])
         )
         overlap_area = x_overlap * y_overlap
 
-        # Calculate area of the detected box
-        box_area = (box_xyxy[2] - box_xyxy[0]) * (box_xyxy[3] - box_xyxy[1])
+        # Calculate area of the detected boxes
+        box_area = (boxes_xyxy[:, 2] - boxes_xyxy[:, 0]) * (
+            boxes_xyxy[:, 3] - boxes_xyxy[:, 1]
+        )
 
         # If overlap area is significant relative to the box area, consider it inside
-        if box_area > 0 and overlap_area / box_area > 0.5:
-            return True
-
-        return False
+        positive = box_area > 0
+        ratio = np.divide(
+            overlap_area,
+            box_area[:, None],
+            out=np.zeros_like(overlap_area),
+            where=positive[:, None],
+        )
+        inside = positive & (ratio > 0.5).any(axis=1)
+        return [box for box, ok in zip(boxes, inside, strict=True) if ok]
@@ -24,12 +24,14 @@ from pymupdf import Font
 
 from babeldoc import asynchronize
 from babeldoc.assets.assets import warmup
+from babeldoc.checkpoint_manager import CheckpointManager
 from babeldoc.const import CACHE_FOLDER
 from babeldoc.converter import TranslateConverter
 from babeldoc.document_il import il_version_1
 from babeldoc.document_il.backend.pdf_creater import SAVE_PDF_STAGE_NAME
 from babeldoc.document_il.backend.pdf_creater import SUBSET_FONT_STAGE_NAME
 from babeldoc.document_il.backend.pdf_creater import PDFCreater
+from babeldoc.document_il.backend.pdf_creater import PdfSaveTask
 from babeldoc.document_il.backend.pdf_creater import reproduce_cmap
 from babeldoc.document_il.frontend.il_creater import ILCreater
 from babeldoc.document_il.midend.add_debug_information import AddDebugInformation
@@ -42,7 +44,9 @@ from babeldoc.document_il.midend.styles_and_formulas import StylesAndFormulas
 from babeldoc.document_il.midend.table_parser import TableParser
 from babeldoc.document_il.midend.typesetting import Typesetting
 from babeldoc.document_il.utils.fontmap import FontMapper
+from babeldoc.document_il.xml_converter import JSON_DUMP_SUFFIX
 from babeldoc.document_il.xml_converter import XMLConverter
+from babeldoc.input_normalizer import normalize_input_file
 from babeldoc.pdfinterp import PDFPageInterpreterEx
 from babeldoc.progress_monitor import ProgressMonitor
 from babeldoc.result_merger import ResultMerger
@@ -80,6 +84,18 @@ TRANSLATE_STAGES = [
     (SAVE_PDF_STAGE_NAME, 6.34),  # Save PDF
 ]
 
+# Stages after which the IL can be persisted, see CheckpointManager
+CHECKPOINT_STAGES = [
+    ILCreater.stage_name,
+    DetectScannedFile.stage_name,
+    LayoutParser.stage_name,
+    TableParser.stage_name,
+    ParagraphFinder.stage_name,
+    StylesAndFormulas.stage_name,
+    ILTranslator.stage_name,
+    Typesetting.stage_name,
+]
+
 resfont_map = {
     "zh-cn": "china-ss",
     "zh-tw": "china-ts",
@@ -391,44 +407,6 @@ class MemoryMonitor:
             time.sleep(self.interval)
 
 
-def fix_null_xref(doc: Document) -> None:
-    """Fix null xref in PDF file by replacing them with empty arrays.
-
-    Args:
-        doc: PyMuPDF Document object to fix
-    """
-    for i in range(1, doc.xref_length()):
-        try:
-            obj = doc.xref_object(i)
-            if obj == "null":
-                doc.update_object(i, "[]")
-            elif obj and "/ASCII85Decode" in obj:  # make pdfminer happy
-                data = doc.xref_stream(i)
-                doc.update_stream(i, data)
-        except Exception:
-            doc.update_object(i, "[]")
-
-
-def fix_filter(doc):
-    page_contents = []
-    for page in doc:
-        page_contents.extend(page.get_contents())
-    for page_piece in page_contents:
-        f = doc.xref_get_key(page_piece, "Filter")
-        if f[0] == "xref":
-            data = doc.xref_stream(page_piece)
-            doc.update_stream(page_piece, data)
-
-    for page in doc:
-        contents = page.get_contents()
-        if len(contents) > 1:
-            page_streams = [doc.xref_stream(i) for i in contents]
-            r = doc.get_new_xref()
-            doc.update_object(r, "<<>>")
-            doc.update_stream(r, b" ".join(page_streams))
-            doc.xref_set_key(page.xref, "Contents", f"{r} 0 R")
-
-
 def do_translate(
     pm: ProgressMonitor, translation_config: TranslationConfig
 ) -> TranslateResult:
@@ -462,11 +440,11 @@ def do_translate(
                         pm.total_parts = len(split_points)
 
                         # Process parts serially
-                        results: dict[int, TranslateResult] = {}
                         original_watermark_mode = (
                             translation_config.watermark_output_mode
                         )
                         original_doc = Document(original_pdf_path)
+                        merger = ResultMerger(translation_config)
                         for i, split_point in enumerate(split_points):
                             try:
                                 # Create a copy of config for this part
@@ -486,6 +464,17 @@ def do_translate(
                                 part_config.page_ranges = [
                                     (x, x) for x in should_translate_pages
                                 ]
+                                if translation_config.debug_dump_page_ranges:
+                                    part_config.debug_dump_page_ranges = [
+                                        (page - split_point.start_page + 1,) * 2
+                                        for page in range(
+                                            split_point.start_page,
+                                            split_point.end_page + 1,
+                                        )
+                                        if translation_config.should_dump_debug_page(
+                                            page + 1
+                                        )
+                                    ]
 
                                 # Only first part should do scanned detection if enabled
                                 if i > 0:
@@ -510,6 +499,11 @@ def do_translate(
                                     )
                                 )
                                 part_config.input_file = part_temp_input_path
+                                part_config.split_part_source = (
+                                    original_pdf_path,
+                                    split_point.start_page,
+                                    split_point.end_page,
+                                )
 
                                 temp_doc = Document()
                                 for x in range(
@@ -550,10 +544,16 @@ def do_translate(
                                     part_monitor,
                                     part_config,
                                 )
-                                results[i] = result
+
+                                # Append the part to the merged output right
+                                # away, this removes the part output directory
+                                merger.add_result(i, result)
 
                             except Exception as e:
                                 logger.error(f"Error in part {i}: {e}")
+                                if translation_config.stage_checkpoint:
+                                    # the next run resumes the part
+                                    translation_config.keep_part_working_dir(i)
                                 pm.translate_error(e)
                                 raise
                             finally:
@@ -566,9 +566,8 @@ def do_translate(
                         )
 
                         # Merge results
-                        merger = ResultMerger(translation_config)
                         logger.info("start merge results")
-                        result = merger.merge_results(results)
+                        result = merger.merge_results()
                         logger.info("finish merge results")
             peak_memory_usage = memory_monitor.peak_memory_usage
 
@@ -603,31 +602,40 @@ def do_translate(
         translation_config.cleanup_temp_files()
 
 
-def fix_media_box(doc: Document) -> None:
-    mediabox_data = {}
-    for page in doc:
-        page_box_data = {}
-        mediabox = doc.xref_get_key(page.xref, "MediaBox")
-        if mediabox[0] == "null":
-            mediabox = ("array", "[0 0 612 792]")
-            doc.xref_set_key(page.xref, "MediaBox", mediabox[1])
-        if page.mediabox.x0 != 0 or page.mediabox.y0 != 0:
-            x0 = page.mediabox.x0
-            y0 = page.mediabox.y0
-            x1 = page.mediabox.x1
-            y1 = page.mediabox.y1
-            page_box_data["MediaBox"] = doc.xref_get_key(page.xref, "MediaBox")[1]
-            doc.xref_set_key(page.xref, "MediaBox", f"[0 0 {x1 - x0} {y1 - y0}]")
-        if page.cropbox.x0 != 0 or page.cropbox.y0 != 0:
-            x0 = page.cropbox.x0
-            y0 = page.cropbox.y0
-            x1 = page.cropbox.x1
-            y1 = page.cropbox.y1
-            page_box_data["CropBox"] = doc.xref_get_key(page.xref, "CropBox")[1]
-            doc.xref_set_key(page.xref, "CropBox", f"[0 0 {x1 - x0} {y1 - x0}]")
-        if page_box_data:
-            mediabox_data[page.number] = page_box_data
-    return mediabox_data
+# Stages whose IL is written to the working directory in debug mode
+DEBUG_IL_STAGES = (
+    "create_il",
+    "detect_scanned_file",
+    "layout_generator",
+    "table_parser",
+    "paragraph_finder",
+    "styles_and_formulas",
+    "il_translated",
+    "add_debug_information",
+    "typsetting",
+)
+
+
+def write_debug_il(
+    xml_converter: XMLConverter,
+    docs: il_version_1.Document,
+    translation_config: TranslationConfig,
+    stage: str,
+):
+    """Dump the IL after a stage in debug mode, see --debug-dump-stages and
+    --debug-dump-pages. Read the dump with babeldoc.tools.read_debug_dump."""
+    if not translation_config.should_dump_debug_il(stage):
+        return
+    path = translation_config.get_working_file_path(f"{stage}{JSON_DUMP_SUFFIX}")
+    logger.debug(f"dump {stage} IL to {path}")
+    xml_converter.write_json_dump(
+        docs,
+        path,
+        page_filter=lambda page: (
+            page.page_number is None
+            or translation_config.should_dump_debug_page(page.page_number + 1)
+        ),
+    )
 
 
 def _do_translate_single(
@@ -637,61 +645,46 @@ def _do_translate_single(
     """Original translation logic for a single document or part"""
     translation_config.progress_monitor = pm
     original_pdf_path = translation_config.input_file
+    temp_pdf_path = translation_config.get_working_file_path("input.pdf")
+    mediabox_data = normalize_input_file(
+        original_pdf_path, temp_pdf_path, translation_config.input_cache
+    )
     if translation_config.debug:
-        doc_input = Document(original_pdf_path)
         logger.debug("debug mode, save decompressed input pdf")
-        output_path = translation_config.get_working_file_path(
-            "input.decompressed.pdf",
+        doc_input = Document(temp_pdf_path)
+        doc_input.save(
+            translation_config.get_working_file_path("input.decompressed.pdf"),
+            expand=True,
+            pretty=True,
         )
-        # Fix null xref in PDF file
-        try:
-            fix_filter(doc_input)
-            fix_null_xref(doc_input)
-        except Exception:
-            logger.exception("auto fix failed, please check the pdf file")
-        doc_input.save(output_path, expand=True, pretty=True)
-        del doc_input
-
-    # Continue with original processing
-    temp_pdf_path = translation_config.get_working_file_path("input.pdf")
-    doc_pdf2zh = Document(original_pdf_path)
-    resfont = "china-ss"
-
-    # Fix null xref in PDF file
-    try:
-        fix_filter(doc_pdf2zh)
-        fix_null_xref(doc_pdf2zh)
-    except Exception:
-        logger.exception("auto fix failed, please check the pdf file")
-
-    mediabox_data = fix_media_box(doc_pdf2zh)
-
-    # for page in doc_pdf2zh:
-    #     page.insert_font(resfont, None)
+        doc_input.close()
 
+    doc_pdf2zh = Document(temp_pdf_path)
     resfont = None
-    doc_pdf2zh.save(temp_pdf_path)
-    il_creater = ILCreater(translation_config)
-    il_creater.mupdf = doc_pdf2zh
     xml_converter = XMLConverter()
-    logger.debug(f"start parse il from {temp_pdf_path}")
-    with Path(temp_pdf_path).open("rb") as f:
-        start_parse_il(
-            f,
-            doc_zh=doc_pdf2zh,
-            resfont=resfont,
-            il_creater=il_creater,
-            translation_config=translation_config,
-        )
-    logger.debug(f"finish parse il from {temp_pdf_path}")
-    docs = il_creater.create_il()
-    logger.debug(f"finish create il from {temp_pdf_path}")
-    del il_creater
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("create_il.debug.json"),
-        )
+    checkpoint = CheckpointManager(translation_config, CHECKPOINT_STAGES)
+    _, docs = checkpoint.load()
+
+    if checkpoint.is_completed(ILCreater.stage_name):
+        checkpoint.skip_stage(ILCreater.stage_name)
+    else:
+        il_creater = ILCreater(translation_config)
+        il_creater.mupdf = doc_pdf2zh
+        logger.debug(f"start parse il from {temp_pdf_path}")
+        with Path(temp_pdf_path).open("rb") as f:
+            start_parse_il(
+                f,
+                doc_zh=doc_pdf2zh,
+                resfont=resfont,
+                il_creater=il_creater,
+                translation_config=translation_config,
+            )
+        logger.debug(f"finish parse il from {temp_pdf_path}")
+        docs = il_creater.create_il()
+        logger.debug(f"finish create il from {temp_pdf_path}")
+        del il_creater
+        write_debug_il(xml_converter, docs, translation_config, "create_il")
+        checkpoint.save(ILCreater.stage_name, docs)
 
     # Rest of the original translation logic...
     # [Previous implementation of do_translate continues here]
@@ -699,180 +692,221 @@ def _do_translate_single(
     # 检测是否为扫描文件
     if translation_config.skip_scanned_detection:
         logger.debug("skipping scanned file detection")
+    elif checkpoint.is_completed(DetectScannedFile.stage_name):
+        checkpoint.skip_stage(DetectScannedFile.stage_name)
     else:
         logger.debug("start detect scanned file")
         DetectScannedFile(translation_config).process(docs)
         logger.debug("finish detect scanned file")
-        if translation_config.debug:
-            xml_converter.write_json(
-                docs,
-                translation_config.get_working_file_path("detect_scanned_file.json"),
-            )
+        write_debug_il(xml_converter, docs, translation_config, "detect_scanned_file")
+        checkpoint.save(DetectScannedFile.stage_name, docs)
 
     # Generate layouts for all pages
-    logger.debug("start generating layouts")
-    docs = LayoutParser(translation_config).process(docs, doc_pdf2zh)
-    logger.debug("finish generating layouts")
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("layout_generator.json"),
-        )
-
-    if translation_config.table_model:
+    if checkpoint.is_completed(LayoutParser.stage_name):
+        checkpoint.skip_stage(LayoutParser.stage_name)
+    else:
+        logger.debug("start generating layouts")
+        docs = LayoutParser(translation_config).process(docs, doc_pdf2zh)
+        logger.debug("finish generating layouts")
+        write_debug_il(xml_converter, docs, translation_config, "layout_generator")
+        checkpoint.save(LayoutParser.stage_name, docs)
+
+    if not translation_config.table_model:
+        pass
+    elif checkpoint.is_completed(TableParser.stage_name):
+        checkpoint.skip_stage(TableParser.stage_name)
+    else:
         docs = TableParser(translation_config).process(docs, doc_pdf2zh)
         logger.debug("finish table parser")
-        if translation_config.debug:
-            xml_converter.write_json(
-                docs,
-                translation_config.get_working_file_path("table_parser.json"),
-            )
-    ParagraphFinder(translation_config).process(docs)
-    logger.debug(f"finish paragraph finder from {temp_pdf_path}")
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("paragraph_finder.json"),
-        )
-    StylesAndFormulas(translation_config).process(docs)
-    logger.debug(f"finish styles and formulas from {temp_pdf_path}")
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("styles_and_formulas.json"),
-        )
+        write_debug_il(xml_converter, docs, translation_config, "table_parser")
+        checkpoint.save(TableParser.stage_name, docs)
 
-    translate_engine = translation_config.translator
+    if checkpoint.is_completed(ParagraphFinder.stage_name):
+        checkpoint.skip_stage(ParagraphFinder.stage_name)
+    else:
+        ParagraphFinder(translation_config).process(docs)
+        logger.debug(f"finish paragraph finder from {temp_pdf_path}")
+        write_debug_il(xml_converter, docs, translation_config, "paragraph_finder")
+        checkpoint.save(ParagraphFinder.stage_name, docs)
 
-    support_llm_translate = False
-    try:
-        if translate_engine and hasattr(translate_engine, "do_llm_translate"):
-            translate_engine.do_llm_translate(None)
-            support_llm_translate = True
-    except NotImplementedError:
-        support_llm_translate = False
-    if support_llm_translate:
-        il_translator = ILTranslatorLLMOnly(translate_engine, translation_config)
+    if checkpoint.is_completed(StylesAndFormulas.stage_name):
+        checkpoint.skip_stage(StylesAndFormulas.stage_name)
     else:
-        il_translator = ILTranslator(translate_engine, translation_config)
+        StylesAndFormulas(translation_config).process(docs)
+        logger.debug(f"finish styles and formulas from {temp_pdf_path}")
+        write_debug_il(xml_converter, docs, translation_config, "styles_and_formulas")
+        checkpoint.save(StylesAndFormulas.stage_name, docs)
 
-    il_translator.translate(docs)
-    del il_translator
-    logger.debug(f"finish ILTranslator from {temp_pdf_path}")
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("il_translated.json"),
-        )
+    if checkpoint.is_completed(ILTranslator.stage_name):
+        checkpoint.skip_stage(ILTranslator.stage_name)
+    else:
+        translate_engine = translation_config.translator
 
-    if translation_config.debug:
-        AddDebugInformation(translation_config).process(docs)
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("add_debug_information.json"),
+        support_llm_translate = False
+        try:
+            if translate_engine and hasattr(translate_engine, "do_llm_translate"):
+                translate_engine.do_llm_translate(None)
+                support_llm_translate = True
+        except NotImplementedError:
+            support_llm_translate = False
+        if support_llm_translate:
+            il_translator = ILTranslatorLLMOnly(translate_engine, translation_config)
+        else:
+            il_translator = ILTranslator(translate_engine, translation_config)
+
+        il_translator.translate(docs)
+        del il_translator
+        logger.debug(f"finish ILTranslator from {temp_pdf_path}")
+        write_debug_il(xml_converter, docs, translation_config, "il_translated")
+
+        if translation_config.debug:
+            AddDebugInformation(translation_config).process(docs)
+            write_debug_il(
+                xml_converter, docs, translation_config, "add_debug_information"
+            )
+        checkpoint.save(ILTranslator.stage_name, docs)
+
+    typesetting = None
+    if checkpoint.is_completed(Typesetting.stage_name):
+        checkpoint.skip_stage(Typesetting.stage_name)
+    else:
+        typesetting = Typesetting(translation_config)
+        typesetting.typsetting_document(docs)
+        logger.debug(f"finish typsetting from {temp_pdf_path}")
+        write_debug_il(xml_converter, docs, translation_config, "typsetting")
+        checkpoint.save(Typesetting.stage_name, docs)
+
+    # the watermark is typeset on its own and drawn over the typeset first page
+    watermark = None
+    try:
+        if translation_config.watermark_output_mode == WatermarkOutputMode.Both:
+            if not docs.page or docs.page[0].page_number != 0:
+                raise ValueError("the first page is not translated")
+            if typesetting is None:
+                typesetting = Typesetting(translation_config)
+            watermark = typesetting.typeset_watermark(docs.page[0])
+    except Exception:
+        logger.warning(
+            "Failed to generate watermark for first page, using no watermark"
         )
+        translation_config.watermark_output_mode = WatermarkOutputMode.NoWatermark
+    del typesetting
+
+    pdf_creater = PDFCreater(
+        temp_pdf_path, docs, translation_config, mediabox_data, watermark
+    )
+    result = pdf_creater.write(translation_config)
     mono_watermark_first_page_doc_bytes = None
     dual_watermark_first_page_doc_bytes = None
     try:
-        if translation_config.watermark_output_mode == WatermarkOutputMode.Both:
-            mono_watermark_first_page_doc_bytes, dual_watermark_first_page_doc_bytes = (
-                generate_first_page_with_watermark(
-                    doc_pdf2zh, translation_config, docs, mediabox_data
-                )
-            )
+        if watermark is not None:
+            (
+                mono_watermark_first_page_doc_bytes,
+                dual_watermark_first_page_doc_bytes,
+            ) = generate_first_page_with_watermark(pdf_creater, translation_config)
     except Exception:
         logger.warning(
             "Failed to generate watermark for first page, using no watermark"
         )
-        translation_config.watermark_output_mode = WatermarkOutputMode.NoWatermark
         mono_watermark_first_page_doc_bytes = None
         dual_watermark_first_page_doc_bytes = None
-
-    Typesetting(translation_config).typsetting_document(docs)
-    logger.debug(f"finish typsetting from {temp_pdf_path}")
-    if translation_config.debug:
-        xml_converter.write_json(
-            docs,
-            translation_config.get_working_file_path("typsetting.json"),
-        )
-
-    pdf_creater = PDFCreater(temp_pdf_path, docs, translation_config, mediabox_data)
-    result = pdf_creater.write(translation_config)
+    # the watermarked mono and dual outputs are saved at the same time
+    mono_watermark = None
+    dual_watermark = None
     try:
         if mono_watermark_first_page_doc_bytes:
-            mono_watermark_pdf = merge_watermark_doc(
+            mono_watermark = start_merge_watermark_doc(
                 result.mono_pdf_path,
                 mono_watermark_first_page_doc_bytes,
                 translation_config,
+                tag="watermark_mono",
             )
-            result.mono_pdf_path = mono_watermark_pdf
     except Exception:
         result.mono_pdf_path = result.no_watermark_mono_pdf_path
     try:
         if dual_watermark_first_page_doc_bytes:
-            dual_watermark_pdf = merge_watermark_doc(
+            dual_watermark = start_merge_watermark_doc(
                 result.dual_pdf_path,
                 dual_watermark_first_page_doc_bytes,
                 translation_config,
+                tag="watermark_dual",
             )
+    except Exception:
+        result.dual_pdf_path = result.no_watermark_dual_pdf_path
+    try:
+        if mono_watermark:
+            mono_watermark_pdf, save_task = mono_watermark
+            save_task.wait()
+            result.mono_pdf_path = mono_watermark_pdf
+    except Exception:
+        result.mono_pdf_path = result.no_watermark_mono_pdf_path
+    try:
+        if dual_watermark:
+            dual_watermark_pdf, save_task = dual_watermark
+            save_task.wait()
             result.dual_pdf_path = dual_watermark_pdf
     except Exception:
         result.dual_pdf_path = result.no_watermark_dual_pdf_path
 
     result.original_pdf_path = translation_config.input_file
+    checkpoint.clear()
 
     return result
 
 
 def generate_first_page_with_watermark(
-    mupdf: Document,
+    pdf_creater: PDFCreater,
     translation_config: TranslationConfig,
-    doc_il: il_version_1.Document,
-    mediabox_data: dict[int, Any] | None = None,
 ) -> (io.BytesIO, io.BytesIO):
-    first_page_doc = Document()
-    first_page_doc.insert_pdf(mupdf, from_page=0, to_page=0)
-
-    il_only_first_page_doc = il_version_1.Document()
-    il_only_first_page_doc.total_pages = 1
-    il_only_first_page_doc.page = [copy.deepcopy(doc_il.page[0])]
+    """Build the watermarked first page of the mono and dual outputs.
 
-    watermarked_config = copy.copy(translation_config)
-    watermarked_config.watermark_output_mode = WatermarkOutputMode.Watermarked
-    try:
-        watermarked_config.progress_monitor.disable = True
-        watermarked_temp_pdf_path = watermarked_config.get_working_file_path(
-            "watermarked_temp_input.pdf"
+    The page is a copy of the typeset first page of pdf_creater with the
+    watermark drawn over it, see PDFCreater.create_watermarked_first_page.
+    """
+    first_page_doc = pdf_creater.watermarked_first_page
+    if first_page_doc is None:
+        raise ValueError("watermarked first page not found")
+    if not translation_config.skip_clean:
+        first_page_doc = PDFCreater.subset_fonts_in_subprocess(
+            first_page_doc, translation_config, tag="watermark"
         )
-        first_page_doc.save(watermarked_temp_pdf_path)
-
-        Typesetting(watermarked_config).typsetting_document(il_only_first_page_doc)
-        pdf_creater = PDFCreater(
-            watermarked_temp_pdf_path.as_posix(),
-            il_only_first_page_doc,
-            watermarked_config,
-            mediabox_data,
+    save_options = {
+        "garbage": 1,
+        "deflate": True,
+        "clean": not translation_config.skip_clean,
+        "deflate_fonts": True,
+    }
+
+    mono_pdf_bytes = None
+    dual_pdf_bytes = None
+    if not translation_config.no_mono:
+        mono_pdf_bytes = io.BytesIO(first_page_doc.tobytes(**save_options))
+
+    if not translation_config.no_dual:
+        original_first_page_doc = Document()
+        original_first_page_doc.insert_pdf(
+            Document(pdf_creater.original_pdf_path), from_page=0, to_page=0
         )
-        result = pdf_creater.write(watermarked_config)
-        mono_pdf_bytes = None
-        dual_pdf_bytes = None
-        if result.mono_pdf_path:
-            mono_pdf_bytes = io.BytesIO()
-            with Path(result.mono_pdf_path).open("rb") as f:
-                mono_pdf_bytes.write(f.read())
-            result.mono_pdf_path.unlink()
-            mono_pdf_bytes.seek(0)
-
-        if result.dual_pdf_path:
-            dual_pdf_bytes = io.BytesIO()
-            with Path(result.dual_pdf_path).open("rb") as f:
-                dual_pdf_bytes.write(f.read())
-            result.dual_pdf_path.unlink()
-            dual_pdf_bytes.seek(0)
-
-        return mono_pdf_bytes, dual_pdf_bytes
-    finally:
-        watermarked_config.progress_monitor.disable = False
+        if translation_config.use_alternating_pages_dual:
+            original_first_page_path = translation_config.get_working_file_path(
+                "watermarked_temp_input.pdf"
+            )
+            original_first_page_doc.save(original_first_page_path)
+            dual = pdf_creater.create_alternating_pages_dual_pdf(
+                original_first_page_path.as_posix(),
+                first_page_doc,
+                translation_config,
+            )
+        else:
+            dual = pdf_creater.create_side_by_side_dual_pdf(
+                original_first_page_doc,
+                first_page_doc,
+                "",
+                translation_config,
+            )
+        dual_pdf_bytes = io.BytesIO(dual.tobytes(**save_options))
+
+    return mono_pdf_bytes, dual_pdf_bytes
 
 
 def merge_watermark_doc(
@@ -880,6 +914,22 @@ def merge_watermark_doc(
     watermark_first_page_pdf_bytes: io.BytesIO,
     translation_config: TranslationConfig,
 ) -> pathlib.PosixPath:
+    new_save_path, save_task = start_merge_watermark_doc(
+        no_watermark_pdf_path,
+        watermark_first_page_pdf_bytes,
+        translation_config,
+    )
+    save_task.wait()
+    return new_save_path
+
+
+def start_merge_watermark_doc(
+    no_watermark_pdf_path: pathlib.PosixPath,
+    watermark_first_page_pdf_bytes: io.BytesIO,
+    translation_config: TranslationConfig,
+    tag: str = "",
+) -> tuple[pathlib.PosixPath, PdfSaveTask]:
+    """Like merge_watermark_doc, but returns the running save task."""
     if not no_watermark_pdf_path.exists():
         raise FileNotFoundError(
             f"no_watermark_pdf_path not found: {no_watermark_pdf_path}"
@@ -901,13 +951,14 @@ def merge_watermark_doc(
         no_watermark_pdf_path.name.replace(".no_watermark", "")
     )
 
-    PDFCreater.save_pdf_with_timeout(
+    save_task = PdfSaveTask(
         no_watermark_pdf,
         new_save_path.as_posix(),
         translation_config=translation_config,
         clean=not translation_config.skip_clean,
+        tag=tag,
     )
-    return new_save_path
+    return new_save_path, save_task
 
 
 def download_font_assets():
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import orjson
+from pymupdf import Document
+
+from babeldoc.const import CACHE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+# Bump when normalize_pdf changes its output
+INPUT_NORMALIZER_VERSION = 2
+# Normalized inputs are kept until the cache grows beyond this size
+INPUT_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+def _fix_object(doc: Document, xref: int):
+    """Replace a null object by an empty array and re-encode ASCII85 streams."""
+    try:
+        obj = doc.xref_object(xref, compressed=True)
+        if obj == "null":
+            doc.update_object(xref, "[]")
+        elif "/ASCII85Decode" in obj:  # make pdfminer happy
+            doc.update_stream(xref, doc.xref_stream(xref))
+    except Exception:
+        doc.update_object(xref, "[]")
+
+
+def _fix_page_contents(doc: Document, page):
+    """Merge the content streams of a page into one stream which pdfminer can
+    decode. A single stream is only re-encoded if its filter is an indirect
+    object."""
+    contents = page.get_contents()
+    if len(contents) > 1:
+        page_streams = [doc.xref_stream(i) for i in contents]
+        r = doc.get_new_xref()
+        doc.update_object(r, "<<>>")
+        doc.update_stream(r, b" ".join(page_streams))
+        doc.xref_set_key(page.xref, "Contents", f"{r} 0 R")
+    elif contents and doc.xref_get_key(contents[0], "Filter")[0] == "xref":
+        doc.update_stream(contents[0], doc.xref_stream(contents[0]))
+
+
+def _fix_page_boxes(doc: Document, page) -> dict:
+    """Move MediaBox and CropBox to the origin, returns the original boxes."""
+    page_box_data = {}
+    mediabox = doc.xref_get_key(page.xref, "MediaBox")
+    if mediabox[0] == "null":
+        mediabox = ("array", "[0 0 612 792]")
+        doc.xref_set_key(page.xref, "MediaBox", mediabox[1])
+    # The boxes are computed on every access
+    x0, y0, x1, y1 = page.mediabox
+    if x0 != 0 or y0 != 0:
+        page_box_data["MediaBox"] = doc.xref_get_key(page.xref, "MediaBox")[1]
+        doc.xref_set_key(page.xref, "MediaBox", f"[0 0 {x1 - x0} {y1 - y0}]")
+    # The crop box depends on the media box, read it after the media box is fixed
+    x0, y0, x1, y1 = page.cropbox
+    if x0 != 0 or y0 != 0:
+        page_box_data["CropBox"] = doc.xref_get_key(page.xref, "CropBox")[1]
+        doc.xref_set_key(page.xref, "CropBox", f"[0 0 {x1 - x0} {y1 - x0}]")
+    return page_box_data
+
+
+def normalize_pdf(doc: Document) -> dict[int, dict[str, str]]:
+    """Fix a PDF in place so that pdfminer can parse it.
+
+    - null objects are replaced by empty arrays
+    - ASCII85 streams and content streams with a filter chain are re-encoded
+    - the content streams of a page are merged into one
+    - MediaBox and CropBox are moved to the origin
+
+    Returns the original boxes by page number, to be restored by PDFCreater.
+    """
+    try:
+        # Objects created below are already fixed
+        for xref in range(1, doc.xref_length()):
+            _fix_object(doc, xref)
+    except Exception:
+        logger.exception("auto fix failed, please check the pdf file")
+
+    mediabox_data = {}
+    for page in doc:
+        try:
+            _fix_page_contents(doc, page)
+        except Exception:
+            logger.exception(
+                f"auto fix of page {page.number} failed, please check the pdf file"
+            )
+        page_box_data = _fix_page_boxes(doc, page)
+        if page_box_data:
+            mediabox_data[page.number] = page_box_data
+    return mediabox_data
+
+
+def _link_or_copy(src: Path, dst: Path):
+    """Hard link dst to src, or copy it if linking is not possible.
+
+    dst is removed first, so that writing to an old dst never changes src.
+    """
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def hash_file(path: str | Path) -> str:
+    hash_ = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hash_.update(chunk)
+    return hash_.hexdigest()
+
+
+class NormalizedInputCache:
+    """On-disk cache of normalized input PDFs, keyed by the hash of the input.
+
+    Each entry is the normalized PDF and a json file with the original page
+    boxes. The least recently used entries are removed when the cache grows
+    beyond max_bytes. Files are hard linked into and out of the cache where
+    possible, so they must be replaced rather than modified in place.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path | None = None,
+        max_bytes: int = INPUT_CACHE_MAX_BYTES,
+    ):
+        if cache_dir is None:
+            cache_dir = Path(CACHE_FOLDER) / "normalized_input"
+        self.cache_dir = Path(cache_dir) / f"v{INPUT_NORMALIZER_VERSION}"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def _paths(self, key: str) -> tuple[Path, Path]:
+        return self.cache_dir / f"{key}.pdf", self.cache_dir / f"{key}.json"
+
+    def get(self, key: str, output_path: Path) -> dict[int, dict[str, str]] | None:
+        """Link the cached PDF to output_path and return the page boxes."""
+        pdf_path, info_path = self._paths(key)
+        try:
+            mediabox_data = orjson.loads(info_path.read_bytes())
+            _link_or_copy(pdf_path, output_path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning(
+                f"discard broken input cache entry {pdf_path}", exc_info=True
+            )
+            pdf_path.unlink(missing_ok=True)
+            info_path.unlink(missing_ok=True)
+            return None
+        os.utime(info_path)
+        return {int(k): v for k, v in mediabox_data.items()}
+
+    def put(self, key: str, pdf_path: Path, mediabox_data: dict):
+        cached_pdf_path, info_path = self._paths(key)
+        temp_path = cached_pdf_path.with_name(f"{cached_pdf_path.name}.tmp")
+        _link_or_copy(pdf_path, temp_path)
+        temp_path.replace(cached_pdf_path)
+        # The json file is written last, an entry without it is incomplete
+        info_path.write_bytes(
+            orjson.dumps({str(k): v for k, v in mediabox_data.items()})
+        )
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for info_path in self.cache_dir.glob("*.json"):
+            pdf_path = info_path.with_suffix(".pdf")
+            try:
+                size = pdf_path.stat().st_size + info_path.stat().st_size
+                mtime = info_path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            entries.append((mtime, pdf_path, info_path, size))
+            total += size
+        for _, pdf_path, info_path, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.debug(f"remove normalized input {pdf_path} from cache")
+            info_path.unlink(missing_ok=True)
+            pdf_path.unlink(missing_ok=True)
+            total -= size
+
+
+def _normalize(input_path: str | Path, output_path: Path) -> dict:
+    doc = Document(input_path)
+    try:
+        mediabox_data = normalize_pdf(doc)
+        # output_path may be linked to a cache entry
+        Path(output_path).unlink(missing_ok=True)
+        doc.save(output_path)
+    finally:
+        doc.close()
+    return mediabox_data
+
+
+def normalize_input_file(
+    input_path: str | Path, output_path: Path, use_cache: bool = True
+) -> dict[int, dict[str, str]]:
+    """Normalize input_path with normalize_pdf and save it to output_path.
+
+    The input is opened and saved once. If use_cache is set, the result is
+    reused for inputs with the same content.
+    """
+    if not use_cache:
+        return _normalize(input_path, output_path)
+
+    try:
+        cache = NormalizedInputCache()
+        key = hash_file(input_path)
+    except OSError:
+        logger.warning("input cache is not available", exc_info=True)
+        return _normalize(input_path, output_path)
+
+    mediabox_data = cache.get(key, output_path)
+    if mediabox_data is not None:
+        logger.info(f"reuse normalized input {key[:16]} from cache")
+        return mediabox_data
+
+    mediabox_data = _normalize(input_path, output_path)
+    try:
+        cache.put(key, output_path, mediabox_data)
+    except OSError:
+        logger.warning("failed to cache normalized input", exc_info=True)
+    return mediabox_data
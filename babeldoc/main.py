@@ -17,8 +17,7 @@ import babeldoc.high_level
 from babeldoc.document_il.translator.translator import OpenAITranslator
 from babeldoc.document_il.translator.translator import set_translate_rate_limiter
 from babeldoc.docvision.doclayout import DocLayoutModel
-from babeldoc.docvision.rpc_doclayout import RpcDocLayoutModel
-from babeldoc.docvision.table_detection.rapidocr import RapidOCRModel
+from babeldoc.docvision.doclayout import OnnxSessionConfig
 from babeldoc.translation_config import TranslationConfig
 from babeldoc.translation_config import WatermarkOutputMode
 
@@ -51,6 +50,18 @@ def create_parser():
         action="store_true",
         help="Use debug logging level.",
     )
+    parser.add_argument(
+        "--debug-dump-stages",
+        default=None,
+        help="Comma separated stages whose IL is dumped in debug mode, "
+        f"default all of: {','.join(babeldoc.high_level.DEBUG_IL_STAGES)}",
+    )
+    parser.add_argument(
+        "--debug-dump-pages",
+        default=None,
+        help="Pages included in the IL dumps of debug mode, like --pages. "
+        "Default all pages.",
+    )
     parser.add_argument(
         "--warmup",
         action="store_true",
@@ -60,6 +71,25 @@ def create_parser():
         "--rpc-doclayout",
         help="RPC service host address for document layout analysis",
     )
+    parser.add_argument(
+        "--doclayout-int8",
+        action="store_true",
+        default=False,
+        help="Use the int8 quantized layout model, faster on CPU. "
+        "It is quantized from the default model on first use.",
+    )
+    parser.add_argument(
+        "--no-layout-cache",
+        action="store_true",
+        default=False,
+        help="Do not reuse cached layout detections of pages seen before.",
+    )
+    parser.add_argument(
+        "--no-input-cache",
+        action="store_true",
+        default=False,
+        help="Do not reuse the normalized input PDF of a file seen before.",
+    )
     parser.add_argument(
         "--generate-offline-assets",
         default=None,
@@ -203,6 +233,13 @@ def create_parser():
         default=False,
         help="Translate table text (experimental)",
     )
+    translation_group.add_argument(
+        "--table-ocr-workers",
+        type=int,
+        default=None,
+        help="Number of pages OCRed concurrently when translating table text. "
+        "Defaults to min(4, cpu count).",
+    )
     translation_group.add_argument(
         "--show-char-box",
         action="store_true",
@@ -221,11 +258,59 @@ def create_parser():
         default=False,
         help="Add text fill background (experimental)",
     )
+    translation_group.add_argument(
+        "--stage-checkpoint",
+        action="store_true",
+        default=False,
+        help="Save the intermediate representation after each stage into the working directory and resume from it when the same job is re-run (use with --working-dir)",
+    )
     translation_group.add_argument(
         "--custom-system-prompt",
         help="Custom system prompt for translation.",
         default=None,
     )
+    onnx_group = parser.add_argument_group(
+        "ONNX Runtime",
+        description="Session options of the layout and table OCR models",
+    )
+    onnx_group.add_argument(
+        "--onnx-intra-op-threads",
+        type=int,
+        default=0,
+        help="Threads used inside one operator. 0 shares the CPU cores between "
+        "the ONNX sessions that run at the same time.",
+    )
+    onnx_group.add_argument(
+        "--onnx-inter-op-threads",
+        type=int,
+        default=0,
+        help="Threads used across operators in parallel execution mode. "
+        "0 uses half of the CPU cores of a session.",
+    )
+    onnx_group.add_argument(
+        "--onnx-graph-optimization-level",
+        choices=list(OnnxSessionConfig.GRAPH_OPTIMIZATION_LEVELS),
+        default="all",
+        help="Graph optimization level.",
+    )
+    onnx_group.add_argument(
+        "--onnx-disable-cpu-mem-arena",
+        action="store_true",
+        default=False,
+        help="Disable the CPU memory arena, lowers peak memory usage.",
+    )
+    onnx_group.add_argument(
+        "--onnx-disable-mem-pattern",
+        action="store_true",
+        default=False,
+        help="Disable memory pattern optimization.",
+    )
+    onnx_group.add_argument(
+        "--onnx-execution-mode",
+        choices=list(OnnxSessionConfig.EXECUTION_MODES),
+        default="sequential",
+        help="Execution mode of the ONNX Runtime session.",
+    )
     # service option argument group
     service_group = translation_group.add_mutually_exclusive_group()
     service_group.add_argument(
@@ -281,6 +366,15 @@ async def main():
         logger.info("Warmup completed, exiting...")
         return
 
+    debug_dump_stages = None
+    if args.debug_dump_stages:
+        debug_dump_stages = [x.strip() for x in args.debug_dump_stages.split(",")]
+        unknown_stages = set(debug_dump_stages) - set(
+            babeldoc.high_level.DEBUG_IL_STAGES
+        )
+        if unknown_stages:
+            parser.error(f"未知的 debug 导出阶段：{', '.join(sorted(unknown_stages))}")
+
     # 验证翻译服务选择
     if not args.openai:
         parser.error("必须选择一个翻译服务：--openai")
@@ -305,14 +399,33 @@ async def main():
     # 设置翻译速率限制
     set_translate_rate_limiter(args.qps)
 
+    onnx_session_config = OnnxSessionConfig(
+        intra_op_num_threads=args.onnx_intra_op_threads,
+        inter_op_num_threads=args.onnx_inter_op_threads,
+        graph_optimization_level=args.onnx_graph_optimization_level,
+        enable_cpu_mem_arena=not args.onnx_disable_cpu_mem_arena,
+        enable_mem_pattern=not args.onnx_disable_mem_pattern,
+        execution_mode=args.onnx_execution_mode,
+    )
+
     # 初始化文档布局模型
     if args.rpc_doclayout:
+        from babeldoc.docvision.rpc_doclayout import RpcDocLayoutModel
+
         doc_layout_model = RpcDocLayoutModel(host=args.rpc_doclayout)
     else:
-        doc_layout_model = DocLayoutModel.load_onnx()
+        doc_layout_model = DocLayoutModel.load_onnx(
+            onnx_session_config, quantized=args.doclayout_int8
+        )
 
     if args.translate_table_text:
-        table_model = RapidOCRModel()
+        # rapidocr takes a while to import
+        from babeldoc.docvision.table_detection.rapidocr import RapidOCRModel
+
+        table_model = RapidOCRModel(
+            num_workers=args.table_ocr_workers,
+            session_config=onnx_session_config,
+        )
     else:
         table_model = None
 
@@ -411,6 +524,13 @@ async def main():
             ocr_workaround=args.ocr_workaround,
             custom_system_prompt=args.custom_system_prompt,
             working_dir=working_dir,
+            stage_checkpoint=args.stage_checkpoint,
+            onnx_session_config=onnx_session_config,
+            doc_layout_quantized=args.doclayout_int8,
+            layout_cache=not args.no_layout_cache,
+            input_cache=not args.no_input_cache,
+            debug_dump_stages=debug_dump_stages,
+            debug_dump_pages=args.debug_dump_pages,
         )
 
         # Create progress handler
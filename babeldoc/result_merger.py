@@ -1,94 +1,247 @@
+import hashlib
 import logging
+import re
 from pathlib import Path
 
 from pymupdf import Document
 
 from babeldoc.document_il.backend.pdf_creater import PDFCreater
+from babeldoc.document_il.backend.pdf_creater import PdfSaveTask
 from babeldoc.translation_config import TranslateResult
 from babeldoc.translation_config import TranslationConfig
 
 logger = logging.getLogger(__name__)
 
+PDF_REFERENCE_PATTERN = re.compile(r"(?<![\w.])(\d+) 0 R\b")
+SHARED_OBJECT_PATTERN = re.compile(
+    r"/Type\s*/(Font|FontDescriptor)\b|/Subtype\s*/Image\b"
+)
+
+# (result attribute, pdf type, no watermark)
+OUTPUT_KINDS = {
+    "mono": ("mono_pdf_path", "mono", False),
+    "dual": ("dual_pdf_path", "dual", False),
+    "no_watermark_mono": ("no_watermark_mono_pdf_path", "mono", True),
+    "no_watermark_dual": ("no_watermark_dual_pdf_path", "dual", True),
+}
+
+
+def deduplicate_objects(doc: Document, start_xref: int, seen: dict[str, int]):
+    """Replace fonts and images with xref >= start_xref by identical objects
+    registered in seen.
+
+    Fonts, images and the objects they reference are compared by content,
+    after replacing the references to objects that were deduplicated
+    already. New objects are added to seen.
+    """
+    end_xref = doc.xref_length()
+    texts = {}
+    for xref in range(start_xref, end_xref):
+        try:
+            texts[xref] = doc.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+
+    def references(text: str) -> list[int]:
+        return [
+            xref
+            for xref in map(int, PDF_REFERENCE_PATTERN.findall(text))
+            if xref in texts
+        ]
+
+    def replace_references(text: str) -> str:
+        return PDF_REFERENCE_PATTERN.sub(
+            lambda m: f"{remap.get(int(m.group(1)), int(m.group(1)))} 0 R", text
+        )
+
+    # Fonts and images with everything they reference
+    shared = set()
+    stack = [xref for xref, text in texts.items() if SHARED_OBJECT_PATTERN.search(text)]
+    while stack:
+        xref = stack.pop()
+        if xref in shared:
+            continue
+        shared.add(xref)
+        stack.extend(references(texts[xref]))
+
+    remap = {}
+    done = set()
+    in_progress = set()
+
+    def resolve(xref: int) -> bool:
+        """Deduplicate xref and the objects it references, depth first.
+        Returns False for objects in a reference cycle, which are kept."""
+        if xref in done:
+            return True
+        if xref in in_progress:
+            return False
+        in_progress.add(xref)
+        children_ok = True
+        for child in references(texts[xref]):
+            if child in shared and not resolve(child):
+                children_ok = False
+        in_progress.discard(xref)
+        done.add(xref)
+        if not children_ok:
+            return False
+        hash_ = hashlib.sha256(replace_references(texts[xref]).encode())
+        if doc.xref_is_stream(xref):
+            hash_.update(b"\0stream\0")
+            hash_.update(doc.xref_stream_raw(xref))
+        existing = seen.setdefault(hash_.hexdigest(), xref)
+        if existing != xref:
+            remap[xref] = existing
+        return True
+
+    for xref in sorted(shared):
+        resolve(xref)
+    if not remap:
+        return
+
+    for xref, text in texts.items():
+        if xref in remap or not PDF_REFERENCE_PATTERN.search(text):
+            continue
+        if not any(ref in remap for ref in references(text)):
+            continue
+        if not doc.xref_is_stream(xref):
+            doc.update_object(xref, replace_references(text))
+            continue
+        # update_object drops the stream data, update the keys instead
+        for key in doc.xref_get_keys(xref):
+            value = doc.xref_get_key(xref, key)[1]
+            new_value = replace_references(value)
+            if new_value != value:
+                doc.xref_set_key(xref, key, new_value)
+    for xref in remap:
+        doc.update_object(xref, "null")
+    logger.debug(f"deduplicated {len(remap)} objects")
+
+
+class _MergedPdf:
+    """A merged output, parts are appended as they finish."""
+
+    def __init__(self):
+        self.doc = Document()
+        self.seen = {}
+
+    def append(self, pdf: Document):
+        start_xref = self.doc.xref_length()
+        self.doc.insert_pdf(pdf)
+        try:
+            deduplicate_objects(self.doc, start_xref, self.seen)
+        except Exception:
+            logger.warning("Failed to deduplicate merged objects", exc_info=True)
+
 
 class ResultMerger:
-    """Handles merging of split translation results"""
+    """Handles merging of split translation results
+
+    Results can be added with add_result as soon as a part finishes, each
+    part is then appended right away. The output directory of a part is
+    removed once the part is appended, the paths of an appended result must
+    not be used anymore. merge_results adds the remaining parts, subsets the
+    fonts of the merged files and saves them.
+
+    Parts are written without font subsetting, so the fonts embedded by
+    BabelDOC are identical in all parts and deduplicated when appending.
+    Each font is then subset once over the glyphs of the whole document.
+    """
 
     def __init__(self, translation_config: TranslationConfig):
         self.config = translation_config
+        self._merged: dict[str, _MergedPdf] = {}
+        self._added_parts: set[int] = set()
+        self._pending: dict[int, TranslateResult] = {}
+        self._next_part = 0
+        self._has_watermark_variant = False
+        self._total_seconds = 0
 
-    def merge_results(self, results: dict[int, TranslateResult]) -> TranslateResult:
-        """Merge multiple translation results into one"""
-        if not results:
-            raise ValueError("No results to merge")
+    def add_result(self, part_index: int, result: TranslateResult):
+        """Append the outputs of a finished part. Parts are appended in order,
+        a part that finishes early is kept until the previous ones are added."""
+        self._pending[part_index] = result
+        while self._next_part in self._pending:
+            self._append_part(self._next_part)
+            self._next_part += 1
 
-        basename = Path(self.config.input_file).stem
-        debug_suffix = ".debug" if self.config.debug else ""
+    def _append_part(self, part_index: int):
+        result = self._pending.pop(part_index)
+        self._append_result(result)
+        self._added_parts.add(part_index)
+        self._total_seconds += getattr(result, "total_seconds", 0)
+        self.config.cleanup_part_output_dir(part_index)
 
-        mono_file_name = f"{basename}{debug_suffix}.{self.config.lang_out}.mono.pdf"
-        dual_file_name = f"{basename}{debug_suffix}.{self.config.lang_out}.dual.pdf"
+    def _append_result(self, result: TranslateResult):
+        if (
+            result.dual_pdf_path != result.no_watermark_dual_pdf_path
+            or result.mono_pdf_path != result.no_watermark_mono_pdf_path
+        ) and not self._has_watermark_variant:
+            self._has_watermark_variant = True
+            # Until now both variants were the same
+            for kind in ("mono", "dual"):
+                if kind in self._merged:
+                    merged = _MergedPdf()
+                    merged.append(self._merged[kind].doc)
+                    self._merged[f"no_watermark_{kind}"] = merged
 
-        debug_suffix += ".no_watermark"
+        for kind, (attribute, _, no_watermark) in OUTPUT_KINDS.items():
+            if no_watermark and not self._has_watermark_variant:
+                continue
+            pdf_path = getattr(result, attribute, None)
+            if pdf_path:
+                self._merge_pdfs(pdf_path, kind)
 
-        mono_file_name_no_watermark = (
-            f"{basename}{debug_suffix}.{self.config.lang_out}.mono.pdf"
-        )
-        dual_file_name_no_watermark = (
-            f"{basename}{debug_suffix}.{self.config.lang_out}.dual.pdf"
-        )
+    def _merge_pdfs(self, pdf_path: str | Path, kind: str):
+        """Append one part to the merged output"""
+        # the part output directory is removed next
+        with Document(str(pdf_path)) as doc:
+            self._merged.setdefault(kind, _MergedPdf()).append(doc)
 
-        # Sort results by part index
-        sorted_results = dict(sorted(results.items()))
-        first_result = next(iter(sorted_results.values()))
-
-        # Initialize paths for merged files
-        merged_mono_path = None
-        merged_dual_path = None
-        merged_no_watermark_mono_path = None
-        merged_no_watermark_dual_path = None
-
-        # Merge monolingual PDFs if they exist
-        if any(r.mono_pdf_path for r in results.values()):
-            merged_mono_path = self._merge_pdfs(
-                [r.mono_pdf_path for r in sorted_results.values() if r.mono_pdf_path],
-                mono_file_name,
-                tag="merged_mono",
-            )
-
-        # Merge dual-language PDFs if they exist
-        if any(r.dual_pdf_path for r in results.values()):
-            merged_dual_path = self._merge_pdfs(
-                [r.dual_pdf_path for r in sorted_results.values() if r.dual_pdf_path],
-                dual_file_name,
-                tag="merged_dual",
-            )
-
-        if any(
-            r.dual_pdf_path != r.no_watermark_dual_pdf_path
-            or r.mono_pdf_path != r.no_watermark_mono_pdf_path
-            for r in results.values()
-        ):
-            # Merge no-watermark PDFs if they exist
-            if any(r.no_watermark_mono_pdf_path for r in results.values()):
-                merged_no_watermark_mono_path = self._merge_pdfs(
-                    [
-                        r.no_watermark_mono_pdf_path
-                        for r in sorted_results.values()
-                        if r.no_watermark_mono_pdf_path
-                    ],
-                    mono_file_name_no_watermark,
-                    tag="merged_no_watermark_mono",
-                )
+    def merge_results(
+        self, results: dict[int, TranslateResult] | None = None
+    ) -> TranslateResult:
+        """Merge the added results and results into one"""
+        # Add parts which were not added with add_result, in order
+        for part_index, result in (results or {}).items():
+            if part_index not in self._added_parts:
+                self._pending[part_index] = result
+        for part_index in sorted(self._pending):
+            self._append_part(part_index)
+        if not self._added_parts:
+            raise ValueError("No results to merge")
 
-            if any(r.no_watermark_dual_pdf_path for r in results.values()):
-                merged_no_watermark_dual_path = self._merge_pdfs(
-                    [
-                        r.no_watermark_dual_pdf_path
-                        for r in sorted_results.values()
-                        if r.no_watermark_dual_pdf_path
-                    ],
-                    "merged_no_watermark_dual.pdf",
-                    tag="merged_no_watermark_dual",
+        # A merged file is saved while the next one is subset
+        save_tasks = {}
+        try:
+            for kind, merged in self._merged.items():
+                self.config.raise_if_cancelled()
+                _, pdf_type, no_watermark = OUTPUT_KINDS[kind]
+                output_path = self.config.get_output_file_path(
+                    self.config.get_output_file_name(pdf_type, no_watermark)
+                )
+                doc = PDFCreater.subset_fonts_in_subprocess(
+                    merged.doc, self.config, tag=f"merged_{kind}"
+                )
+                save_tasks[kind] = (
+                    output_path,
+                    PdfSaveTask(
+                        doc,
+                        str(output_path),
+                        self.config,
+                        tag=f"merged_{kind}",
+                    ),
                 )
+            merged_paths = {}
+            for kind, (output_path, save_task) in save_tasks.items():
+                save_task.wait()
+                merged_paths[kind] = output_path
+        finally:
+            for _, save_task in save_tasks.values():
+                save_task.cancel()
+        merged_mono_path = merged_paths.get("mono")
+        merged_dual_path = merged_paths.get("dual")
+        merged_no_watermark_mono_path = merged_paths.get("no_watermark_mono")
+        merged_no_watermark_dual_path = merged_paths.get("no_watermark_dual")
 
         # Create merged result
         merged_result = TranslateResult(
@@ -108,33 +261,6 @@ class ResultMerger:
         elif merged_result.dual_pdf_path is None:
             merged_result.dual_pdf_path = merged_no_watermark_dual_path
 
-        # Calculate total time
-        total_time = sum(
-            r.total_seconds for r in results.values() if hasattr(r, "total_seconds")
-        )
-        merged_result.total_seconds = total_time
+        merged_result.total_seconds = self._total_seconds
 
         return merged_result
-
-    def _merge_pdfs(
-        self, pdf_paths: list[str | Path], output_name: str, tag: str
-    ) -> Path:
-        """Merge multiple PDFs into one"""
-        if not pdf_paths:
-            return None
-
-        output_path = self.config.get_output_file_path(output_name)
-        merged_doc = Document()
-
-        for pdf_path in pdf_paths:
-            doc = Document(str(pdf_path))
-            merged_doc.insert_pdf(doc)
-
-        merged_doc = PDFCreater.subset_fonts_in_subprocess(
-            merged_doc, self.config, tag=tag
-        )
-        PDFCreater.save_pdf_with_timeout(
-            merged_doc, str(output_path), translation_config=self.config
-        )
-
-        return output_path
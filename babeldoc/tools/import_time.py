@@ -0,0 +1,70 @@
+"""Show the modules which take the longest to import.
+
+Usage: python -m babeldoc.tools.import_time babeldoc.main --top 20
+
+The module is imported in a fresh interpreter with `python -X importtime`.
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+def measure_import_time(module: str) -> list[tuple[str, int, int]]:
+    """Import module in a new interpreter, returns (module, self us, cumulative
+    us) for every imported module."""
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        if not self_us.strip().isdigit():
+            # header
+            continue
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the modules which take the longest to import"
+    )
+    parser.add_argument(
+        "module", nargs="?", default="babeldoc.main", help="Module to import"
+    )
+    parser.add_argument(
+        "--top", "-n", type=int, default=30, help="Number of modules to show"
+    )
+    parser.add_argument(
+        "--self",
+        action="store_true",
+        help="Sort by the time spent in the module itself, without its imports",
+    )
+    args = parser.parse_args()
+
+    try:
+        timings = measure_import_time(args.module)
+    except subprocess.CalledProcessError as e:
+        print(e.stderr, file=sys.stderr)
+        return 1
+
+    key = 1 if args.self else 2
+    total = next((t[2] for t in timings if t[0] == args.module), None)
+    if total is not None:
+        print(f"import {args.module}: {total / 1000:.1f} ms")
+    print(f"{'self ms':>9} {'cumulative ms':>14}  module")
+    for name, self_us, cumulative_us in sorted(
+        timings, key=lambda t: t[key], reverse=True
+    )[: args.top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:14.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
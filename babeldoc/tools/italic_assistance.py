@@ -3,21 +3,23 @@ import json
 import re
 from pathlib import Path
 
-import orjson
 from babeldoc.const import CACHE_FOLDER
+from babeldoc.document_il.xml_converter import JSON_DUMP_SUFFIX
+from babeldoc.document_il.xml_converter import XMLConverter
 
 WORKING_FOLDER = Path(CACHE_FOLDER) / "working"
 
 
 def find_latest_il_json() -> Path | None:
     """
-    Find the latest il_translated.json file in ~/.cache/babeldoc/ subdirectories.
+    Find the latest il_translated.json(.zst) file in ~/.cache/babeldoc/ subdirectories.
 
     Returns:
-        Path to the most recently modified il_translated.json file, or None if not found.
+        Path to the most recently modified il_translated.json(.zst) file, or None if not found.
     """
     base_dir = Path(WORKING_FOLDER)
     json_files = list(base_dir.glob("*/il_translated.json"))
+    json_files.extend(base_dir.glob(f"*/il_translated{JSON_DUMP_SUFFIX}"))
 
     if not json_files:
         return None
@@ -119,15 +121,14 @@ def find_fonts_by_debug_id(json_path: Path, debug_id_regex: str) -> dict[str, st
     Find all fonts used in paragraphs with matching debug_id.
 
     Args:
-        json_path: Path to the il_translated.json file
+        json_path: Path to the il_translated.json(.zst) file
         debug_id_regex: Regular expression to match debug_id values
 
     Returns:
         Dictionary mapping font_ids to font names
     """
     # Load and parse JSON
-    with json_path.open("rb") as f:
-        doc_data = orjson.loads(f.read())
+    doc_data = XMLConverter().read_json_dump(json_path)
 
     # Compile regex pattern (case insensitive)
     pattern = re.compile(debug_id_regex.strip(" \"'"), re.IGNORECASE)
@@ -165,7 +166,7 @@ def main():
     )
     parser.add_argument(
         "--json-path",
-        help="Path to il_translated.json (if not provided, will use the latest file)",
+        help="Path to il_translated.json(.zst) (if not provided, will use the latest file)",
     )
 
     args = parser.parse_args()
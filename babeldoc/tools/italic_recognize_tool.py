@@ -1,9 +1,9 @@
 # Identify non-formula italic fonts that were incorrectly classified as formulas in BableDOC translation results (intermediate)
 
-import json
 
 import babeldoc.tools.italic_assistance as italic_assistance
 from babeldoc.document_il.midend.styles_and_formulas import StylesAndFormulas
+from babeldoc.document_il.xml_converter import XMLConverter
 from babeldoc.translation_config import TranslationConfig
 from rich.console import Console
 from rich.table import Table
@@ -15,8 +15,7 @@ json_path = italic_assistance.find_latest_il_json()
 fonts = []
 
 # Read intermediate representation
-with json_path.open(encoding="utf-8") as f:
-    pdf_data = json.load(f)
+pdf_data = XMLConverter().read_json_dump(json_path)
 
 for page_index, page in enumerate(pdf_data["page"]):
     for paragraph_index, paragraph_content in enumerate(page["pdf_paragraph"]):
@@ -0,0 +1,194 @@
+# Produce the int8 quantized DocLayout-YOLO model and compare its detections with the FP32 model
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pymupdf
+from babeldoc.assets.assets import DOCLAYOUT_INT8_ONNX_MODEL_NAME
+from babeldoc.assets.assets import get_doclayout_onnx_model_path
+from babeldoc.assets.embedding_assets_metadata import (
+    DOCLAYOUT_YOLO_DOCSTRUCTBENCH_IMGSZ1024ONNX_SHA3_256,
+)
+from babeldoc.const import get_cache_file_path
+from babeldoc.document_il.utils.mupdf_helper import get_no_rotation_img
+from babeldoc.docvision.doclayout import OnnxModel
+from babeldoc.docvision.quantization import quantize_doclayout_model
+from rich.console import Console
+from rich.table import Table
+
+EXAMPLES_FOLDER = Path(__file__).parents[2] / "examples"
+
+console = Console()
+
+
+def render_pages(pdf_files: list[Path], max_pages: int):
+    """Yield (name, HWC BGR image) for up to max_pages pages."""
+    count = 0
+    for pdf_file in pdf_files:
+        with pymupdf.open(pdf_file) as doc:
+            for page in doc:
+                if count >= max_pages:
+                    return
+                pix = get_no_rotation_img(page)
+                image = np.frombuffer(pix.samples, np.uint8).reshape(
+                    pix.height,
+                    pix.width,
+                    3,
+                )[:, :, ::-1]
+                count += 1
+                yield f"{pdf_file.name}#{page.number + 1}", image
+
+
+def box_iou(box1, box2) -> float:
+    x1 = max(box1[0], box2[0])
+    y1 = max(box1[1], box2[1])
+    x2 = min(box1[2], box2[2])
+    y2 = min(box1[3], box2[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    union = area1 + area2 - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_detections(reference, candidate, iou_threshold: float):
+    """Greedily match boxes of the same class, returns the IoU of each match."""
+    ious = []
+    used = set()
+    for ref in reference.boxes:
+        best, best_iou = None, iou_threshold
+        for i, box in enumerate(candidate.boxes):
+            if i in used or int(box.cls) != int(ref.cls):
+                continue
+            iou = box_iou(ref.xyxy, box.xyxy)
+            if iou >= best_iou:
+                best, best_iou = i, iou
+        if best is not None:
+            used.add(best)
+            ious.append(best_iou)
+    return ious
+
+
+def compare(fp32_model, int8_model, pages, iou_threshold: float):
+    table = Table(title="FP32 vs int8 layout detections")
+    table.add_column("Page", style="cyan")
+    table.add_column("FP32 boxes", justify="right")
+    table.add_column("int8 boxes", justify="right")
+    table.add_column("Matched", justify="right")
+    table.add_column("Mean IoU", justify="right")
+    table.add_column("FP32 ms", justify="right")
+    table.add_column("int8 ms", justify="right")
+
+    total_ref = total_matched = 0
+    fp32_time = int8_time = 0.0
+    for name, image in pages:
+        start = time.perf_counter()
+        reference = fp32_model.predict(image)[0]
+        fp32_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        candidate = int8_model.predict(image)[0]
+        int8_elapsed = time.perf_counter() - start
+
+        ious = match_detections(reference, candidate, iou_threshold)
+        total_ref += len(reference.boxes)
+        total_matched += len(ious)
+        fp32_time += fp32_elapsed
+        int8_time += int8_elapsed
+        table.add_row(
+            name,
+            str(len(reference.boxes)),
+            str(len(candidate.boxes)),
+            str(len(ious)),
+            f"{np.mean(ious):.3f}" if ious else "-",
+            f"{fp32_elapsed * 1000:.0f}",
+            f"{int8_elapsed * 1000:.0f}",
+        )
+
+    console.print(table)
+    if total_ref:
+        console.print(
+            f"matched {total_matched}/{total_ref} FP32 boxes "
+            f"({total_matched / total_ref:.1%}) at IoU >= {iou_threshold}"
+        )
+    if int8_time:
+        console.print(f"speedup: {fp32_time / int8_time:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Quantize the layout model to int8 and compare detections."
+    )
+    parser.add_argument(
+        "pdf_files",
+        nargs="*",
+        type=Path,
+        help="PDF files used for calibration and comparison. "
+        "Defaults to the PDFs in examples/.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Output path, defaults to the model cache used by --doclayout-int8.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=["static", "dynamic"],
+        default="static",
+        help="static calibrates activations on the given pages, "
+        "dynamic only quantizes weights.",
+    )
+    parser.add_argument(
+        "--calibration-pages",
+        type=int,
+        default=32,
+        help="Maximum number of pages used for calibration.",
+    )
+    parser.add_argument(
+        "--compare-pages",
+        type=int,
+        default=16,
+        help="Maximum number of pages used for comparison, 0 to skip.",
+    )
+    parser.add_argument("--iou-threshold", type=float, default=0.5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    pdf_files = args.pdf_files or sorted(EXAMPLES_FOLDER.rglob("*.pdf"))
+    if not pdf_files and (args.mode == "static" or args.compare_pages):
+        parser.error("no PDF files given and none found in examples/")
+
+    output_path = args.output or get_cache_file_path(
+        DOCLAYOUT_INT8_ONNX_MODEL_NAME, "models"
+    )
+    fp32_path = get_doclayout_onnx_model_path()
+    fp32_model = OnnxModel(fp32_path)
+
+    calibration_images = None
+    if args.mode == "static":
+        calibration_images = (
+            fp32_model.preprocess(image)
+            for _, image in render_pages(pdf_files, args.calibration_pages)
+        )
+    quantize_doclayout_model(
+        fp32_path,
+        output_path,
+        calibration_images,
+        source_sha3_256=DOCLAYOUT_YOLO_DOCSTRUCTBENCH_IMGSZ1024ONNX_SHA3_256,
+    )
+
+    if args.compare_pages:
+        int8_model = OnnxModel(output_path)
+        compare(
+            fp32_model,
+            int8_model,
+            render_pages(pdf_files, args.compare_pages),
+            args.iou_threshold,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Decompress and pretty-print an IL dump written in debug mode.
+
+Usage: python -m babeldoc.tools.read_debug_dump il_translated.json.zst --pages 1-3
+
+The dump is read and printed one page at a time, the output has the same
+layout as XMLConverter.to_json.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import BinaryIO
+
+import orjson
+from babeldoc.document_il.xml_converter import XMLConverter
+from babeldoc.translation_config import TranslationConfig
+
+# The dump is written with sorted keys, so keeping its key order gives the
+# same order as XMLConverter.to_json
+PRETTY = orjson.OPT_INDENT_2
+
+
+def write_pretty_json(path: Path, output: BinaryIO, pages: str | None = None):
+    """Write the dump at path as indented json, keeping only the pages
+    (starting from 1) in pages."""
+    page_ranges = TranslationConfig.parse_pages(pages)
+    others = {}
+    output.write(b'{\n  "page": [')
+    separator = b"\n    "
+    for name, value in XMLConverter().iter_json_dump(path):
+        if name != "page":
+            others[name] = value
+            continue
+        page_number = value.get("page_number")
+        if page_number is not None and not TranslationConfig.page_in_ranges(
+            page_ranges, page_number + 1
+        ):
+            continue
+        # pages are nested two levels deep
+        output.write(
+            separator + orjson.dumps(value, option=PRETTY).replace(b"\n", b"\n    ")
+        )
+        separator = b",\n    "
+    output.write(b"\n  ]" if separator != b"\n    " else b"]")
+    for name, value in others.items():
+        value = orjson.dumps(value, option=PRETTY).replace(b"\n", b"\n  ")
+        output.write(b",\n  " + orjson.dumps(name) + b": " + value)
+    output.write(b"\n}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decompress and pretty-print an IL dump written in debug mode"
+    )
+    parser.add_argument("path", help="Path to a *.json.zst dump")
+    parser.add_argument(
+        "--pages",
+        "-p",
+        help="Only print these pages, like: 1,2,1-,-3,3-5",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        help="Write the json to this file instead of stdout",
+    )
+    args = parser.parse_args()
+
+    path = Path(args.path)
+    if not path.exists():
+        print(f"Error: File not found: {path}", file=sys.stderr)
+        return 1
+
+    if args.output:
+        with Path(args.output).open("wb") as f:
+            write_pretty_json(path, f, args.pages)
+    else:
+        write_pretty_json(path, sys.stdout.buffer, args.pages)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,24 @@
+from __future__ import annotations
+
 import enum
 import logging
 import shutil
 import tempfile
 import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from babeldoc.const import CACHE_FOLDER
-from babeldoc.document_il.translator.translator import BaseTranslator
-from babeldoc.docvision.doclayout import DocLayoutModel
 from babeldoc.progress_monitor import ProgressMonitor
 from babeldoc.split_manager import BaseSplitStrategy
 from babeldoc.split_manager import PageCountStrategy
 
+if TYPE_CHECKING:
+    # openai and onnxruntime take a while to import
+    from babeldoc.document_il.translator.translator import BaseTranslator
+    from babeldoc.docvision.doclayout import DocLayoutModel
+    from babeldoc.docvision.doclayout import OnnxSessionConfig
+
 logger = logging.getLogger(__name__)
 
 
@@ -71,6 +78,13 @@ class TranslationConfig:
         ocr_workaround: bool = False,
         custom_system_prompt: str | None = None,
         add_formula_placehold_hint: bool = False,
+        stage_checkpoint: bool = False,
+        onnx_session_config: OnnxSessionConfig | None = None,
+        doc_layout_quantized: bool = False,
+        layout_cache: bool = True,
+        input_cache: bool = True,
+        debug_dump_stages: list[str] | None = None,
+        debug_dump_pages: str | None = None,
     ):
         self.translator = translator
 
@@ -83,6 +97,11 @@ class TranslationConfig:
         self.pages = pages
         self.page_ranges = self.parse_pages(pages) if pages else None
         self.debug = debug
+        # debug 模式下只导出这些阶段和页码的 IL，None 表示全部导出
+        self.debug_dump_stages = (
+            set(debug_dump_stages) if debug_dump_stages is not None else None
+        )
+        self.debug_dump_page_ranges = self.parse_pages(debug_dump_pages)
         self.watermark_output_mode = watermark_output_mode
 
         self.output_dir = output_dir
@@ -144,15 +163,27 @@ class TranslationConfig:
 
         Path(output_dir).mkdir(parents=True, exist_ok=True)
 
+        self.onnx_session_config = onnx_session_config
+        self.doc_layout_quantized = doc_layout_quantized
         if not doc_layout_model:
-            doc_layout_model = DocLayoutModel.load_available()
+            from babeldoc.docvision.doclayout import DocLayoutModel
+
+            doc_layout_model = DocLayoutModel.load_available(
+                onnx_session_config, quantized=doc_layout_quantized
+            )
         self.doc_layout_model = doc_layout_model
+        self.layout_cache = layout_cache
+        self.input_cache = input_cache
 
         self.shared_context_cross_split_part = SharedContextCrossSplitPart()
 
         # Initialize split-related attributes
         self.split_strategy = split_strategy
 
+        # (original input file, first page, last page) on the config of a
+        # split part, the part's input file is regenerated on every run
+        self.split_part_source: tuple[str, int, int] | None = None
+
         # Create a unique working directory for each part
         self._part_working_dirs: dict[int, Path] = {}
         self._part_output_dirs: dict[int, Path] = {}
@@ -161,8 +192,10 @@ class TranslationConfig:
         self.show_char_box = show_char_box
         self.custom_system_prompt = custom_system_prompt
         self.add_formula_placehold_hint = add_formula_placehold_hint
+        self.stage_checkpoint = stage_checkpoint
 
-    def parse_pages(self, pages_str: str | None) -> list[tuple[int, int]] | None:
+    @staticmethod
+    def parse_pages(pages_str: str | None) -> list[tuple[int, int]] | None:
         """解析页码字符串，返回页码范围列表
 
         Args:
@@ -194,19 +227,44 @@ class TranslationConfig:
         Returns:
             是否需要翻译该页
         """
-        if isinstance(self.page_ranges, list) and len(self.page_ranges) == 0:
+        return self.page_in_ranges(self.page_ranges, page_number)
+
+    @staticmethod
+    def page_in_ranges(
+        page_ranges: list[tuple[int, int]] | None, page_number: int
+    ) -> bool:
+        """判断页码是否在 parse_pages 返回的页码范围内，None 表示所有页"""
+        if isinstance(page_ranges, list) and len(page_ranges) == 0:
             return False
-        if not self.page_ranges:
+        if not page_ranges:
             return True
 
-        for start, end in self.page_ranges:
+        for start, end in page_ranges:
             if start <= page_number and (end == -1 or page_number <= end):
                 return True
         return False
 
+    def should_dump_debug_il(self, stage: str) -> bool:
+        """判断 debug 模式下是否导出指定阶段的 IL"""
+        if not self.debug:
+            return False
+        return self.debug_dump_stages is None or stage in self.debug_dump_stages
+
+    def should_dump_debug_page(self, page_number: int) -> bool:
+        """判断导出 IL 时是否包含指定页码（从 1 开始）"""
+        return self.page_in_ranges(self.debug_dump_page_ranges, page_number)
+
     def get_output_file_path(self, filename: str) -> Path:
         return Path(self.output_dir) / filename
 
+    def get_output_file_name(self, pdf_type: str, no_watermark: bool = False) -> str:
+        """File name of an output PDF, pdf_type is "mono" or "dual"."""
+        basename = Path(self.input_file).stem
+        debug_suffix = ".debug" if self.debug else ""
+        if no_watermark:
+            debug_suffix += ".no_watermark"
+        return f"{basename}{debug_suffix}.{self.lang_out}.{pdf_type}.pdf"
+
     def get_working_file_path(self, filename: str) -> Path:
         return Path(self.working_dir) / filename
 
@@ -245,6 +303,11 @@ class TranslationConfig:
                 shutil.rmtree(part_dir)
             del self._part_working_dirs[part_index]
 
+    def keep_part_working_dir(self, part_index: int):
+        """Keep the working directory of a part, e.g. the stage checkpoints
+        of a failed part, which a later run resumes from"""
+        self._part_working_dirs.pop(part_index, None)
+
     def cleanup_temp_files(self):
         """Clean up all temporary files including part working directories"""
         try:
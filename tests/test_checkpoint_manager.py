@@ -0,0 +1,175 @@
+import orjson
+import pymupdf
+import pytest
+from babeldoc import high_level
+from babeldoc.checkpoint_manager import CheckpointManager
+from babeldoc.document_il import il_version_1
+from babeldoc.progress_monitor import ProgressMonitor
+from babeldoc.translation_config import TranslateResult
+from babeldoc.translation_config import TranslationConfig
+
+STAGES = ["Parse PDF", "Parse Page Layout", "Translate Paragraphs"]
+
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "input.pdf"
+    path.write_bytes(b"%PDF-input")
+    return path
+
+
+def _make_config(tmp_path, input_file, lang_out="zh", **kwargs):
+    return TranslationConfig(
+        None,
+        str(input_file),
+        "en",
+        lang_out,
+        doc_layout_model=object(),
+        working_dir=str(tmp_path / "work"),
+        stage_checkpoint=True,
+        **kwargs,
+    )
+
+
+def _make_document(page_count):
+    return il_version_1.Document(
+        page=[il_version_1.Page(page_number=i) for i in range(page_count)],
+        total_pages=page_count,
+    )
+
+
+class TestCheckpointManager:
+    def test_resume_after_completed_stage(self, tmp_path, input_file):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        assert checkpoint.load() == (None, None)
+        checkpoint.save("Parse PDF", _make_document(1))
+        checkpoint.save("Parse Page Layout", _make_document(2), extra={"a": 1})
+
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        stage_name, docs = checkpoint.load()
+
+        assert stage_name == "Parse Page Layout"
+        assert len(docs.page) == 2
+        assert checkpoint.get_extra("a") == 1
+        assert checkpoint.is_completed("Parse PDF")
+        assert checkpoint.is_completed("Parse Page Layout")
+        assert not checkpoint.is_completed("Translate Paragraphs")
+        # only the latest IL is kept
+        assert sorted(p.name for p in checkpoint.checkpoint_dir.iterdir()) == [
+            "01.bdil",
+            "manifest.json",
+        ]
+
+    def test_refuse_changed_input(self, tmp_path, input_file):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        checkpoint.save("Parse PDF", _make_document(1))
+        old_dir = checkpoint.checkpoint_dir
+
+        input_file.write_bytes(b"%PDF-changed")
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+
+        assert checkpoint.load() == (None, None)
+        assert not checkpoint.is_completed("Parse PDF")
+        assert not old_dir.exists()
+
+    def test_refuse_changed_config(self, tmp_path, input_file):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        checkpoint.save("Parse PDF", _make_document(1))
+
+        checkpoint = CheckpointManager(
+            _make_config(tmp_path, input_file, lang_out="ja"), STAGES
+        )
+
+        assert checkpoint.load() == (None, None)
+
+    def test_refuse_mismatched_manifest(self, tmp_path, input_file):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        checkpoint.save("Parse PDF", _make_document(1))
+        manifest = orjson.loads(checkpoint._manifest_path.read_bytes())
+        manifest["config_fingerprint"] = "0" * 64
+        checkpoint._manifest_path.write_bytes(orjson.dumps(manifest))
+
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+
+        assert checkpoint.load() == (None, None)
+        assert not checkpoint.checkpoint_dir.exists()
+
+    def test_clear(self, tmp_path, input_file):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        checkpoint.save("Parse PDF", _make_document(1))
+
+        checkpoint.clear()
+
+        assert not checkpoint.checkpoint_dir.exists()
+        assert not checkpoint.is_completed("Parse PDF")
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        assert checkpoint.load() == (None, None)
+
+    @pytest.mark.parametrize("name", ["00.bdil", "manifest.json"])
+    def test_truncated_checkpoint(self, tmp_path, input_file, name):
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+        checkpoint.save("Parse PDF", _make_document(1))
+        path = checkpoint.checkpoint_dir / name
+        path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+
+        checkpoint = CheckpointManager(_make_config(tmp_path, input_file), STAGES)
+
+        assert checkpoint.load() == (None, None)
+        assert not checkpoint.checkpoint_dir.exists()
+
+
+class TestSplitPartCheckpoint:
+    @pytest.fixture
+    def pdf_file(self, tmp_path):
+        path = tmp_path / "input.pdf"
+        doc = pymupdf.open()
+        for i in range(2):
+            doc.new_page().insert_text((50, 50), f"page {i}")
+        doc.save(path)
+        return path
+
+    def test_resume_failed_part(self, tmp_path, pdf_file, monkeypatch):
+        runs = []
+        fail = True
+
+        def translate_part(_pm, config):
+            """Parses the part, the second part fails in the first run"""
+            checkpoint = CheckpointManager(config, STAGES)
+            part_start = config.split_part_source[1]
+            runs.append((part_start, checkpoint.load()[0]))
+            checkpoint.save("Parse PDF", _make_document(1))
+            if fail and part_start == 1:
+                raise RuntimeError("translation failed")
+            path = config.get_output_file_path(f"part{part_start}.pdf")
+            with pymupdf.open() as doc:
+                doc.new_page()
+                doc.save(path)
+            result = TranslateResult(path, None)
+            result.no_watermark_mono_pdf_path = path
+            result.no_watermark_dual_pdf_path = None
+            return result
+
+        monkeypatch.setattr(high_level, "_do_translate_single", translate_part)
+
+        def translate():
+            config = _make_config(
+                tmp_path,
+                pdf_file,
+                output_dir=str(tmp_path / "output"),
+                split_strategy=(
+                    TranslationConfig.create_max_pages_per_part_split_strategy(1)
+                ),
+            )
+            return high_level.do_translate(ProgressMonitor([("Parse PDF", 1)]), config)
+
+        with pytest.raises(RuntimeError):
+            translate()
+        assert runs == [(0, None), (1, None)]
+
+        fail = False
+        result = translate()
+
+        # only the failed part resumes
+        assert runs[2:] == [(0, None), (1, "Parse PDF")]
+        with pymupdf.open(result.mono_pdf_path) as doc:
+            assert doc.page_count == 2
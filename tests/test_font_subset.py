@@ -0,0 +1,72 @@
+import contextlib
+import multiprocessing.forkserver
+import os
+import signal
+import threading
+import time
+
+import pymupdf
+import pytest
+from babeldoc.document_il.utils.font_subset import FontSubsetError
+from babeldoc.document_il.utils.font_subset import FontSubsetPool
+
+
+@pytest.fixture
+def pool():
+    pool = FontSubsetPool()
+    yield pool
+    pool.close()
+
+
+def _pdf_bytes():
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "font subset", fontname="helv")
+    return doc.tobytes()
+
+
+class TestFontSubsetPool:
+    def test_reuses_worker(self, pool):
+        data = _pdf_bytes()
+        result = pool.subset_fonts(data)
+        worker = pool._idle[0]
+        for output in (result, pool.subset_fonts(data)):
+            with pymupdf.open(stream=output) as doc:
+                assert doc[0].get_text().strip() == "font subset"
+        assert pool._idle == [worker]
+
+    def test_keeps_forkserver_preload(self, pool):
+        preload = list(multiprocessing.forkserver._forkserver._preload_modules)
+        pool.subset_fonts(_pdf_bytes())
+        assert multiprocessing.forkserver._forkserver._preload_modules == preload
+
+    def test_error(self, pool):
+        with pytest.raises(FontSubsetError):
+            pool.subset_fonts(b"not a pdf")
+        assert pool._idle == []
+        assert pool.subset_fonts(_pdf_bytes())
+
+    def test_timeout(self, pool):
+        with pytest.raises(TimeoutError):
+            pool.subset_fonts(_pdf_bytes(), timeout=0)
+        assert pool._idle == []
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGSTOP"), reason="needs SIGSTOP")
+    def test_timeout_when_worker_does_not_read(self, pool):
+        pool._release(pool._start_worker())
+        pid = pool._idle[0].process.pid
+        os.kill(pid, signal.SIGSTOP)
+        # resume later so that the worker can be terminated
+        timer = threading.Timer(2, os.kill, (pid, signal.SIGCONT))
+        timer.start()
+        start = time.monotonic()
+        try:
+            with pytest.raises(TimeoutError):
+                # larger than the pipe buffer
+                pool.subset_fonts(b"x" * (16 * 1024 * 1024), timeout=0.5)
+        finally:
+            timer.cancel()
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGCONT)
+        assert time.monotonic() - start < 10
+        assert pool._idle == []
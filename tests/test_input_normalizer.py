@@ -0,0 +1,87 @@
+import os
+import zlib
+
+import pymupdf
+from babeldoc.input_normalizer import NormalizedInputCache
+from babeldoc.input_normalizer import normalize_pdf
+
+
+def _make_pdf():
+    doc = pymupdf.open()
+    page = doc.new_page(width=200, height=100)
+    page.insert_text((10, 50), "first")
+    page.insert_text((10, 80), "second")
+    page.clean_contents(sanitize=False)
+    xref = doc.get_new_xref()
+    doc.update_object(xref, "<<>>")
+    doc.update_stream(xref, b"0 0 1 rg")
+    contents = page.get_contents()
+    doc.xref_set_key(page.xref, "Contents", f"[{xref} 0 R {contents[0]} 0 R]")
+    doc.xref_set_key(page.xref, "MediaBox", "[10 20 210 120]")
+    null_xref = doc.get_new_xref()
+    doc.update_object(null_xref, "null")
+    return doc, null_xref
+
+
+class TestNormalizePdf:
+    def test_normalize(self):
+        doc, null_xref = _make_pdf()
+        text = doc[0].get_text()
+
+        mediabox_data = normalize_pdf(doc)
+
+        page = doc[0]
+        assert len(page.get_contents()) == 1
+        assert page.read_contents().startswith(b"0 0 1 rg ")
+        assert page.get_text() == text
+        assert mediabox_data == {0: {"MediaBox": "[10 20 210 120]"}}
+        assert tuple(page.mediabox) == (0, 0, 200, 100)
+        assert doc.xref_object(null_xref, compressed=True) == "[]"
+
+    def test_indirect_filter(self):
+        doc = pymupdf.open()
+        page = doc.new_page(width=200, height=100)
+        page.insert_text((10, 50), "first")
+        page.clean_contents(sanitize=False)
+        (contents,) = page.get_contents()
+        data = zlib.compress(doc.xref_stream(contents))
+        doc.update_stream(contents, data, compress=False)
+        filter_xref = doc.get_new_xref()
+        doc.update_object(filter_xref, "/FlateDecode")
+        doc.xref_set_key(contents, "Filter", f"{filter_xref} 0 R")
+
+        normalize_pdf(doc)
+
+        assert doc.xref_get_key(contents, "Filter")[0] != "xref"
+        assert doc[0].get_text() == "first\n"
+
+
+class TestNormalizedInputCache:
+    def test_round_trip(self, tmp_path):
+        cache = NormalizedInputCache(tmp_path / "cache")
+        output_path = tmp_path / "input.pdf"
+        assert cache.get("ab" * 32, output_path) is None
+
+        normalized_path = tmp_path / "normalized.pdf"
+        normalized_path.write_bytes(b"%PDF-normalized")
+        cache.put("ab" * 32, normalized_path, {3: {"MediaBox": "[1 1 2 2]"}})
+        normalized_path.unlink()
+
+        cache = NormalizedInputCache(tmp_path / "cache")
+        assert cache.get("ab" * 32, output_path) == {3: {"MediaBox": "[1 1 2 2]"}}
+        assert output_path.read_bytes() == b"%PDF-normalized"
+
+    def test_evict_least_recently_used(self, tmp_path):
+        cache = NormalizedInputCache(tmp_path, max_bytes=30)
+        pdf_path = tmp_path / "normalized.pdf"
+        pdf_path.write_bytes(b"x" * 10)
+        cache.put("a" * 64, pdf_path, {})
+        cache.put("b" * 64, pdf_path, {})
+        for info_path in cache.cache_dir.glob("*.json"):
+            os.utime(info_path, (0, 0))
+        assert cache.get("a" * 64, tmp_path / "a.pdf") == {}
+        cache.put("c" * 64, pdf_path, {})
+
+        assert cache.get("a" * 64, tmp_path / "a.pdf") == {}
+        assert cache.get("b" * 64, tmp_path / "b.pdf") is None
+        assert cache.get("c" * 64, tmp_path / "c.pdf") == {}
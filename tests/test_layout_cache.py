@@ -0,0 +1,43 @@
+import numpy as np
+from babeldoc.docvision.doclayout import YoloBox
+from babeldoc.docvision.doclayout import YoloResult
+from babeldoc.docvision.layout_cache import LayoutCache
+
+
+class _Model:
+    def __init__(self, identity, source="onnx:/models/layout.onnx"):
+        self.cache_identity = identity
+        self.cache_source = source
+
+
+def _result():
+    return YoloResult(
+        names={0: "text", 1: "title"},
+        boxes=[
+            YoloBox(
+                xyxy=np.array([1.5, 2.0, 30.0, 40.25]), conf=np.float32(0.5), cls=1
+            ),
+            YoloBox(xyxy=[5, 6, 7, 8], conf=np.array(0.75), cls=0),
+        ],
+    )
+
+
+class TestLayoutCache:
+    def test_round_trip(self, tmp_path):
+        cache = LayoutCache(_Model("onnx:a"), tmp_path)
+        assert cache.get("ab" * 32) is None
+        cache.put("ab" * 32, _result())
+
+        result = LayoutCache(_Model("onnx:a"), tmp_path).get("ab" * 32)
+        assert result.names == {0: "text", 1: "title"}
+        assert [box.cls for box in result.boxes] == [0, 1]
+        assert [box.conf.item() for box in result.boxes] == [0.75, 0.5]
+        assert list(result.boxes[1].xyxy) == [1.5, 2.0, 30.0, 40.25]
+
+    def test_invalidated_when_model_changes(self, tmp_path):
+        LayoutCache(_Model("onnx:a"), tmp_path).put("ab" * 32, _result())
+        LayoutCache(_Model("rpc:host", "rpc:host"), tmp_path).put("ab" * 32, _result())
+
+        assert LayoutCache(_Model("onnx:b"), tmp_path).get("ab" * 32) is None
+        assert LayoutCache(_Model("onnx:a"), tmp_path).get("ab" * 32) is None
+        assert LayoutCache(_Model("rpc:host", "rpc:host"), tmp_path).get("ab" * 32)
@@ -0,0 +1,145 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pymupdf
+from babeldoc.document_il import il_version_1
+from babeldoc.document_il.midend import layout_parser
+from babeldoc.document_il.utils import mupdf_helper
+from babeldoc.docvision import doclayout
+from babeldoc.docvision.doclayout import OnnxModel
+from babeldoc.docvision.doclayout import YoloResult
+from babeldoc.docvision.layout_cache import LayoutCache
+
+
+class _Session:
+    def __init__(self):
+        self.runs = 0
+
+    def run(self, _, inputs):
+        self.runs += 1
+        batch = inputs["images"]
+        preds = np.zeros((len(batch), 1, 6), np.float32)
+        preds[:, 0] = [64, 64, 128, 128, 0.9, 0]
+        return [preds]
+
+
+def _make_model():
+    # OnnxModel without loading a real model
+    model = OnnxModel.__new__(OnnxModel)
+    model.model_path = "layout.onnx"
+    model.prefetch_pages = 2
+    model.lock = threading.Lock()
+    model.model = _Session()
+    model._stride = 32
+    model._names = {0: "text"}
+    return model
+
+
+def _make_pdf():
+    doc = pymupdf.open()
+    for i, rotation in enumerate((90, 0, 270, 180)):
+        page = doc.new_page(width=200 + i * 10, height=100)
+        page.insert_text((10, 50), f"page {i}")
+        page.set_rotation(rotation)
+    return doc
+
+
+def _record_render_threads(monkeypatch):
+    render_threads = []
+    original = mupdf_helper.get_no_rotation_img
+
+    def get_no_rotation_img(page):
+        render_threads.append(threading.current_thread().name)
+        return original(page)
+
+    for module in (doclayout, layout_parser, mupdf_helper):
+        monkeypatch.setattr(module, "get_no_rotation_img", get_no_rotation_img)
+    return render_threads
+
+
+class _CustomModel:
+    """A model that yields results without image_shape"""
+
+    cache_identity = None
+
+    def handle_document(self, pages, mupdf_doc, translate_config, save_debug_image):
+        for page in pages:
+            yield page, YoloResult(names={0: "text"}, boxes=[])
+
+
+class TestLayoutParser:
+    def test_pages_rendered_on_prefetch_thread(self, monkeypatch):
+        render_threads = _record_render_threads(monkeypatch)
+        config = SimpleNamespace(
+            doc_layout_model=_make_model(),
+            layout_cache=False,
+            debug=False,
+            raise_if_cancelled=lambda: None,
+        )
+        doc = _make_pdf()
+        pages = [il_version_1.Page(page_number=i) for i in range(len(doc))]
+
+        results = list(layout_parser.LayoutParser(config)._predict_layouts(pages, doc))
+
+        assert [page.page_number for page, _, _ in results] == [0, 1, 2, 3]
+        assert [shape for _, _, shape in results] == [
+            (100, 200 + i * 10) for i in range(len(doc))
+        ]
+        assert [len(layouts.boxes) for _, layouts, _ in results] == [1, 1, 1, 1]
+        assert [page.rotation for page in doc] == [90, 0, 270, 180]
+        assert len(render_threads) == len(doc)
+        assert all(name.startswith("doclayout-prefetch") for name in render_threads)
+
+    def test_model_without_image_shape(self, monkeypatch):
+        render_threads = _record_render_threads(monkeypatch)
+        config = SimpleNamespace(
+            doc_layout_model=_CustomModel(),
+            layout_cache=True,
+            debug=False,
+            raise_if_cancelled=lambda: None,
+        )
+        doc = _make_pdf()
+        pages = [il_version_1.Page(page_number=i) for i in range(len(doc))]
+
+        results = list(layout_parser.LayoutParser(config)._predict_layouts(pages, doc))
+
+        assert [shape for _, _, shape in results] == [
+            (100, 200 + i * 10) for i in range(len(doc))
+        ]
+        assert len(render_threads) == len(doc)
+
+    def test_layout_cache_renders_each_page_once(self, monkeypatch, tmp_path):
+        render_threads = _record_render_threads(monkeypatch)
+        monkeypatch.setattr(
+            layout_parser, "LayoutCache", lambda model: LayoutCache(model, tmp_path)
+        )
+        model = _make_model()
+        model.cache_identity = "onnx:test"
+        config = SimpleNamespace(
+            doc_layout_model=model,
+            layout_cache=True,
+            debug=False,
+            raise_if_cancelled=lambda: None,
+        )
+        doc = _make_pdf()
+        pages = [il_version_1.Page(page_number=i) for i in range(len(doc))]
+        parser = layout_parser.LayoutParser(config)
+        expected_shapes = [(i, (100, 200 + i * 10)) for i in range(len(doc))]
+
+        cold = list(parser._predict_layouts(pages, doc))
+        assert model.model.runs == len(doc)
+        assert len(render_threads) == len(doc)
+        assert all(name.startswith("layout-render") for name in render_threads)
+        assert sorted((p.page_number, shape) for p, _, shape in cold) == (
+            expected_shapes
+        )
+
+        render_threads.clear()
+        warm = list(parser._predict_layouts(pages, doc))
+        assert model.model.runs == len(doc)
+        assert len(render_threads) == len(doc)
+        assert sorted((p.page_number, shape) for p, _, shape in warm) == (
+            expected_shapes
+        )
+        assert [len(layouts.boxes) for _, layouts, _ in warm] == [1] * len(doc)
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+from babeldoc.docvision.doclayout import OnnxSessionConfig
+
+
+@pytest.fixture(autouse=True)
+def cpu_count(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+
+
+class TestOnnxSessionConfig:
+    def test_share_cpus_between_sessions(self):
+        config = OnnxSessionConfig()
+        assert config.thread_counts() == (8, 1)
+        assert config.thread_counts(concurrent_sessions=4) == (2, 1)
+        assert config.thread_counts(concurrent_sessions=16) == (1, 1)
+
+    def test_parallel_execution_mode(self):
+        config = OnnxSessionConfig(execution_mode="parallel")
+        assert config.thread_counts() == (4, 4)
+        assert config.thread_counts(concurrent_sessions=2) == (2, 2)
+        assert config.thread_counts(concurrent_sessions=8) == (1, 1)
+
+    def test_explicit_thread_counts(self):
+        config = OnnxSessionConfig(
+            intra_op_num_threads=3, inter_op_num_threads=2, execution_mode="parallel"
+        )
+        assert config.thread_counts(concurrent_sessions=4) == (3, 2)
@@ -0,0 +1,67 @@
+from babeldoc.document_il.il_version_1 import Box
+from babeldoc.document_il.il_version_1 import Page
+from babeldoc.document_il.il_version_1 import PdfParagraph
+from babeldoc.document_il.midend.paragraph_finder import ParagraphFinder
+
+# (x, y, x2, y2, xobj_id)
+BOXES = [
+    # a chain of stacked paragraphs, each overlapping the next
+    (0, 0, 100, 30, 0),
+    (0, 20, 100, 50, 0),
+    (0, 40, 100, 70, 0),
+    (10, 60, 90, 90, 0),
+    # overlaps the chain only through the previous paragraph
+    (80, 85, 150, 110, 0),
+    # same place as the first one, but in a form xobject
+    (0, 0, 100, 30, 1),
+    # vertically contained in the second one
+    (50, 25, 60, 45, 0),
+    # beside the chain
+    (200, 0, 300, 100, 0),
+    None,
+]
+
+# Result of the pairwise implementation before the sweep
+EXPECTED = [
+    (0, 0, 100, 24.0),
+    (0, 26.0, 100, 44.0),
+    (0, 46.0, 100, 64.0),
+    (10, 66.0, 90, 86.5),
+    (80, 88.5, 150, 110),
+    (0, 0, 100, 30),
+    (50, 25, 60, 45),
+    (200, 0, 300, 100),
+    None,
+]
+
+
+def _make_page():
+    paragraphs = []
+    for i, box in enumerate(BOXES):
+        paragraph = PdfParagraph(debug_id=str(i), xobj_id=0)
+        if box is not None:
+            x, y, x2, y2, paragraph.xobj_id = box
+            paragraph.box = Box(x=x, y=y, x2=x2, y2=y2)
+        paragraphs.append(paragraph)
+    return Page(pdf_paragraph=paragraphs)
+
+
+class TestFixOverlappingParagraphs:
+    def test_overlap_chain(self):
+        page = _make_page()
+
+        ParagraphFinder(None).fix_overlapping_paragraphs(page)
+
+        assert [
+            None if p.box is None else (p.box.x, p.box.y, p.box.x2, p.box.y2)
+            for p in page.pdf_paragraph
+        ] == EXPECTED
+
+    def test_overlapping_pairs(self):
+        page = _make_page()
+
+        pairs = ParagraphFinder(None).find_overlapping_paragraph_pairs(
+            page.pdf_paragraph
+        )
+
+        assert pairs == [(0, 1), (0, 6), (1, 2), (1, 6), (2, 3), (2, 6), (3, 4)]
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pymupdf
+from babeldoc.document_il import il_version_1
+from babeldoc.document_il.backend.pdf_creater import PDFCreater
+
+FONT_ID = "watermark-font"
+
+
+def _make_char(unicode, x):
+    return il_version_1.PdfCharacter(
+        char_unicode=unicode,
+        pdf_character_id=ord(unicode),
+        box=il_version_1.Box(x=x, y=10, x2=x + 10, y2=20),
+        pdf_style=il_version_1.PdfStyle(
+            font_id=FONT_ID,
+            font_size=10,
+            graphic_state=il_version_1.GraphicState(),
+        ),
+    )
+
+
+def _make_creater(tmp_path):
+    font_path = tmp_path / "watermark.ttf"
+    font_path.write_bytes(pymupdf.Font("cjk").buffer)
+    creater = PDFCreater.__new__(PDFCreater)
+    creater.mediabox_data = {}
+    creater.font_mapper = SimpleNamespace(
+        fontid2fontpath={FONT_ID: str(font_path)},
+        fontid2font={FONT_ID: SimpleNamespace(encoding_length=2)},
+    )
+    creater.watermark = il_version_1.PdfParagraph(
+        pdf_paragraph_composition=[
+            il_version_1.PdfParagraphComposition(pdf_character=_make_char(c, i * 10))
+            for i, c in enumerate("水印")
+        ]
+    )
+    return creater
+
+
+def _make_pdf():
+    doc = pymupdf.open()
+    for i in range(2):
+        page = doc.new_page()
+        page.insert_text((10, 50), f"page {i}")
+    return doc
+
+
+def _font_names(doc, page_number):
+    return {font[4] for font in doc[page_number].get_fonts()}
+
+
+class TestWatermarkedFirstPage:
+    def test_watermark_only_on_copy(self, tmp_path):
+        creater = _make_creater(tmp_path)
+        pdf = _make_pdf()
+        contents = [page.read_contents() for page in pdf]
+
+        first_page = creater.create_watermarked_first_page(pdf)
+
+        assert len(first_page) == 1
+        assert FONT_ID in _font_names(first_page, 0)
+        watermarked = first_page[0].read_contents()
+        assert watermarked.startswith(contents[0])
+        assert f"/{FONT_ID} ".encode() in watermarked
+        assert b"<6C34>" in watermarked
+        # the outputs without watermark are untouched
+        assert [page.read_contents() for page in pdf] == contents
+        assert all(FONT_ID not in _font_names(pdf, i) for i in range(len(pdf)))
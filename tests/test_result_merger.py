@@ -0,0 +1,174 @@
+import pymupdf
+from babeldoc.result_merger import ResultMerger
+from babeldoc.result_merger import _MergedPdf
+from babeldoc.translation_config import TranslateResult
+from babeldoc.translation_config import TranslationConfig
+
+
+def _part(text):
+    doc = pymupdf.open()
+    font = pymupdf.Font("tiro").buffer
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 8, 8), False)
+    pixmap.set_rect(pixmap.irect, (255, 0, 0))
+    image = pixmap.tobytes("png")
+    for i in range(2):
+        page = doc.new_page()
+        page.insert_font(fontname="F0", fontbuffer=font)
+        page.insert_text((50, 50), f"{text} {i}", fontname="F0")
+        page.insert_image(pymupdf.Rect(100, 100, 200, 200), stream=image)
+    return doc
+
+
+def _count(doc, pattern):
+    return sum(
+        1
+        for xref in range(1, doc.xref_length())
+        if pattern in doc.xref_object(xref, compressed=True)
+    )
+
+
+class TestMergedPdf:
+    def test_deduplicate_fonts_and_images(self):
+        merged = _MergedPdf()
+        merged.append(_part("first"))
+        merged.append(_part("second"))
+        doc = pymupdf.open(stream=merged.doc.tobytes(garbage=1))
+        assert doc.page_count == 4
+        assert _count(doc, "/Subtype/Image") == 1
+        assert _count(doc, "/Type/FontDescriptor") == 1
+        assert "second 1" in doc[3].get_text()
+        assert len(doc[3].get_images()) == 1
+
+
+def _make_config(tmp_path):
+    input_file = tmp_path / "paper.pdf"
+    input_file.write_bytes(b"%PDF-input")
+    return TranslationConfig(
+        None,
+        str(input_file),
+        "en",
+        "zh",
+        doc_layout_model=object(),
+        working_dir=str(tmp_path / "work"),
+        output_dir=str(tmp_path / "output"),
+    )
+
+
+def _part_result(config, part_index, watermark):
+    """Write the outputs of a part like PDFCreater.write"""
+    output_dir = config.get_part_output_dir(part_index)
+    paths = {}
+    for pdf_type in ("mono", "dual"):
+        for no_watermark in (False, True) if watermark else (True,):
+            doc = pymupdf.open()
+            page = doc.new_page()
+            label = "no watermark" if no_watermark else "watermark"
+            page.insert_text((50, 50), f"part {part_index} {pdf_type} {label}")
+            path = output_dir / f"{pdf_type}.{no_watermark}.pdf"
+            doc.save(path)
+            paths[pdf_type, no_watermark] = str(path)
+    result = TranslateResult(
+        paths.get(("mono", False), paths["mono", True]),
+        paths.get(("dual", False), paths["dual", True]),
+    )
+    result.no_watermark_mono_pdf_path = paths["mono", True]
+    result.no_watermark_dual_pdf_path = paths["dual", True]
+    result.total_seconds = part_index + 1
+    return result
+
+
+def _font_part_result(config, part_index, text, font_buffer):
+    """Part outputs embed the whole font, parts are not subset"""
+    output_dir = config.get_part_output_dir(part_index)
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_font(fontname="F0", fontbuffer=font_buffer)
+    page.insert_text((50, 50), text, fontname="F0")
+    path = str(output_dir / "mono.pdf")
+    doc.save(path)
+    result = TranslateResult(path, None)
+    result.no_watermark_mono_pdf_path = path
+    return result
+
+
+def _texts(path):
+    with pymupdf.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+class TestResultMerger:
+    def test_out_of_order_parts(self, tmp_path):
+        config = _make_config(tmp_path)
+        merger = ResultMerger(config)
+        results = [_part_result(config, i, watermark=i == 0) for i in range(3)]
+
+        merger.add_result(2, results[2])
+        merger.add_result(1, results[1])
+        # kept until part 0 is added
+        assert config.get_part_output_dir(1).exists()
+        assert config.get_part_output_dir(2).exists()
+        merger.add_result(0, results[0])
+        assert not any(
+            (tmp_path / "work" / f"part_{i}_output").exists() for i in range(3)
+        )
+
+        result = merger.merge_results()
+
+        assert _texts(result.mono_pdf_path) == [
+            "part 0 mono watermark",
+            "part 1 mono no watermark",
+            "part 2 mono no watermark",
+        ]
+        assert _texts(result.no_watermark_dual_pdf_path) == [
+            "part 0 dual no watermark",
+            "part 1 dual no watermark",
+            "part 2 dual no watermark",
+        ]
+        assert result.total_seconds == 6
+
+    def test_subset_shared_font_once(self, tmp_path):
+        config = _make_config(tmp_path)
+        merger = ResultMerger(config)
+        font_buffer = pymupdf.Font("cjk").buffer
+        for i, text in enumerate(["中文", "翻译"]):
+            merger.add_result(i, _font_part_result(config, i, text, font_buffer))
+
+        result = merger.merge_results()
+
+        assert _texts(result.mono_pdf_path) == ["中文", "翻译"]
+        with pymupdf.open(result.mono_pdf_path) as doc:
+            assert _count(doc, "/Type/FontDescriptor") == 1
+            font_files = [
+                doc.xref_stream(xref)
+                for xref in range(1, doc.xref_length())
+                if doc.xref_is_stream(xref)
+                and doc.xref_get_key(xref, "Length1")[0] != "null"
+            ]
+        assert len(font_files) == 1
+        assert len(font_files[0]) < len(font_buffer) // 2
+
+    def test_output_file_names(self, tmp_path):
+        config = _make_config(tmp_path)
+        merger = ResultMerger(config)
+        merger.add_result(0, _part_result(config, 0, watermark=True))
+
+        # parts not added yet are added by merge_results
+        result = merger.merge_results({1: _part_result(config, 1, watermark=False)})
+
+        output_dir = tmp_path / "output"
+        assert result.mono_pdf_path == output_dir / "paper.zh.mono.pdf"
+        assert result.dual_pdf_path == output_dir / "paper.zh.dual.pdf"
+        assert (
+            result.no_watermark_mono_pdf_path
+            == output_dir / "paper.no_watermark.zh.mono.pdf"
+        )
+        assert (
+            result.no_watermark_dual_pdf_path
+            == output_dir / "paper.no_watermark.zh.dual.pdf"
+        )
+        assert sorted(p.name for p in output_dir.iterdir()) == [
+            "paper.no_watermark.zh.dual.pdf",
+            "paper.no_watermark.zh.mono.pdf",
+            "paper.zh.dual.pdf",
+            "paper.zh.mono.pdf",
+        ]
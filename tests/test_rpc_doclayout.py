@@ -0,0 +1,160 @@
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from types import SimpleNamespace
+
+import msgpack
+import numpy as np
+import pymupdf
+import pytest
+from babeldoc.document_il import il_version_1
+from babeldoc.docvision.rpc_doclayout import RpcDocLayoutModel
+
+
+class _StandInLayoutServer:
+    """Minimal local stand-in for the layout inference service."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail_next = 0
+        self.single_result = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                data = msgpack.unpackb(body, raw=False)
+                server.requests.append((self.client_address, len(data["image"])))
+                if server.fail_next:
+                    server.fail_next -= 1
+                    self._reply(500, b"error")
+                    return
+                result = [
+                    {
+                        "boxes": [{"xyxy": [10, 20, 110, 220], "conf": 0.9, "cls": 0}],
+                        "names": {"0": "text"},
+                    }
+                    for _ in data["image"]
+                ]
+                if server.single_result:
+                    result = result[:1]
+                self._reply(200, msgpack.packb(result, use_bin_type=True))
+
+            def _reply(self, status, content):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/msgpack")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = _StandInLayoutServer()
+    yield server
+    server.close()
+
+
+def _image():
+    return np.full((800, 600, 3), 255, dtype=np.uint8)
+
+
+class TestRpcDocLayoutModel:
+    def test_reuses_connection(self, server):
+        model = RpcDocLayoutModel(host=server.host, max_workers=1)
+        try:
+            for _ in range(3):
+                result = model.predict_image(_image())
+                assert len(result.boxes) == 1
+                assert result.names == {0: "text"}
+        finally:
+            model.close()
+        assert len(server.requests) == 3
+        assert len({address for address, _ in server.requests}) == 1
+
+    def test_retry(self, server):
+        server.fail_next = 1
+        model = RpcDocLayoutModel(host=server.host, max_attempts=2)
+        try:
+            result = model.predict_image(_image())
+        finally:
+            model.close()
+        assert len(result.boxes) == 1
+        assert len(server.requests) == 2
+
+    def test_batch_request(self, server):
+        model = RpcDocLayoutModel(host=server.host, max_batch_size=4)
+        images = [_image() for _ in range(3)]
+        try:
+            results = model.predict_batch(
+                [model.encode_page_image(image) for image in images],
+                [image.shape[:2] for image in images],
+            )
+        finally:
+            model.close()
+        assert [len(result.boxes) for result in results] == [1, 1, 1]
+        assert [count for _, count in server.requests] == [3]
+
+    def test_fall_back_to_single_page(self, server):
+        server.single_result = True
+        model = RpcDocLayoutModel(host=server.host, max_batch_size=4)
+        images = [_image() for _ in range(3)]
+        try:
+            results = model.predict_batch(
+                [model.encode_page_image(image) for image in images],
+                [image.shape[:2] for image in images],
+            )
+        finally:
+            model.close()
+        assert [len(result.boxes) for result in results] == [1, 1, 1]
+        assert [count for _, count in server.requests] == [3, 1, 1, 1]
+        assert model.max_batch_size == 1
+
+    def test_handle_document(self, server):
+        model = RpcDocLayoutModel(host=server.host, max_batch_size=2)
+        encode_threads = []
+        encode_page_image = model.encode_page_image
+
+        def encode(image):
+            encode_threads.append(threading.current_thread().name)
+            return encode_page_image(image)
+
+        model.encode_page_image = encode
+        doc = pymupdf.open()
+        for i in range(5):
+            doc.new_page(width=200 + i * 10, height=100)
+        pages = [il_version_1.Page(page_number=i) for i in range(len(doc))]
+        config = SimpleNamespace(raise_if_cancelled=lambda: None)
+        try:
+            results = list(model.handle_document(pages, doc, config, lambda *_: None))
+        finally:
+            model.close()
+        assert [page.page_number for page, _ in results] == [0, 1, 2, 3, 4]
+        assert [result.image_shape for _, result in results] == [
+            (100, 200 + i * 10) for i in range(5)
+        ]
+        assert [len(result.boxes) for _, result in results] == [1] * 5
+        assert sorted(count for _, count in server.requests) == [1, 2, 2]
+        assert all(name.startswith("rpc-doclayout-encode") for name in encode_threads)
+
+    def test_results_not_cached(self, server):
+        # the service does not report its model, see LayoutParser
+        model = RpcDocLayoutModel(host=server.host)
+        try:
+            assert model.cache_identity is None
+        finally:
+            model.close()
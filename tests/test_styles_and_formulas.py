@@ -0,0 +1,165 @@
+from types import SimpleNamespace
+
+import pytest
+from babeldoc.document_il.il_version_1 import Box
+from babeldoc.document_il.il_version_1 import Page
+from babeldoc.document_il.il_version_1 import PdfCharacter
+from babeldoc.document_il.il_version_1 import PdfFont
+from babeldoc.document_il.il_version_1 import PdfFormula
+from babeldoc.document_il.il_version_1 import PdfLine
+from babeldoc.document_il.il_version_1 import PdfParagraph
+from babeldoc.document_il.il_version_1 import PdfParagraphComposition
+from babeldoc.document_il.il_version_1 import PdfStyle
+from babeldoc.document_il.il_version_1 import VisualBbox
+from babeldoc.document_il.midend import styles_and_formulas
+from babeldoc.document_il.midend.styles_and_formulas import StylesAndFormulas
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    # the fonts for lang_out cover every character
+    monkeypatch.setattr(
+        styles_and_formulas,
+        "FontMapper",
+        lambda _: SimpleNamespace(has_char=lambda _: True),
+    )
+    return StylesAndFormulas(
+        SimpleNamespace(formular_char_pattern=None, formular_font_pattern=None)
+    )
+
+
+def _char(unicode, x, size=10, font_id="F1", y=0, width=None):
+    width = size * 0.5 if width is None else width
+    box = Box(x, y, x + width, y + size)
+    return PdfCharacter(
+        char_unicode=unicode,
+        box=box,
+        visual_bbox=VisualBbox(box=Box(box.x, box.y, box.x2, box.y2)),
+        pdf_style=PdfStyle(font_id=font_id, font_size=size),
+    )
+
+
+def _line(chars):
+    return PdfParagraphComposition(pdf_line=PdfLine(pdf_character=chars))
+
+
+def _dump(page):
+    result = []
+    for composition in page.pdf_paragraph[0].pdf_paragraph_composition:
+        if composition.pdf_formula:
+            formula = composition.pdf_formula
+            box = formula.box
+            text = "".join(char.char_unicode for char in formula.pdf_character)
+            result.append(("formula", text, (box.x, box.y, box.x2, box.y2)))
+        else:
+            text = "".join(
+                char.char_unicode for char in composition.pdf_line.pdf_character
+            )
+            result.append(("line", text))
+    return result
+
+
+# The expected results were produced by the implementations before the
+# whitespace flag and the single pass merge.
+class TestProcessPageFormulas:
+    def test_whitespace_runs(self, processor):
+        # (unicode, font size, font id)
+        first = [
+            ("a", 10, "F1"),
+            (" ", 10, "F1"),
+            (" ", 10, "F1"),
+            ("x", 10, "F2"),
+            ("2", 6, "F1"),
+            (" ", 10, "F1"),
+            (" ", 10, "F1"),
+            ("b", 10, "F1"),
+            (" ", 10, "F1"),
+            (" ", 10, "F1"),
+            ("3", 6, "F1"),
+            ("4", 6, "F1"),
+            (" ", 6, "F1"),
+            ("c", 10, "F1"),
+            ("α", 10, "F1"),
+            (" ", 10, "F1"),
+            ("=", 10, "F1"),
+            (" ", 10, "F1"),
+            ("d", 10, "F1"),
+        ]
+        # smaller characters after a whitespace only run are no corner mark
+        second = [(" ", 10), (" ", 10), ("k", 6), ("l", 6), ("m", 10)]
+        page = Page(
+            pdf_font=[
+                PdfFont(name="CMMI10", font_id="F2"),
+                PdfFont(name="Times", font_id="F1"),
+            ],
+            pdf_paragraph=[
+                PdfParagraph(
+                    pdf_paragraph_composition=[
+                        _line(
+                            [
+                                _char(u, i * 6, size, font_id)
+                                for i, (u, size, font_id) in enumerate(first)
+                            ]
+                        ),
+                        _line(
+                            [
+                                _char(u, i * 6, size, y=-20)
+                                for i, (u, size) in enumerate(second)
+                            ]
+                        ),
+                    ]
+                )
+            ],
+        )
+
+        processor.process_page_formulas(page)
+
+        assert _dump(page) == [
+            ("line", "a  "),
+            ("formula", "x2  ", (18, 0, 41.0, 10)),
+            ("line", "b  "),
+            ("formula", "34 ", (60, 0, 75.0, 6)),
+            ("line", "c"),
+            ("formula", "α = ", (84, 0, 107.0, 10)),
+            ("line", "d"),
+            ("line", "  klm"),
+        ]
+
+
+class TestMergeOverlappingFormulas:
+    def test_merge_order(self, processor):
+        formulas = [
+            # numerator, fraction bar and denominator overlap in a chain
+            [_char("a", 10, y=16), _char("b", 15, y=16)],
+            [_char("—", 8, size=4, y=14, width=16)],
+            [_char("c", 12, y=5), _char("d", 9, y=9)],
+            None,
+            # beside each other
+            [_char("e", 40, y=5)],
+            [_char("f", 60, y=5)],
+            # contained in the first one
+            [_char("g", 80, size=20, y=5)],
+            [_char("h", 82, y=12)],
+            [_char("i", 84, y=0)],
+        ]
+        compositions = []
+        for chars in formulas:
+            if chars is None:
+                compositions.append(_line([_char("t", 30)]))
+                continue
+            formula = PdfFormula(pdf_character=chars)
+            processor.update_formula_data(formula)
+            compositions.append(PdfParagraphComposition(pdf_formula=formula))
+        page = Page(
+            pdf_paragraph=[PdfParagraph(pdf_paragraph_composition=compositions)]
+        )
+
+        processor.merge_overlapping_formulas(page)
+
+        assert _dump(page) == [
+            ("formula", "cd—ab", (8, 5, 24, 26)),
+            ("line", "t"),
+            ("formula", "e", (40, 5, 45.0, 15)),
+            ("formula", "f", (60, 5, 65.0, 15)),
+            ("formula", "igh", (80, 0, 90.0, 25)),
+        ]
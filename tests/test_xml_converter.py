@@ -0,0 +1,143 @@
+import dataclasses
+
+import orjson
+import pytest
+from babeldoc.document_il import il_version_1
+from babeldoc.document_il.xml_converter import BINARY_MAGIC
+from babeldoc.document_il.xml_converter import JSON_DUMP_SUFFIX
+from babeldoc.document_il.xml_converter import XMLConverter
+from babeldoc.document_il.xml_converter import _get_codec
+
+
+def _make_document() -> il_version_1.Document:
+    style = il_version_1.PdfStyle(
+        font_id="F1",
+        font_size=10.5,
+        graphic_state=il_version_1.GraphicState(
+            linewidth=0.5, dash=[1.0, 2.0], ncolor=[0.1, 0.2, 0.3]
+        ),
+    )
+    char = il_version_1.PdfCharacter(
+        pdf_style=style,
+        box=il_version_1.Box(x=1.0, y=2.0, x2=3.0, y2=4.0),
+        visual_bbox=il_version_1.VisualBbox(
+            box=il_version_1.Box(x=1.1, y=2.1, x2=2.9, y2=3.9)
+        ),
+        vertical=False,
+        pdf_character_id=42,
+        char_unicode="\ud835",  # lone surrogates do occur in broken PDFs
+        advance=0.1 + 0.2,
+    )
+    paragraph = il_version_1.PdfParagraph(
+        box=il_version_1.Box(x=0.0, y=0.0, x2=10.0, y2=10.0),
+        pdf_style=style,
+        unicode="x",
+        pdf_paragraph_composition=[
+            il_version_1.PdfParagraphComposition(
+                pdf_line=il_version_1.PdfLine(pdf_character=[char])
+            ),
+            il_version_1.PdfParagraphComposition(
+                pdf_formula=il_version_1.PdfFormula(pdf_character=[char], x_offset=-1.5)
+            ),
+            il_version_1.PdfParagraphComposition(
+                pdf_same_style_unicode_characters=il_version_1.PdfSameStyleUnicodeCharacters(
+                    pdf_style=style, unicode="中文"
+                )
+            ),
+        ],
+    )
+    page = il_version_1.Page(
+        mediabox=il_version_1.Mediabox(box=il_version_1.Box(0, 0, 612, 792)),
+        pdf_font=[
+            il_version_1.PdfFont(
+                name="Font",
+                font_id="F1",
+                pdf_font_char_bounding_box=[
+                    il_version_1.PdfFontCharBoundingBox(0, 0, 1, 1, char_id=3)
+                ],
+            )
+        ],
+        page_layout=[il_version_1.PageLayout(id=1, conf=0.9, class_name="text")],
+        pdf_paragraph=[paragraph],
+        pdf_character=[char],
+        base_operations=il_version_1.BaseOperations(value="q Q"),
+        page_number=0,
+    )
+    return il_version_1.Document(page=[page], total_pages=1)
+
+
+class TestBinaryIL:
+    def test_binary_round_trip(self, tmp_path):
+        converter = XMLConverter()
+        document = _make_document()
+        path = tmp_path / "doc.bdil"
+        converter.write_binary(document, path)
+        assert path.read_bytes().startswith(BINARY_MAGIC)
+        assert converter.read_binary(path) == document
+
+    def test_copy_tree(self):
+        converter = XMLConverter()
+        document = _make_document()
+        copied = converter.copy_tree(document)
+        assert copied == document
+        assert copied.page[0] is not document.page[0]
+        copied.page[0].pdf_character[0].pdf_style.graphic_state.dash.append(3.0)
+        assert copied != document
+
+        page = converter.copy_tree(document.page[0])
+        assert isinstance(page, il_version_1.Page)
+        assert page == document.page[0]
+
+    def test_copy_tree_does_not_keep_aliasing(self):
+        document = _make_document()
+        page = document.page[0]
+        assert page.pdf_paragraph[0].pdf_style is page.pdf_character[0].pdf_style
+
+        copied = XMLConverter().copy_tree(page)
+
+        assert copied.pdf_paragraph[0].pdf_style == copied.pdf_character[0].pdf_style
+        assert (
+            copied.pdf_paragraph[0].pdf_style is not copied.pdf_character[0].pdf_style
+        )
+
+    def test_reject_ambiguous_union(self):
+        @dataclasses.dataclass
+        class Ambiguous:
+            value: il_version_1.Box | il_version_1.PdfStyle | None = None
+
+        with pytest.raises(TypeError):
+            _get_codec(Ambiguous)
+        with pytest.raises(TypeError):
+            _get_codec(Ambiguous)
+
+    def test_reject_foreign_data(self):
+        with pytest.raises(ValueError):
+            XMLConverter().from_binary(b"not a snapshot")
+
+
+class TestJsonDump:
+    def test_json_dump(self, tmp_path):
+        converter = XMLConverter()
+        document = _make_document()
+        # orjson rejects lone surrogates
+        document.page[0].pdf_character[0].char_unicode = "x"
+        second_page = converter.copy_tree(document.page[0])
+        second_page.page_number = 1
+        document.page.append(second_page)
+        document.total_pages = 2
+        path = tmp_path / f"doc{JSON_DUMP_SUFFIX}"
+
+        converter.write_json_dump(document, path)
+        assert converter.read_json_dump(path) == orjson.loads(
+            converter.to_json(document)
+        )
+
+        converter.write_json_dump(
+            document, path, page_filter=lambda page: page.page_number == 1
+        )
+        dump = converter.read_json_dump(path)
+        assert [page["page_number"] for page in dump["page"]] == [1]
+        assert dump["total_pages"] == 2
+
+        converter.write_json_dump(document, path, page_filter=lambda _: False)
+        assert converter.read_json_dump(path) == {"page": [], "total_pages": 2}